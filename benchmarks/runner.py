@@ -0,0 +1,146 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import timeit
+import tracemalloc
+from dataclasses import dataclass
+
+DEFAULT_MIN_TIME = 0.2
+DEFAULT_REPEAT = 5
+DEFAULT_RESULTS_DIR = ".benchmarks"
+ALLOCATION_CALLS = 50
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    calls: int
+    best: float
+    median: float
+    alloc_bytes: float
+    retained_bytes: float
+
+    @property
+    def ops_per_sec(self) -> float:
+        return 1 / self.best if self.best else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "best": self.best,
+            "median": self.median,
+            "ops_per_sec": self.ops_per_sec,
+            "alloc_bytes": self.alloc_bytes,
+            "retained_bytes": self.retained_bytes
+        }
+
+
+def measure(name: str, func, min_time: float = DEFAULT_MIN_TIME, repeat: int = DEFAULT_REPEAT) -> BenchmarkResult:
+    """Time func per call (best and median of repeat rounds) and measure its allocations with tracemalloc.
+
+    alloc_bytes is the mean peak memory a call allocates on top of what was live before it,
+    retained_bytes what stays allocated after it returns.
+    """
+    func()
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(int(number * min_time / 0.2), 1)
+    rounds = [elapsed / number for elapsed in timer.repeat(repeat=repeat, number=number)]
+
+    tracemalloc.start()
+    try:
+        peaks = 0
+        start_current, _ = tracemalloc.get_traced_memory()
+        for _ in range(ALLOCATION_CALLS):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks += peak - before
+        end_current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return BenchmarkResult(
+        name=name,
+        calls=number * repeat,
+        best=min(rounds),
+        median=statistics.median(rounds),
+        alloc_bytes=peaks / ALLOCATION_CALLS,
+        retained_bytes=max(end_current - start_current, 0) / ALLOCATION_CALLS
+    )
+
+
+def measure_startup(name: str, code: str, repeat: int = DEFAULT_REPEAT) -> BenchmarkResult:
+    """Wall time of running code in a fresh interpreter, so imports cached in this process do not hide it.
+
+    Includes the interpreter's own startup, which the startup.python benchmark measures on its own.
+    """
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, capture_output=True)
+        rounds.append(time.perf_counter() - start)
+    return BenchmarkResult(name=name, calls=repeat, best=min(rounds), median=statistics.median(rounds),
+                           alloc_bytes=0.0, retained_bytes=0.0)
+
+
+def current_commit() -> str:
+    """Short hash of HEAD with a -dirty suffix for uncommitted changes, 'unknown' outside a git checkout."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+
+def save_results(results: list, results_dir: str = DEFAULT_RESULTS_DIR) -> str:
+    """Store the results as <results_dir>/<commit>.json and return the path."""
+    os.makedirs(results_dir, exist_ok=True)
+    commit = current_commit()
+    path = os.path.join(results_dir, f"{commit}.json")
+    with open(path, "w") as file:
+        json.dump({
+            "commit": commit,
+            "created": time.time(),
+            "python": platform.python_version(),
+            "results": {result.name: result.to_dict() for result in results}
+        }, file, indent=2)
+    return path
+
+
+def load_results(reference: str, results_dir: str = DEFAULT_RESULTS_DIR) -> dict:
+    """Load stored results by file path or by (a prefix of) the commit they were saved for."""
+    if os.path.isfile(reference):
+        path = reference
+    else:
+        names = sorted(name for name in os.listdir(results_dir) if name.startswith(reference)) \
+            if os.path.isdir(results_dir) else []
+        if not names:
+            raise FileNotFoundError(f"No stored benchmark results for '{reference}' in {results_dir}")
+        path = os.path.join(results_dir, names[0])
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def format_table(results: list, baseline: dict = None) -> str:
+    """Per-benchmark ops/sec, time per call and allocations, with the change against a baseline if given."""
+    header = f"{'benchmark':<40} {'ops/sec':>12} {'us/op':>10} {'alloc KiB':>10} {'kept B':>8}"
+    if baseline:
+        header += f" {'vs ' + baseline['commit']:>16}"
+    lines = [header]
+    for result in results:
+        line = (f"{result.name:<40} {result.ops_per_sec:>12,.0f} {result.best * 1e6:>10.1f}"
+                f" {result.alloc_bytes / 1024:>10.1f} {result.retained_bytes:>8.0f}")
+        previous = (baseline or {}).get("results", {}).get(result.name)
+        # A zero baseline (a benchmark whose best round timed as 0) has no meaningful ratio
+        if previous and previous["ops_per_sec"]:
+            line += f" {(result.ops_per_sec / previous['ops_per_sec'] - 1) * 100:>+15.1f}%"
+        lines.append(line)
+    return "\n".join(lines)
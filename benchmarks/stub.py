@@ -0,0 +1,80 @@
+import io
+import json
+import re
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+from utils.api_client import BookCartClient
+from utils.data_factory import load_test_data
+from utils.mock_server import generate_books
+from utils.transport import Transport
+
+STUB_BASE_URL = "http://stub.local/api"
+STUB_TOKEN = "eyJhbGciOiJub25lIn0.eyJleHAiOjQxMDI0NDQ4MDB9.stub"
+
+
+def _canned_routes() -> list:
+    """(method, path pattern, status, body) of every endpoint the facades call, bodies encoded once."""
+    data = load_test_data()
+    books = generate_books(data["expected_categories"])
+    cart = [{"book": book, "quantity": 1} for book in books[:3]]
+    orders = [{"orderId": f"{index:08d}", "orderDetails": cart, "cartTotal": 3} for index in range(20)]
+    login = {"token": STUB_TOKEN, "userDetails": {"userId": 1, "username": "stub", "userTypeName": "User"}}
+    routes = [
+        ("GET", r"/Book", 200, books),
+        ("GET", r"/Book/GetCategoriesList", 200, data["expected_categories"]),
+        ("GET", r"/Book/GetSimilarBooks/\d+", 200, books[:5]),
+        ("GET", r"/Book/\d+", 200, books[0]),
+        ("POST", r"/User", 200, None),
+        ("GET", r"/User/validateUserName/[^/]+", 200, True),
+        ("POST", r"/login", 200, login),
+        ("GET", r"/ShoppingCart/\d+", 200, cart),
+        ("POST", r"/ShoppingCart/AddToCart/\d+/\d+", 200, 3),
+        ("DELETE", r"/ShoppingCart/\d+/\d+", 200, 2),
+        ("POST", r"/CheckOut/\d+", 200, None),
+        ("GET", r"/Order/\d+", 200, orders),
+    ]
+    return [
+        (method, re.compile(f"/api{pattern}$"), status, b"" if body is None else json.dumps(body).encode())
+        for method, pattern, status, body in routes
+    ]
+
+
+class StubAdapter(HTTPAdapter):
+    """Transport adapter answering every BookCart endpoint with canned responses, without any socket I/O.
+
+    Responses go through requests' normal response building, so the measured cost is the client's own.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.routes = _canned_routes()
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        path = request.path_url.split("?", 1)[0]
+        for method, pattern, status, body in self.routes:
+            if method == request.method and pattern.match(path):
+                break
+        else:
+            status, body = 404, b""
+        raw = HTTPResponse(
+            body=io.BytesIO(body),
+            headers={"Content-Type": "application/json; charset=utf-8", "Content-Length": str(len(body))},
+            status=status,
+            preload_content=False,
+            decode_content=False
+        )
+        return self.build_response(request, raw)
+
+
+def stub_transport(**kwargs) -> Transport:
+    """Transport whose session is served by a StubAdapter."""
+    transport = Transport(**kwargs)
+    adapter = StubAdapter()
+    transport.session.mount("http://", adapter)
+    transport.session.mount("https://", adapter)
+    return transport
+
+
+def stub_client(**kwargs) -> BookCartClient:
+    """BookCartClient against the stub transport."""
+    return BookCartClient(STUB_BASE_URL, stub_transport(), **kwargs)
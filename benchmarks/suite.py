@@ -0,0 +1,144 @@
+"""Micro-benchmarks of the client library's own overhead, against a stub transport so no network is used.
+
+Usage:
+    python -m benchmarks.suite                        # run everything, store results for this commit
+    python -m benchmarks.suite -k facade --compare 1a2b3c4
+    python -m benchmarks.suite -k startup             # import and collection time in fresh interpreters
+"""
+import argparse
+import json
+from utils.auth_cache import TokenCache
+from utils.catalog import CatalogCache
+from utils.data_factory import (
+    generate_invalid_registration_data, generate_registration_batch, generate_valid_registration_data,
+    get_valid_user_credentials, load_test_data, unique_username_suffix
+)
+from utils.metrics import MetricsRecorder, RequestSample
+from utils.user_pool import UserPool
+from benchmarks.runner import DEFAULT_MIN_TIME, DEFAULT_REPEAT, DEFAULT_RESULTS_DIR, format_table, load_results, \
+    measure, measure_startup, save_results
+from benchmarks.stub import STUB_BASE_URL, stub_client
+
+BATCH_SIZE = 1000
+
+
+def _select(benchmarks: dict, keyword: str) -> dict:
+    return {name: func for name, func in benchmarks.items() if keyword in name}
+
+
+# The builders select by keyword before their setup: the lambdas only read the setup's variables
+# when called, so a suite -k filters out entirely costs nothing to build.
+def facade_benchmarks(keyword: str = "") -> dict:
+    """One benchmark per API facade method, plus the bare transport call they all go through."""
+    benchmarks = _select({
+        "transport.request": lambda: client.transport.request("GET", f"{STUB_BASE_URL}/Book/1"),
+        "facade.users.register_user": lambda: client.users.register_user(registration),
+        "facade.users.login_user": lambda: client.users.login_user("stub", "Passw0rd"),
+        "facade.users.validate_username": lambda: client.users.validate_username("stub"),
+        "facade.books.get_all_books": lambda: client.books.get_all_books().json(),
+        "facade.books.iter_all_books": lambda: list(client.books.iter_all_books()),
+        "facade.books.get_book_by_id": lambda: client.books.get_book_by_id(1).json(),
+        "facade.books.get_similar_books": lambda: client.books.get_similar_books(1).json(),
+        "facade.books.get_categories": lambda: client.books.get_categories().json(),
+        "facade.cart.add_to_cart": lambda: client.cart.add_to_cart(1, 1),
+        "facade.cart.get_cart_items": lambda: client.cart.get_cart_items(1).json(),
+        "facade.cart.remove_from_cart": lambda: client.cart.remove_from_cart(1, 1),
+        "facade.cart.add_many_8": lambda: client.cart.add_many(1, list(range(1, 9))),
+        "facade.cart.checkout": lambda: client.cart.checkout(1, order, "token"),
+        "facade.cart.get_order_history": lambda: client.cart.get_order_history(1, "token").json(),
+        "facade.cart.find_order_with_book": lambda: client.cart.find_order_with_book(1, 3, "token"),
+        "facade.cart.get_cart_contains": lambda: client.cart.get_cart(1).contains(3),
+        "facade.cart.get_orders_find_by_book": lambda: client.cart.get_orders(1, "token").find_by_book(3),
+        "facade.users.login": lambda: client.users.login("stub", "Passw0rd").token,
+    }, keyword)
+    if not benchmarks:
+        return benchmarks
+    client = stub_client()
+    registration = generate_valid_registration_data()
+    order = {"orderDetails": client.cart.get_cart_items(1).json(), "cartTotal": 3}
+    return benchmarks
+
+
+def data_factory_benchmarks(keyword: str = "") -> dict:
+    """Test data generators and the serialization the facades do with their output."""
+    registration = generate_valid_registration_data()
+    return _select({
+        "data.generate_valid_registration": generate_valid_registration_data,
+        "data.generate_invalid_registration": generate_invalid_registration_data,
+        "data.unique_username_suffix": unique_username_suffix,
+        "data.get_valid_user_credentials": get_valid_user_credentials,
+        "data.registration_to_dict": registration.to_dict,
+        "data.registration_json": lambda: json.dumps(registration.to_dict()),
+        f"data.registration_batch_{BATCH_SIZE}": lambda: generate_registration_batch(BATCH_SIZE),
+        "data.load_test_data": load_test_data,
+    }, keyword)
+
+
+def fixture_benchmarks(keyword: str = "") -> dict:
+    """What the conftest fixtures do per test once the session fixtures exist."""
+    benchmarks = _select({
+        "fixture.api_client": lambda: type(client)(STUB_BASE_URL, client.transport, client.books.catalog_cache),
+        "fixture.auth_credentials": lambda: token_cache.get("stub", "Passw0rd", client.users.login_user),
+        "fixture.book_id": lambda: client.books.get_catalog().random_book_id(),
+        "fixture.catalog_refresh": lambda: expired_catalog.books.get_catalog(),
+        "fixture.user_lease": lambda: pool.lease(client, 0),
+        "fixture.cleanup_cart_unchanged": lambda: client.cart.restore_cart(1, cart_snapshot),
+        "hook.metrics_recorder": lambda: recorder(sample),
+    }, keyword)
+    if not benchmarks:
+        return benchmarks
+    client = stub_client(catalog_cache=CatalogCache())
+    client.books.get_catalog()
+    token_cache = TokenCache()
+    token_cache.get("stub", "Passw0rd", client.users.login_user)
+    expired_catalog = stub_client(catalog_cache=CatalogCache(ttl=0))
+    pool = UserPool(load_test_data()["valid_users"])
+    recorder = MetricsRecorder()
+    sample = RequestSample("GET", "/Book/{id}", 200, 512, 0.0, 0.0, 0.01, 0.012)
+    cart_snapshot = client.cart.snapshot_cart(1)
+    return benchmarks
+
+
+SUITES = {
+    "facade": facade_benchmarks,
+    "data": data_factory_benchmarks,
+    "fixture": fixture_benchmarks,
+}
+
+# What every pytest process and xdist worker pays before its first test, each in a fresh interpreter
+STARTUP = {
+    "startup.python": "pass",
+    "startup.import_data_factory": "import utils.data_factory",
+    "startup.import_api_client": "import utils.api_client",
+    "startup.import_async_client": "import utils.async_client",
+    "startup.import_conftest": "import tests.conftest",
+    "startup.first_fake_registration": "from utils.data_factory import generate_valid_registration_data as g; g()",
+    "startup.collect_suite": "import pytest; pytest.main(['--collect-only', '-q', '-p', 'no:cacheprovider'])",
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the client library's own per-call overhead.")
+    parser.add_argument("-k", dest="keyword", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="Minimum seconds per timing round")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Timing rounds, the best one is reported")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR, help="Where results are stored per commit")
+    parser.add_argument("--compare", metavar="REF", help="Commit (prefix) or results file to compare against")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results")
+    args = parser.parse_args(argv)
+
+    baseline = load_results(args.compare, args.results_dir) if args.compare else None
+    results = []
+    for build in SUITES.values():
+        for name, func in build(args.keyword).items():
+            results.append(measure(name, func, args.min_time, args.repeat))
+    for name, code in STARTUP.items():
+        if args.keyword in name:
+            results.append(measure_startup(name, code, args.repeat))
+    print(format_table(results, baseline))
+    if not args.no_save:
+        print(f"results written to {save_results(results, args.results_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,46 +1,419 @@
 import pytest
+import pytest_asyncio
+import contextlib
+import json
 import logging
+import random
 from utils.api_client import BookCartClient
-from utils.data_factory import get_valid_user_credentials
+from utils.auth_cache import TokenCache
+from utils.cassette import Cassette, RECORD, REPLAY
+from utils.catalog import CatalogCache, DEFAULT_CATALOG_TTL
+from utils.data_factory import fake, load_test_data
+from utils.async_client import AsyncBookCartClient, DEFAULT_MAX_CONCURRENCY
+from utils.metrics import ConvergenceRecorder, MetricsRecorder
+from utils import polling
+from utils.perf_budget import PerfBudgetPlugin, FAIL, WARN, OFF
+from utils.sharding import ShardingPlugin
+from utils.throttle import AdaptiveRateLimiter, CircuitBreaker, DEFAULT_FAILURE_THRESHOLD, DEFAULT_RESET_TIMEOUT
+from utils.user_pool import UserPool, worker_slot
+from utils.transport import Transport, DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+
+metrics_key = pytest.StashKey[MetricsRecorder]()
+convergence_key = pytest.StashKey[ConvergenceRecorder]()
+session_counters_key = pytest.StashKey[dict]()
+cassette_key = pytest.StashKey[Cassette]()
 
 def pytest_addoption(parser):
     parser.addoption(
         "--base-url",
         action="store",
         default="https://bookcart.azurewebsites.net/api",
-        help="Base URL for the Book Cart API"
+        help="Base URL for the Book Cart API, 'local' starts the built-in mock server"
+    )
+    parser.addoption(
+        "--mock-latency",
+        action="store",
+        type=float,
+        default=0.0,
+        help="Mean artificial latency in seconds added by the local mock server"
+    )
+    parser.addoption(
+        "--mock-error-rate",
+        action="store",
+        type=float,
+        default=0.0,
+        help="Fraction of local mock server responses replaced with 503"
+    )
+    parser.addoption(
+        "--pool-size",
+        action="store",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help="Maximum number of pooled keep-alive connections per host"
+    )
+    parser.addoption(
+        "--http-timeout",
+        action="store",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Default timeout in seconds for every API call"
+    )
+    parser.addoption(
+        "--http-retries",
+        action="store",
+        type=int,
+        default=0,
+        help="Retries with backoff for idempotent requests (GET/DELETE) on connection errors and 502/503/504"
+    )
+    parser.addoption(
+        "--rate-limit",
+        action="store",
+        type=float,
+        default=0.0,
+        help="Initial requests/sec of the adaptive client-side rate limiter (0 disables it)"
+    )
+    parser.addoption(
+        "--rate-limit-max",
+        action="store",
+        type=float,
+        default=None,
+        help="Ceiling in requests/sec the adaptive rate limiter may grow to"
+    )
+    parser.addoption(
+        "--circuit-breaker-threshold",
+        action="store",
+        type=int,
+        default=0,
+        help=f"Consecutive timeouts/5xx after which an endpoint's circuit opens, e.g. {DEFAULT_FAILURE_THRESHOLD} "
+             f"(0 disables the breaker)"
+    )
+    parser.addoption(
+        "--circuit-breaker-reset",
+        action="store",
+        type=float,
+        default=DEFAULT_RESET_TIMEOUT,
+        help="Seconds an open circuit waits before letting a trial request through"
+    )
+    parser.addoption(
+        "--async-concurrency",
+        action="store",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENCY,
+        help="Maximum number of in-flight requests for the async client"
+    )
+    parser.addoption(
+        "--register-users",
+        action="store_true",
+        default=False,
+        help="Register a fresh user per worker instead of leasing the pre-provisioned test_data.json users"
+    )
+    parser.addoption(
+        "--catalog-ttl",
+        action="store",
+        type=float,
+        default=DEFAULT_CATALOG_TTL,
+        help="Seconds the cached book catalog is used before it is revalidated"
+    )
+    parser.addoption(
+        "--catalog-snapshot",
+        action="store",
+        default=None,
+        help="File to keep the catalog snapshot in, shared between workers and runs"
+    )
+    parser.addoption(
+        "--record",
+        action="store",
+        default=None,
+        metavar="CASSETTE",
+        help="Record every API response into this cassette file"
+    )
+    parser.addoption(
+        "--replay",
+        action="store",
+        default=None,
+        metavar="CASSETTE",
+        help="Replay API responses from this cassette file instead of using the network"
+    )
+    parser.addoption(
+        "--latency-report",
+        action="store",
+        default="latency-report.json",
+        help="JSON file for per-endpoint latency histograms (empty to disable)"
+    )
+    parser.addoption(
+        "--perf-mode",
+        action="store",
+        choices=(FAIL, WARN, OFF),
+        default=WARN,
+        help="What a perf_budget test does on an exceeded budget or baseline regression"
+    )
+    parser.addoption(
+        "--perf-repeat",
+        action="store",
+        type=int,
+        default=None,
+        help="Override how many times every perf_budget test is repeated"
+    )
+    parser.addoption(
+        "--perf-baseline",
+        action="store",
+        default="perf-baseline.json",
+        help="Baseline file perf_budget latencies are compared against (empty to disable)"
+    )
+    parser.addoption(
+        "--perf-update-baseline",
+        action="store_true",
+        default=False,
+        help="Store this run's perf_budget latencies as the new baseline"
+    )
+    parser.addoption(
+        "--durations-db",
+        action="store",
+        default=".test-durations.json",
+        help="Timing database used to balance shards"
+    )
+    parser.addoption(
+        "--store-durations",
+        action="store_true",
+        default=False,
+        help="Record this run's test durations into the timing database"
+    )
+    parser.addoption(
+        "--shard-count",
+        action="store",
+        type=int,
+        default=1,
+        help="Number of CI nodes the suite is split across"
+    )
+    parser.addoption(
+        "--shard-index",
+        action="store",
+        type=int,
+        default=0,
+        help="Which shard (0-based) this node runs"
     )
 
-@pytest.fixture
+def pytest_configure(config):
+    if config.getoption("--record") and config.getoption("--replay"):
+        raise pytest.UsageError("--record and --replay cannot be combined")
+    if config.getoption("--record") and hasattr(config, "workerinput"):
+        raise pytest.UsageError("--record needs a single process, run it without -n")
+    if config.getoption("--record"):
+        config.stash[cassette_key] = Cassette(config.getoption("--record"), RECORD)
+    elif config.getoption("--replay"):
+        config.stash[cassette_key] = Cassette(config.getoption("--replay"), REPLAY)
+    config.stash[metrics_key] = MetricsRecorder()
+    config.stash[convergence_key] = ConvergenceRecorder()
+    polling.add_hook(config.stash[convergence_key])
+    config.stash[session_counters_key] = {
+        "connections": {"requests": 0, "connections": 0, "reused": 0},
+        "token_cache": {"hits": 0, "misses": 0},
+        "throttling": {"throttled": 0, "decreases": 0, "opened": 0, "rejected": 0}
+    }
+    config.pluginmanager.register(PerfBudgetPlugin(config), "perf_budget")
+    config.pluginmanager.register(ShardingPlugin(config), "sharding")
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_runtest_setup(item):
+    """Scope cassette lookups to the test and seed its random data so recorded requests match on replay."""
+    cassette = item.config.stash.get(cassette_key, None)
+    if cassette is not None:
+        cassette.scope = item.nodeid
+        random.seed(item.nodeid)
+        fake.seed_instance(item.nodeid)
+
+def _add_counters(config, group: str, values: dict):
+    totals = config.stash[session_counters_key][group]
+    for name, value in values.items():
+        totals[name] += value
+
+def pytest_unconfigure(config):
+    polling.remove_hook(config.stash[convergence_key])
+    cassette = config.stash.get(cassette_key, None)
+    if cassette is not None:
+        cassette.close()
+
+def pytest_sessionfinish(session):
+    """Send this xdist worker's latency and convergence metrics and session counters to the controller."""
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["latency_metrics"] = json.dumps(session.config.stash[metrics_key].to_dict())
+        workeroutput["convergence_metrics"] = json.dumps(session.config.stash[convergence_key].to_dict())
+        workeroutput["session_counters"] = json.dumps(session.config.stash[session_counters_key])
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """Merge a finished xdist worker's latency and convergence metrics and session counters."""
+    workeroutput = getattr(node, "workeroutput", {})
+    if "latency_metrics" in workeroutput:
+        worker_metrics = MetricsRecorder.from_dict(json.loads(workeroutput["latency_metrics"]))
+        node.config.stash[metrics_key].merge(worker_metrics)
+    if "convergence_metrics" in workeroutput:
+        worker_convergence = ConvergenceRecorder.from_dict(json.loads(workeroutput["convergence_metrics"]))
+        node.config.stash[convergence_key].merge(worker_convergence)
+    if "session_counters" in workeroutput:
+        for group, values in json.loads(workeroutput["session_counters"]).items():
+            _add_counters(node.config, group, values)
+
+def pytest_terminal_summary(terminalreporter, config):
+    """Report per-endpoint latency, read-after-write convergence, connection reuse, token cache and throttling."""
+    recorder = config.stash[metrics_key]
+    if recorder.endpoints:
+        terminalreporter.write_sep("-", "API latency per endpoint")
+        terminalreporter.write_line(recorder.format_table())
+        report_path = config.getoption("--latency-report")
+        if report_path:
+            with open(report_path, "w") as file:
+                json.dump(recorder.to_dict(), file, indent=2)
+            terminalreporter.write_line(f"latency histograms written to {report_path}")
+    convergence = config.stash[convergence_key]
+    if convergence.checks:
+        terminalreporter.write_sep("-", "Read-after-write convergence")
+        terminalreporter.write_line(convergence.format_table())
+    counters = config.stash[session_counters_key]
+    stats = counters["connections"]
+    if stats["requests"]:
+        terminalreporter.write_sep("-", "HTTP connection reuse")
+        terminalreporter.write_line(
+            f"requests: {stats['requests']}, connections opened: {stats['connections']}, reused: {stats['reused']}"
+        )
+    stats = counters["token_cache"]
+    if stats["hits"] or stats["misses"]:
+        terminalreporter.write_sep("-", "Auth token cache")
+        terminalreporter.write_line(f"hits: {stats['hits']}, misses (logins): {stats['misses']}")
+    stats = counters["throttling"]
+    if any(stats.values()):
+        terminalreporter.write_sep("-", "Rate limiting and circuit breaker")
+        terminalreporter.write_line(
+            f"429 responses: {stats['throttled']}, rate decreases: {stats['decreases']}, "
+            f"circuits opened: {stats['opened']}, requests rejected: {stats['rejected']}"
+        )
+
+@pytest.fixture(scope="session")
+def transport(request):
+    """Shared pooled HTTP transport for the whole test session, rate limited and circuit broken if configured."""
+    rate_limiter = None
+    if request.config.getoption("--rate-limit"):
+        rate_limiter = AdaptiveRateLimiter(
+            request.config.getoption("--rate-limit"),
+            max_rate=request.config.getoption("--rate-limit-max")
+        )
+    circuit_breaker = None
+    if request.config.getoption("--circuit-breaker-threshold"):
+        circuit_breaker = CircuitBreaker(
+            request.config.getoption("--circuit-breaker-threshold"),
+            request.config.getoption("--circuit-breaker-reset")
+        )
+    transport = Transport(
+        pool_size=request.config.getoption("--pool-size"),
+        timeout=request.config.getoption("--http-timeout"),
+        retries=request.config.getoption("--http-retries"),
+        rate_limiter=rate_limiter,
+        circuit_breaker=circuit_breaker
+    )
+    transport.add_hook(request.config.stash[metrics_key])
+    cassette = request.config.stash.get(cassette_key, None)
+    if cassette is not None:
+        transport.use_cassette(cassette)
+    yield transport
+    transport.close()
+    _add_counters(request.config, "connections", transport.connection_stats())
+    if rate_limiter is not None:
+        _add_counters(request.config, "throttling", rate_limiter.stats())
+    if circuit_breaker is not None:
+        _add_counters(request.config, "throttling", circuit_breaker.stats())
+
+@pytest.fixture(scope="session")
+def token_cache(request, tmp_path_factory):
+    """Session-wide login token cache, shared between xdist workers through a locked file."""
+    cache_file = None
+    if hasattr(request.config, "workerinput"):
+        # The parent of each worker's basetemp is the same directory for all workers of the run
+        cache_file = str(tmp_path_factory.getbasetemp().parent / "token_cache.json")
+    cache = TokenCache(cache_file)
+    yield cache
+    _add_counters(request.config, "token_cache", cache.stats())
+
+@pytest.fixture(scope="session")
+def user_credentials(request, base_url, transport):
+    """Test user leased for this worker with an empty cart, so parallel workers never share a cart."""
+    pool = UserPool(load_test_data()["valid_users"], register=request.config.getoption("--register-users"))
+    # Replayed responses were recorded for the first user, whichever worker asks; otherwise
+    # workers of different CI shards lease different users
+    worker = 0 if request.config.getoption("--replay") else worker_slot(request.config.getoption("--shard-index"))
+    cassette = request.config.stash.get(cassette_key, None)
+    # Session setup gets its own cassette scope, whichever test happens to trigger it
+    with cassette.scoped("session") if cassette else contextlib.nullcontext():
+        return pool.lease(BookCartClient(base_url, transport), worker)
+
+@pytest.fixture(scope="session")
 def base_url(request):
-    return request.config.getoption("--base-url") 
+    base_url = request.config.getoption("--base-url")
+    if base_url != "local":
+        yield base_url
+        return
+    from utils.mock_server import MockBookCartServer
+    server = MockBookCartServer(
+        latency=request.config.getoption("--mock-latency"),
+        error_rate=request.config.getoption("--mock-error-rate")
+    )
+    yield server.start()
+    server.stop()
 
-@pytest.fixture
-def api_client(base_url):
-    return BookCartClient(base_url)
+@pytest.fixture(scope="session")
+def catalog_cache(request, tmp_path_factory):
+    """Book catalog cache for the session, snapshotted on disk for other workers and runs."""
+    snapshot_path = request.config.getoption("--catalog-snapshot")
+    if snapshot_path is None and hasattr(request.config, "workerinput"):
+        snapshot_path = str(tmp_path_factory.getbasetemp().parent / "catalog_snapshot.json")
+    return CatalogCache(ttl=request.config.getoption("--catalog-ttl"), snapshot_path=snapshot_path)
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def api_client(base_url, transport, catalog_cache):
+    """Client shared by the whole session, it keeps no per-test state."""
+    return BookCartClient(base_url, transport, catalog_cache)
+
+@pytest_asyncio.fixture
+async def async_api_client(request, base_url):
+    """Async client with bounded concurrency reporting into the latency metrics, closed after the test."""
+    if request.config.getoption("--replay"):
+        pytest.skip("The async client does not go through the cassette transport")
+    client = AsyncBookCartClient(
+        base_url,
+        max_concurrency=request.config.getoption("--async-concurrency"),
+        pool_size=request.config.getoption("--pool-size"),
+        timeout=request.config.getoption("--http-timeout")
+    )
+    # Async requests show up in the latency report next to the blocking ones
+    client.add_hook(request.config.stash[metrics_key])
+    yield client
+    await client.close()
+
+@pytest.fixture(scope="session")
 def logger():
     """Logger fixture for all tests."""
     return logging.getLogger(__name__)
 
 @pytest.fixture
-def auth_credentials(api_client):
-    """Get authentication credentials (token and user_id) for all tests."""
-    user_credentials = get_valid_user_credentials()
-    response = api_client.users.login_user(
-        username=user_credentials["username"],
-        password=user_credentials["password"]
+def auth_credentials(api_client, token_cache, user_credentials):
+    """Get authentication credentials (token and user_id) for all tests, logging in only when the cached token expires.
+
+    Function-scoped because tokens expire during long sessions; a cached token is a dictionary lookup.
+    """
+    entry = token_cache.get(
+        user_credentials["username"],
+        user_credentials["password"],
+        api_client.users.login_user
     )
     return {
-        "token": response.json()["token"],
+        "token": entry["token"],
         "user_id": user_credentials["userId"]
     }
 
-@pytest.fixture
-def user_id(auth_credentials):
-    """Extract user_id from auth_credentials."""
-    return auth_credentials["user_id"]
+@pytest.fixture(scope="session")
+def user_id(user_credentials):
+    """User ID of the leased user, the same for the whole session."""
+    return user_credentials["userId"]
 
 @pytest.fixture
 def auth_token(auth_credentials):
@@ -49,24 +422,41 @@ def auth_token(auth_credentials):
 
 @pytest.fixture
 def book_id(api_client):
-    """Get a random book ID from the API."""
-    from utils.data_factory import get_random_book_id
-    response = api_client.books.get_all_books()
-    assert response.status_code == 200, "Failed to get books for book_id fixture"
-    return get_random_book_id(response)
-
-@pytest.fixture
-def cleanup_cart(api_client, user_id, book_id):
-    """Clean up cart after test - use only when needed."""
-    yield 
-    # Cleanup after test
-    try:
-        api_client.cart.remove_from_cart(user_id, book_id)
-    except Exception:
-        pass  # Ignore cleanup errors
-
-
-
+    """Get a random book ID from the cached catalog."""
+    catalog = api_client.books.get_catalog()
+    assert len(catalog) > 0, "No books found in the catalog for book_id fixture"
+    return catalog.random_book_id()
 
+@pytest.fixture(scope="session")
+def cart_snapshots():
+    """Last known cart contents (book ID -> quantity) per leased user, None while the cart is in an unknown state."""
+    return {}
 
+@pytest.fixture(autouse=True)
+def cleanup_cart(request):
+    """Restore the cart of every test using user_id to what it held before the test.
 
+    The leased user's cart is emptied at lease time and used by this worker only, so the state left by
+    the previous restore is still current: no fetch is needed before the test, and afterwards only the
+    books whose quantity changed are touched. After a failed restore the cart is emptied before the
+    next test runs, like at lease time.
+    """
+    if "user_id" not in request.fixturenames:
+        yield
+        return
+    api_client = request.getfixturevalue("api_client")
+    user_id = request.getfixturevalue("user_id")
+    snapshots = request.getfixturevalue("cart_snapshots")
+    if user_id in snapshots and snapshots[user_id] is None:
+        UserPool.reset_cart(api_client, user_id)
+        snapshots[user_id] = {}
+    snapshot = snapshots.setdefault(user_id, {})
+    yield
+    try:
+        result = api_client.cart.restore_cart(user_id, snapshot)
+    except Exception as error:
+        result = None
+        logging.getLogger(__name__).warning(f"Failed to restore cart of user {user_id}: {error}")
+    if result is None or not result.ok:
+        # The cart is in an unknown state, the next test empties it first
+        snapshots[user_id] = None
@@ -0,0 +1,25 @@
+import pytest
+
+@pytest.mark.smoke
+@pytest.mark.asyncio
+async def test_async_catalog_fan_out_smoke(async_api_client, logger):
+    """Smoke test: Fetch every book in the catalog concurrently with the async client."""
+    logger.info("Starting Async Catalog Fan-out Smoke Test")
+
+    # Get all books
+    response = await async_api_client.books.get_all_books()
+    assert response.status_code == 200, f"Failed to get books! Expected 200, got {response.status_code}"
+
+    books = response.json()
+    assert len(books) > 0, "No books found in the catalog"
+    book_ids = [book["bookId"] for book in books]
+    logger.info(f"Fetching {len(book_ids)} books concurrently")
+
+    # Get every book by ID at once
+    responses = await async_api_client.books.get_books_by_ids(book_ids)
+
+    for book_id, response in zip(book_ids, responses):
+        assert response.status_code == 200, f"Failed to get book {book_id}! Expected 200, got {response.status_code}"
+        assert response.json()["bookId"] == book_id, f"Book ID mismatch: expected {book_id}, got {response.json()['bookId']}"
+
+    logger.info("Async Catalog Fan-out Smoke Test completed successfully!")
@@ -1,20 +1,19 @@
 import pytest
-from utils.data_factory import get_random_book_id, get_expected_categories
+from utils.contracts import ContractReport, check_book, check_categories, check_similar_books, sweep_catalog
+from utils.data_factory import get_expected_categories
 
 @pytest.mark.smoke
+@pytest.mark.perf_budget(p95_ms=2000, max_ms=5000, repeat=3)
 def test_book_by_id_smoke(api_client, logger):
     """Smoke test: Get book details by random ID."""
     logger.info("Starting Book by ID Smoke Test")
     
-    # Get all books to find a valid book ID
-    response = api_client.books.get_all_books()
-    assert response.status_code == 200, f"Failed to get books! Expected 200, got {response.status_code}"
-    
-    books = response.json()
-    assert len(books) > 0, "No books found in the catalog"
+    # Get the cached catalog to find a valid book ID
+    catalog = api_client.books.get_catalog()
+    assert len(catalog) > 0, "No books found in the catalog"
 
     # Get a random book ID
-    book_id = get_random_book_id(response)
+    book_id = catalog.random_book_id()
     logger.info(f"Selected book ID: {book_id}")
 
     # Get book details by ID
@@ -30,20 +29,19 @@ def test_book_by_id_smoke(api_client, logger):
     logger.info("Book by ID Smoke Test completed successfully!")
 
 @pytest.mark.functional
+@pytest.mark.perf_budget(p95_ms=2000, max_ms=5000, repeat=3,
+                         endpoints={"GET /Book/GetSimilarBooks/{id}": {"p95_ms": 1500}})
 def test_book_browsing_functional(api_client, logger):
     """Functional test: Complete book browsing flow with similar books."""
     logger.info("Starting Book Browsing Functional Test")
     
-    # Get all books
-    response = api_client.books.get_all_books()
-    assert response.status_code == 200, f"Failed to get books! Expected 200, got {response.status_code}"
-    
-    books = response.json()
-    logger.info(f"Found {len(books)} books in the catalog")
-    assert len(books) > 0, "No books found in the catalog"
+    # Get the cached catalog
+    catalog = api_client.books.get_catalog()
+    logger.info(f"Found {len(catalog)} books in the catalog")
+    assert len(catalog) > 0, "No books found in the catalog"
 
     # Get a random book ID
-    book_id = get_random_book_id(response)
+    book_id = catalog.random_book_id()
     logger.info(f"Selected book ID: {book_id}")
 
     # Get book details by ID
@@ -53,13 +51,10 @@ def test_book_browsing_functional(api_client, logger):
     book_data = response.json()
     logger.info(f"Book details: '{book_data['title']}' by {book_data['author']}")
     
-    # Verify book has all required fields
-    required_fields = ["bookId", "title", "author", "category", "price"]
-    for field in required_fields:
-        assert field in book_data, f"Book is missing required field: {field}"
-    
-    # Verify book ID matches
-    assert book_data["bookId"] == book_id, f"Book ID mismatch: expected {book_id}, got {book_data['bookId']}"
+    # Verify the book against the Book contract and its catalog entry
+    report = ContractReport()
+    check_book(report, book_data, book_id, catalog, f"GET /Book/{book_id}")
+    assert report.ok, report.summary()
 
     book_category = book_data["category"]
     logger.info(f"Book category: {book_category}")
@@ -72,18 +67,15 @@ def test_book_browsing_functional(api_client, logger):
     similar_books = response.json()
     logger.info(f"Found {len(similar_books)} similar books")
     
-    # Verify similar books have matching category
-    if similar_books:
-        for book in similar_books:
-            assert book["category"] == book_category, \
-                f"Similar book has wrong category! Expected: {book_category}, got: {book['category']}"
-        logger.info("All similar books have matching category")
-    else:
-        logger.info("No similar books found (this is OK)")
+    # Verify similar books satisfy the contract and have a matching category
+    check_similar_books(report, similar_books, book_data, catalog, f"GET /Book/GetSimilarBooks/{book_id}")
+    assert report.ok, report.summary()
+    logger.info(report.summary())
     
     logger.info("Book Browsing Functional Test completed successfully!")
 
 @pytest.mark.smoke
+@pytest.mark.perf_budget(p95_ms=2000, max_ms=5000, repeat=3)
 def test_book_categories_smoke(api_client, logger):
     """Smoke test: Validate book categories against expected data."""
     
@@ -103,19 +95,21 @@ def test_book_categories_smoke(api_client, logger):
     assert len(actual_categories) >= len(expected_categories), \
         f"API returned fewer categories than expected. Expected at least {len(expected_categories)}, got {len(actual_categories)}"
     
-    # Verify each expected category exists
-    for expected_category in expected_categories:
-        category_found = False
-        for actual_category in actual_categories:
-            if (actual_category.get("categoryId") == expected_category["categoryId"] and 
-                actual_category.get("categoryName") == expected_category["categoryName"]):
-                category_found = True
-                logger.info(f"Found expected category: {expected_category['categoryName']} (ID: {expected_category['categoryId']})")
-                break
-        
-        if not category_found:
-            logger.error(f"Missing expected category: {expected_category['categoryName']} (ID: {expected_category['categoryId']})")
-            assert False, f"Expected category not found: {expected_category['categoryName']} (ID: {expected_category['categoryId']})"
+    # Verify every category satisfies the contract and each expected category exists
+    report = ContractReport()
+    check_categories(report, actual_categories, expected_categories)
+    assert report.ok, report.summary()
     
     logger.info("All expected categories found in API response!")
     logger.info("Book Categories Validation Test completed successfully")
+
+@pytest.mark.functional
+def test_catalog_contract_sweep(api_client, logger):
+    """Functional test: Validate every category, every book and every similar books list."""
+    logger.info("Starting Catalog Contract Sweep")
+
+    report = sweep_catalog(api_client, get_expected_categories())
+    logger.info(report.summary())
+    assert report.ok, report.summary()
+
+    logger.info("Catalog Contract Sweep completed successfully")
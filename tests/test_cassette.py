@@ -0,0 +1,71 @@
+import json
+import pytest
+import requests
+from utils.cassette import RECORD, REPLAY, Cassette, CassetteMissError
+
+BASE_URL = "http://books.test/api"
+
+def live_response(status: int, body, headers: dict = None) -> requests.Response:
+    """Stands in for a live requests.Response with a JSON body."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update({"Content-Type": "application/json; charset=utf-8", **(headers or {})})
+    response._content = json.dumps(body).encode()
+    return response
+
+@pytest.fixture
+def cassette_path(tmp_path):
+    return str(tmp_path / "session.cassette")
+
+def test_cassette_round_trip(cassette_path):
+    """Unit test: Recorded responses replay in order with their status, kept headers and scrubbed tokens."""
+    cassette = Cassette(cassette_path, RECORD)
+    url = f"{BASE_URL}/ShoppingCart/1"
+    cassette.record("GET", url, "/ShoppingCart/{user}", {}, live_response(200, []))
+    cassette.record("GET", url, "/ShoppingCart/{user}", {},
+                    live_response(200, [{"book": {"bookId": 3}, "quantity": 1}], {"ETag": '"v2"', "Server": "x"}))
+    cassette.record("POST", f"{BASE_URL}/Login", "/Login", {"json": {"username": "a", "password": "b"}},
+                    live_response(200, {"token": "live-secret", "userDetails": {"userId": 1}}))
+    cassette.close()
+
+    replay = Cassette(cassette_path, REPLAY)
+    try:
+        first = replay.replay("GET", url, "/ShoppingCart/{user}", {})
+        second = replay.replay("GET", url, "/ShoppingCart/{user}", {})
+        again = replay.replay("GET", url, "/ShoppingCart/{user}", {})
+        login = replay.replay("POST", f"{BASE_URL}/Login", "/Login", {"json": {"password": "b", "username": "a"}})
+    finally:
+        replay.close()
+    assert (first.status_code, first.json()) == (200, []), "First call should replay the first recording"
+    assert second.json() == [{"book": {"bookId": 3}, "quantity": 1}], "Second call should replay the second one"
+    assert again.json() == second.json(), "Calls past the recordings should repeat the last one"
+    assert second.headers.get("ETag") == '"v2"' and "Server" not in second.headers, "Only kept headers replay"
+    assert "live-secret" not in login.text, "Recorded tokens should be scrubbed"
+    assert login.json()["token"] == replay.token, "Token should be replaced by the replay token"
+
+def test_cassette_replay_mismatches(cassette_path):
+    """Unit test: Replay matches past run-unique names, falls back to the endpoint template and misses loudly."""
+    cassette = Cassette(cassette_path, RECORD)
+    with cassette.scoped("test_a"):
+        cassette.record("POST", f"{BASE_URL}/User", "/User", {"json": {"username": "user_1a2b3c4d"}},
+                        live_response(200, {"scope": "test_a"}))
+    cassette.record("POST", f"{BASE_URL}/User", "/User", {"json": {"username": "user_1a2b3c4d"}},
+                    live_response(200, {"scope": ""}))
+    cassette.close()
+
+    replay = Cassette(cassette_path, REPLAY)
+    try:
+        with replay.scoped("test_a"):
+            scoped = replay.replay("POST", f"{BASE_URL}/User", "/User", {"json": {"username": "user_9f8e7d6c"}})
+        unscoped = replay.replay("POST", f"{BASE_URL}/User", "/User", {"json": {"username": "user_9f8e7d6c"}})
+        with replay.scoped("test_b"):
+            exact = replay.replay("POST", f"{BASE_URL}/User", "/User", {"json": {"username": "user_9f8e7d6c"}})
+        template = replay.replay("POST", f"{BASE_URL}/User", "/User", {"json": {"username": "other"}})
+        with pytest.raises(CassetteMissError):
+            replay.replay("GET", f"{BASE_URL}/Book/1", "/Book/{id}", {})
+    finally:
+        replay.close()
+    assert scoped.json() == {"scope": "test_a"}, "A request in a recorded scope should replay that scope's response"
+    assert unscoped.json() == {"scope": ""}, "A request outside any scope should replay the unscoped response"
+    assert exact.json() == {"scope": "test_a"}, "A request in an unrecorded scope should match the exact request"
+    assert template.json() == {"scope": "test_a"}, "A different body should fall back to the endpoint template"
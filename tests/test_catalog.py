@@ -0,0 +1,69 @@
+import json
+import time
+from utils.catalog import CatalogCache
+
+BOOKS = [{"bookId": 1, "title": "A", "author": "X", "category": "Fiction", "price": 10.0}]
+CATEGORIES = [{"categoryId": 1, "categoryName": "Fiction"}]
+
+class StubResponse:
+    """Stands in for a requests.Response with a status code, headers and a JSON body."""
+
+    def __init__(self, status_code: int, body=None, headers: dict = None):
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+    def json(self):
+        return self.body
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise AssertionError(f"HTTP {self.status_code}")
+
+class StubBooksAPI:
+    """Stands in for BooksAPI, answering 304 once the ETag it handed out is sent back."""
+    base_url = "http://books.test/api"
+
+    def __init__(self):
+        self.statuses = []
+
+    def get_all_books(self, headers: dict = None):
+        if (headers or {}).get("If-None-Match") == '"v1"':
+            response = StubResponse(304)
+        else:
+            response = StubResponse(200, BOOKS, {"ETag": '"v1"'})
+        self.statuses.append(response.status_code)
+        return response
+
+    def get_categories(self):
+        return StubResponse(200, CATEGORIES)
+
+def test_catalog_cache_revalidates_after_ttl():
+    """Unit test: A stale catalog is revalidated with its ETag and kept on a 304."""
+    books_api = StubBooksAPI()
+    cache = CatalogCache(ttl=60.0)
+    catalog = cache.get(books_api)
+    assert cache.get(books_api) is catalog, "A fresh catalog should be served from the cache"
+    cache.state["fetched_at"] -= 120.0
+    assert cache.get(books_api) is catalog, "A 304 should keep the cached catalog"
+    assert books_api.statuses == [200, 304], f"Unexpected requests: {books_api.statuses}"
+    assert catalog.get(1)["title"] == "A", "Catalog should index books by ID"
+
+def test_catalog_cache_saves_revalidated_snapshot(tmp_path):
+    """Unit test: A 304 rewrites the snapshot with the new fetch time, so other workers see it as fresh."""
+    path = str(tmp_path / "catalog.json")
+    books_api = StubBooksAPI()
+    cache = CatalogCache(ttl=60.0, snapshot_path=path)
+    cache.get(books_api)
+    cache.state["fetched_at"] -= 120.0
+    cache._save_snapshot()
+    stale = cache.state["fetched_at"]
+    before = time.time()
+    cache.get(books_api)
+    with open(path) as file:
+        fetched_at = json.load(file)["fetched_at"]
+    assert books_api.statuses == [200, 304], f"Unexpected requests: {books_api.statuses}"
+    assert fetched_at >= before > stale, "Snapshot should carry the fetch time of the 304"
+    other = StubBooksAPI()
+    assert len(CatalogCache(ttl=60.0, snapshot_path=path).get(other)) == 1, "Snapshot should hold the catalog"
+    assert other.statuses == [], "A worker loading the refreshed snapshot should not revalidate"
@@ -0,0 +1,30 @@
+import pytest
+from utils.checkout_stress import CheckoutStress, provision_users
+
+@pytest.fixture(scope="module")
+def stress(request, api_client):
+    """Two freshly registered users, so concurrent checkouts never touch the leased test user."""
+    if request.config.getoption("--replay"):
+        pytest.skip("Concurrent checkouts pick their books in thread order, which a cassette cannot replay")
+    return CheckoutStress(api_client, provision_users(api_client, 2))
+
+@pytest.mark.functional
+@pytest.mark.parametrize("cart_size, users", [(1, 1), (5, 2)])
+def test_checkout_stress_reconciles_orders_functional(stress, cart_size, users, logger):
+    """Functional test: Concurrent checkouts of multi-book carts each create exactly one order."""
+    logger.info(f"Starting checkout stress cell: {cart_size} books x {users} users")
+
+    result = stress.run_cell(cart_size, users, rounds=2)
+    logger.info(f"Checkout p95: {result.checkout_ms['p95']:.1f} ms, statuses: {result.statuses}")
+
+    assert result.setup_errors == 0, f"{result.setup_errors} carts could not be filled"
+    assert result.checkouts == users * 2, f"Expected {users * 2} checkouts, got {result.checkouts}"
+    assert result.checkout_errors == 0, f"Checkouts failed: {result.statuses}"
+
+    # Every submitted checkout shows up exactly once in its user's order history
+    assert result.consistent, \
+        f"Order history does not match the checkouts: lost {result.lost}, duplicate {result.duplicate}, " \
+        f"unexpected {result.unexpected}"
+    assert result.unverified == 0, f"Order history of {result.unverified} checkouts could not be read"
+
+    logger.info("Checkout stress cell completed successfully!")
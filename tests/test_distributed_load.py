@@ -0,0 +1,40 @@
+import pytest
+import threading
+from utils.distributed import Coordinator, run_agent
+from utils.load import LoadConfig
+
+@pytest.mark.functional
+def test_distributed_load_merges_agents_functional(request, base_url, logger):
+    """Functional test: Two local agents run the browse journey in sync and their deltas are merged."""
+    if request.config.getoption("--replay"):
+        pytest.skip("Agents use their own transport, which does not go through the cassette")
+    logger.info("Starting Distributed Load Functional Test")
+
+    # Coordinator on a free localhost port, two agents sharing 2 users at 10 requests/sec
+    config = LoadConfig(base_url=base_url, users=2, rps=10, duration=2, weights={"browse": 1})
+    coordinator = Coordinator(config, agents=2, bind=("127.0.0.1", 0), connect_timeout=10, start_lead=0.5)
+    agents = [
+        threading.Thread(target=run_agent, args=(coordinator.address, f"agent-{index}"), daemon=True)
+        for index in range(2)
+    ]
+    for agent in agents:
+        agent.start()
+    result = coordinator.run()
+    for agent in agents:
+        agent.join(timeout=10)
+
+    summary = result.to_dict()
+    logger.info(f"Timeline: {summary['timeline']}")
+    assert summary["agents"] == 2, f"Expected 2 agents, got {summary['agents']}"
+    assert not summary["lost_agents"], f"Agents disconnected early: {summary['lost_agents']}"
+
+    # Every agent reported every second, and the timeline adds up to the per-endpoint totals
+    seconds = [point["second"] for point in summary["timeline"]]
+    assert seconds[:2] == [0, 1], f"Expected per-second deltas for seconds 0 and 1, got {seconds}"
+    total_requests = sum(endpoint["requests"] for endpoint in summary["endpoints"].values())
+    assert total_requests > 0, "No requests were recorded"
+    assert total_requests == sum(point["requests"] for point in summary["timeline"]), \
+        "Timeline and endpoint totals disagree"
+    assert "GET /Book" in summary["endpoints"], f"Browse journey missing: {list(summary['endpoints'])}"
+
+    logger.info("Distributed Load Functional Test completed successfully!")
@@ -2,6 +2,7 @@ import pytest
 from utils.data_factory import get_valid_user_credentials, get_invalid_user_credentials
 
 @pytest.mark.smoke
+@pytest.mark.perf_budget(p95_ms=2000, max_ms=5000, stateful=True)
 def test_login_smoke(api_client, logger):
     """Smoke test: Login with valid user and verify all response fields."""
     user_credentials = get_valid_user_credentials()
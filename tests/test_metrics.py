@@ -0,0 +1,52 @@
+import random
+import pytest
+from utils.metrics import LatencyHistogram
+
+def exact_percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile, what the histogram approximates."""
+    ordered = sorted(values)
+    return ordered[max(int(-(-pct * len(ordered) // 100)), 1) - 1]
+
+def histogram_of(values: list) -> LatencyHistogram:
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    return histogram
+
+def test_latency_histogram_percentiles_within_one_percent():
+    """Unit test: Percentiles over 5 decades of latencies stay within 1% of the exact nearest-rank values."""
+    rng = random.Random(42)
+    values = [10 ** rng.uniform(-4, 1) for _ in range(5000)]
+    histogram = histogram_of(values)
+    for pct in (1, 50, 90, 95, 99, 99.9):
+        expected = exact_percentile(values, pct)
+        assert histogram.percentile(pct) == pytest.approx(expected, rel=0.01, abs=1e-6), f"p{pct} is off"
+    assert histogram.percentile(100) == pytest.approx(max(values), abs=1e-6), "p100 should be the exact max"
+    assert histogram.mean() == pytest.approx(sum(values) / len(values), rel=1e-4)
+    assert histogram.min == int(min(values) * 1_000_000)
+
+def test_latency_histogram_small_and_empty():
+    """Unit test: Small values are exact, and an empty histogram reports zeros."""
+    empty = LatencyHistogram()
+    assert (empty.percentile(50), empty.percentile(100), empty.mean()) == (0.0, 0.0, 0.0)
+    histogram = histogram_of([0.000050, 0.000100, -1.0])
+    assert histogram.percentile(0) == 0.0, "Negative durations should be clamped to 0"
+    assert histogram.percentile(50) == pytest.approx(0.000050)
+    assert histogram.percentile(99) == pytest.approx(0.000100)
+
+def test_latency_histogram_merge_equals_combined_recording():
+    """Unit test: Merging histograms, also across a to_dict/from_dict round trip, equals recording everything in one."""
+    rng = random.Random(7)
+    first = [rng.expovariate(20) for _ in range(1000)]
+    second = [rng.expovariate(2) for _ in range(300)]
+    merged = histogram_of(first)
+    merged.merge(LatencyHistogram.from_dict(histogram_of(second).to_dict()))
+    combined = histogram_of(first + second)
+    assert merged.to_dict() == combined.to_dict(), "Merged histogram should equal one recording every value"
+    for pct in (50, 95, 99, 100):
+        assert merged.percentile(pct) == combined.percentile(pct)
+    into_empty = LatencyHistogram()
+    into_empty.merge(combined)
+    assert (into_empty.count, into_empty.min, into_empty.max) == (combined.count, combined.min, combined.max)
+    combined.merge(LatencyHistogram())
+    assert combined.count == len(first) + len(second), "Merging an empty histogram should change nothing"
@@ -1,6 +1,11 @@
 import pytest
+from utils.contracts import ContractReport, check_cart, check_order
+from utils.models import Cart
+from utils.polling import wait_until
 
 @pytest.mark.smoke
+@pytest.mark.perf_budget(p95_ms=2000, max_ms=5000, stateful=True,
+                         endpoints={"POST /CheckOut/{user}": {"p95_ms": 1500}})
 def test_order_checkout_smoke(api_client, user_id, auth_token, book_id, logger, cleanup_cart):
     """Smoke test: Complete order checkout flow."""
     logger.info(f"Starting order checkout test with book ID: {book_id}")
@@ -9,28 +14,30 @@ def test_order_checkout_smoke(api_client, user_id, auth_token, book_id, logger,
     response = api_client.cart.add_to_cart(user_id, book_id)
     assert response.status_code == 200, f"Failed to add book to cart! Expected 200, got {response.status_code}"
     
-    # Verify book was added to cart
-    response = api_client.cart.get_cart_items(user_id)
+    # Verify book was added to cart, polling until the write is visible
+    response = wait_until(
+        lambda: api_client.cart.get_cart_items(user_id),
+        lambda response: response.status_code == 200 and Cart(response.json()).contains(book_id),
+        name="GET /ShoppingCart/{user} after add"
+    )
     assert response.status_code == 200, f"Failed to get cart items! Expected 200, got {response.status_code}"
-    
-    cart_items = response.json()
-    assert len(cart_items) > 0, "Cart is empty after adding book"
-    logger.info(f"Cart contains {len(cart_items)} items")
+    cart = Cart(response.json())
+    assert len(cart) > 0, "Cart is empty after adding book"
+    logger.info(f"Cart contains {len(cart)} items")
+
+    # Verify every cart item satisfies the CartItem contract
+    report = ContractReport()
+    check_cart(report, cart.raw)
+    assert report.ok, report.summary()
     
     # Verify our book is in the cart
-    book_found = False
-    for item in cart_items:
-        if item.get('book', {}).get('bookId') == book_id:
-            book_found = True
-            logger.info(f"Found our book {book_id} in cart")
-            break
-    
-    assert book_found, f"Book {book_id} not found in cart after adding"
+    assert cart.contains(book_id), f"Book {book_id} not found in cart after adding"
+    logger.info(f"Found our book {book_id} in cart")
     
     # Prepare order data
     order_data = {
-        "orderDetails": cart_items,
-        "cartTotal": len(cart_items)
+        "orderDetails": cart.raw,
+        "cartTotal": len(cart)
     }
     
     # Complete checkout
@@ -38,30 +45,21 @@ def test_order_checkout_smoke(api_client, user_id, auth_token, book_id, logger,
     assert response.status_code == 200, f"Failed to checkout! Expected 200, got {response.status_code}"
     logger.info("Checkout completed successfully")
     
-    # Verify order appears in history
-    response = api_client.cart.get_order_history(user_id, auth_token)
-    assert response.status_code == 200, f"Failed to get order history! Expected 200, got {response.status_code}"
-    
-    order_history = response.json()
-    logger.info(f"Found {len(order_history)} orders in history")
-    
-    # Find our order in history
-    our_order = None
-    for order in order_history:
-        for item in order.get('orderDetails', []):
-            if item.get('book', {}).get('bookId') == book_id:
-                our_order = order
-                logger.info(f"Found our order in history with order ID: {order.get('orderId', 'N/A')}")
-                break
-        if our_order:
-            break
+    # Verify order appears in history, streaming orders until the first one with our book
+    our_order = wait_until(
+        lambda: api_client.cart.find_order_with_book(user_id, book_id, auth_token),
+        lambda order: order is not None,
+        name="GET /Order/{user} after checkout"
+    )
+    if our_order:
+        logger.info(f"Found our order in history with order ID: {our_order.get('orderId', 'N/A')}")
     
     assert our_order is not None, f"Order with book {book_id} not found in order history"
     
-    # Verify order has required fields
-    assert 'orderId' in our_order, "Order missing orderId field"
-    assert 'orderDetails' in our_order, "Order missing orderDetails field"
-    assert len(our_order['orderDetails']) > 0, "Order has no items"
+    # Verify the order satisfies the Order contract and contains our book
+    check_order(report, our_order, book_id)
+    assert report.ok, report.summary()
+    logger.info(report.summary())
     
     logger.info("Order checkout test completed successfully!")
 
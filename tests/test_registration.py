@@ -1,6 +1,6 @@
 import pytest
 from utils.data_factory import generate_valid_registration_data, generate_invalid_registration_data
-import time
+from utils.polling import wait_until
 
 @pytest.mark.smoke
 def test_registration_smoke(api_client, logger):
@@ -23,12 +23,20 @@ def test_registration_functional(api_client, logger):
     response = api_client.users.register_user(user_data)
     assert response.status_code == 200, f"Registration failed! Expected 200, got {response.status_code}"
 
-    # Try to login
-    login_response = api_client.users.login_user(user_data.username, user_data.password)
+    # Try to login, the new user can take a moment to become visible to login (see BUGS.md)
+    login_response = wait_until(
+        lambda: api_client.users.login_user(user_data.username, user_data.password),
+        lambda response: response.status_code != 401,
+        name="POST /login after registration"
+    )
     assert login_response.status_code == 200, f"Login failed! Expected 200, got {login_response.status_code}"
 
     # Username should be taken after registration
-    username_available_after = api_client.users.validate_username(user_data.username)
+    username_available_after = wait_until(
+        lambda: api_client.users.validate_username(user_data.username),
+        lambda available: available is False,
+        name="GET /User/validateUserName after registration"
+    )
     logger.info(f"Username '{user_data.username}' available after registration: {username_available_after}")
     assert username_available_after == False, f"Username should be taken after registration, but validateUserName returned {username_available_after}"
 
@@ -0,0 +1,50 @@
+import pytest
+from utils.sharding import default_duration, partition
+
+class FakeItem:
+    """Stands in for a collected pytest item with a nodeid and markers."""
+
+    def __init__(self, nodeid: str, *markers: str):
+        self.nodeid = nodeid
+        self.markers = markers
+
+    def get_closest_marker(self, name: str):
+        return name if name in self.markers else None
+
+    def __repr__(self) -> str:
+        return self.nodeid
+
+def loads(shards: list, durations: dict) -> list:
+    return [sum(durations.get(item.nodeid, default_duration(durations)) for item in shard) for shard in shards]
+
+def test_partition_longest_first_to_least_loaded():
+    """Unit test: Tests go longest first to the least loaded shard, which balances the estimated durations."""
+    durations = {"t8": 8.0, "t7": 7.0, "t6": 6.0, "t5": 5.0, "t4": 4.0}
+    items = [FakeItem(nodeid) for nodeid in sorted(durations)]
+    shards = partition(items, durations, 2)
+    assert [[item.nodeid for item in shard] for shard in shards] == [["t8", "t5", "t4"], ["t7", "t6"]]
+    assert loads(shards, durations) == [17.0, 13.0]
+    assert sorted(item.nodeid for shard in shards for item in shard) == sorted(durations), \
+        "Every test should land in exactly one shard"
+
+def test_partition_spreads_each_category():
+    """Unit test: Each marker category is spread over the shards on its own, before the next one."""
+    durations = {"smoke_a": 1.0, "smoke_b": 1.0, "func_a": 5.0, "func_b": 4.0}
+    items = [FakeItem("func_a", "functional"), FakeItem("func_b", "functional"),
+             FakeItem("smoke_a", "smoke"), FakeItem("smoke_b", "smoke")]
+    shards = partition(items, durations, 2)
+    for shard in shards:
+        assert [item.nodeid.split("_")[0] for item in shard] == ["smoke", "func"], \
+            f"Every shard should get one smoke and one functional test, got {shard}"
+
+def test_partition_estimates_unknown_tests_and_is_deterministic():
+    """Unit test: Tests without a stored duration count as the mean, and the partition ignores collection order."""
+    durations = {"known_a": 2.0, "known_b": 4.0}
+    assert default_duration(durations) == pytest.approx(3.0)
+    assert default_duration({}) == 1.0, "An empty database should fall back to the default duration"
+    items = [FakeItem(nodeid) for nodeid in ("known_a", "known_b", "new_a", "new_b", "new_c")]
+    shards = partition(items, durations, 3)
+    reversed_shards = partition(list(reversed(items)), durations, 3)
+    assert [[item.nodeid for item in shard] for shard in shards] == \
+        [[item.nodeid for item in shard] for shard in reversed_shards], "Partition should not depend on item order"
+    assert [len(shard) for shard in partition(items, durations, 8)].count(0) == 3, "Extra shards should stay empty"
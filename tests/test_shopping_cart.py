@@ -1,6 +1,10 @@
 import pytest
+from utils.contracts import ContractReport, check_cart
+from utils.models import Cart
+from utils.polling import wait_until
 
 @pytest.mark.smoke
+@pytest.mark.perf_budget(p95_ms=2000, max_ms=5000, stateful=True)
 def test_shopping_cart_smoke(api_client, user_id, book_id, logger):
     """Smoke test: Add a book to the cart and verify it's there."""
     logger.info("Starting Shopping Cart Smoke Test")
@@ -10,22 +14,24 @@ def test_shopping_cart_smoke(api_client, user_id, book_id, logger):
     response = api_client.cart.add_to_cart(user_id, book_id) 
     assert response.status_code == 200, f"Failed to add book to cart! Expected 200, got {response.status_code}"
     
-    # Verify book was added to cart
-    response = api_client.cart.get_cart_items(user_id)
+    # Verify book was added to cart, polling until the write is visible
+    response = wait_until(
+        lambda: api_client.cart.get_cart_items(user_id),
+        lambda response: response.status_code == 200 and Cart(response.json()).contains(book_id),
+        name="GET /ShoppingCart/{user} after add"
+    )
     assert response.status_code == 200, f"Failed to get cart items! Expected 200, got {response.status_code}"
-    
-    cart_items = response.json()
-    logger.info(f"Cart contains {len(cart_items)} items")
+    cart = Cart(response.json())
+    logger.info(f"Cart contains {len(cart)} items")
+
+    # Verify every cart item satisfies the CartItem contract
+    report = ContractReport()
+    check_cart(report, cart.raw)
+    assert report.ok, report.summary()
     
     # Verify our book is in the cart
-    book_found = False
-    for item in cart_items:
-        if item.get('book', {}).get('bookId') == book_id:
-            book_found = True
-            logger.info(f"Found our book {book_id} in cart!")
-            break
-    
-    assert book_found, f"Book {book_id} not found in cart after adding"
+    assert cart.contains(book_id), f"Book {book_id} not found in cart after adding"
+    logger.info(f"Found our book {book_id} in cart!")
     
     logger.info("Shopping Cart Smoke Test completed successfully!")
 
@@ -39,40 +45,39 @@ def test_shopping_cart_functional(api_client, user_id, book_id, logger):
     response = api_client.cart.add_to_cart(user_id, book_id) 
     assert response.status_code == 200, f"Failed to add book to cart! Expected 200, got {response.status_code}"
     
-    # Verify book was added to cart
-    response = api_client.cart.get_cart_items(user_id)
+    # Verify book was added to cart, polling until the write is visible
+    response = wait_until(
+        lambda: api_client.cart.get_cart_items(user_id),
+        lambda response: response.status_code == 200 and Cart(response.json()).contains(book_id),
+        name="GET /ShoppingCart/{user} after add"
+    )
     assert response.status_code == 200, f"Failed to get cart items! Expected 200, got {response.status_code}"
-    
-    cart_items = response.json()
-    logger.info(f"Cart contains {len(cart_items)} items")
+    cart = Cart(response.json())
+    logger.info(f"Cart contains {len(cart)} items")
+
+    # Verify every cart item satisfies the CartItem contract
+    report = ContractReport()
+    check_cart(report, cart.raw)
+    assert report.ok, report.summary()
     
     # Verify our book is in the cart
-    book_found = False
-    for item in cart_items:
-        if item.get('book', {}).get('bookId') == book_id:
-            book_found = True
-            logger.info(f"Found our book {book_id} in cart!")
-            break
-    
-    assert book_found, f"Book {book_id} not found in cart after adding"
+    assert cart.contains(book_id), f"Book {book_id} not found in cart after adding"
+    logger.info(f"Found our book {book_id} in cart!")
 
     # Remove book from cart
     logger.info(f"Removing book {book_id} from cart")
     response = api_client.cart.remove_from_cart(user_id, book_id)
     assert response.status_code == 200, f"Failed to remove book from cart! Expected 200, got {response.status_code}"
     
-    # Verify book was removed from cart
-    response = api_client.cart.get_cart_items(user_id)
-    assert response.status_code == 200, f"Failed to get cart items after removal! Expected 200, got {response.status_code}"
-    
-    cart_items_after_removal = response.json()
-    
-    if len(cart_items_after_removal) == 0:
-        logger.info("Cart is empty after removal")
-    else:
-        # Verify our book is not in the cart anymore
-        for item in cart_items_after_removal:
-            assert item.get('book', {}).get('bookId') != book_id, f"Book {book_id} is still in the cart after removal"
-        logger.info(f"Cart contains {len(cart_items_after_removal)} other items")
+    # Verify book was removed from cart, polling until the write is visible
+    response = wait_until(
+        lambda: api_client.cart.get_cart_items(user_id),
+        lambda response: response.status_code == 200 and not Cart(response.json()).contains(book_id),
+        name="GET /ShoppingCart/{user} after remove"
+    )
+    assert response.status_code == 200, f"Failed to get cart items! Expected 200, got {response.status_code}"
+    cart = Cart(response.json())
+    assert not cart.contains(book_id), f"Book {book_id} is still in the cart after removal"
+    logger.info(f"Cart contains {len(cart)} other items")
 
     logger.info("Shopping Cart Complete Flow Test completed successfully!")
\ No newline at end of file
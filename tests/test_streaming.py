@@ -0,0 +1,51 @@
+import json
+import pytest
+from utils.streaming import iter_json_array
+
+class ChunkedResponse:
+    """Stands in for a streamed requests.Response, serving the body in fixed-size chunks."""
+
+    def __init__(self, body: str):
+        self.body = body.encode("utf-8")
+
+    def iter_content(self, chunk_size: int):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+BODIES = [
+    "[]",
+    "[1.5]",
+    "[1.5, 2]",
+    "[1e5]",
+    "[-12.25E-3 , 7 ,0]",
+    r'["a \"quoted\" ] , [bracket", "\\", "café ☕", "snow ☃ inline ☃"]',
+    '[[1, [2, [3]]], {"orderDetails": [{"book": {"bookId": 4}, "quantity": 2}]}, [], {}]',
+    '[true, false, null, "x"]',
+    ' \n[ {"bookId": 1, "price": 10.5} ,\n {"bookId": 2, "price": 1e2} ]\n',
+]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16384])
+@pytest.mark.parametrize("body", BODIES)
+def test_iter_json_array_matches_json_loads(body, chunk_size):
+    """Unit test: Streaming a body in chunks of any size yields exactly what json.loads parses."""
+    items = list(iter_json_array(ChunkedResponse(body), chunk_size=chunk_size))
+    assert items == json.loads(body), f"Streamed items differ from json.loads with chunk_size={chunk_size}"
+
+@pytest.mark.parametrize("chunk_size", [1, 16384])
+@pytest.mark.parametrize("body", ["[1, 2", "[1 2]", '{"a": 1}', '["unterminated', "[,1]", "[1,,2]", "[1,]", "[,]", ""])
+def test_iter_json_array_rejects_malformed_bodies(body, chunk_size):
+    """Unit test: Truncated or malformed arrays raise instead of yielding partial data silently."""
+    with pytest.raises(ValueError):
+        list(iter_json_array(ChunkedResponse(body), chunk_size=chunk_size))
+
+def test_iter_json_array_decodes_large_item_once_per_delimiter(monkeypatch):
+    """Unit test: An item spanning many chunks is only re-decoded when a chunk may have ended it."""
+    body = json.dumps([{"title": "x" * 10000}, 2])
+    expected = json.loads(body)
+    calls = []
+    raw_decode = json.JSONDecoder.raw_decode
+    monkeypatch.setattr(json.JSONDecoder, "raw_decode",
+                        lambda self, *args, **kwargs: calls.append(1) or raw_decode(self, *args, **kwargs))
+    items = list(iter_json_array(ChunkedResponse(body), chunk_size=1))
+    assert items == expected, "Large item streamed incorrectly"
+    assert len(calls) < 20, f"Large item was decoded {len(calls)} times"
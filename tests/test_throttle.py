@@ -0,0 +1,106 @@
+import pytest
+from utils import throttle
+from utils.throttle import PROBE_RETRY_IN, AdaptiveRateLimiter, CircuitBreaker, CircuitOpenError
+
+class FakeClock:
+    """Stands in for time.monotonic and time.sleep, so sleeping only advances the clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(throttle.time, "monotonic", clock)
+    monkeypatch.setattr(throttle.time, "sleep", clock.sleep)
+    return clock
+
+def test_circuit_breaker_opens_after_consecutive_failures(clock):
+    """Unit test: Only consecutive failures open the circuit, then requests fail fast until the reset timeout."""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10.0)
+    for status in (500, 0, 200, 503, 503):
+        assert breaker.before("/Book") is False, "A closed circuit should let requests through"
+        breaker.record("/Book", status)
+    breaker.record("/Book", 504, "gateway timeout")
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before("/Book")
+    assert error.value.retry_in == pytest.approx(10.0), "Retry hint should be the reset timeout"
+    assert "gateway timeout" in str(error.value), "Error should name the last failure"
+    assert breaker.before("/Cart") is False, "Other endpoints should not be affected"
+    assert breaker.stats() == {"opened": 1, "rejected": 1}
+
+def test_circuit_breaker_lets_one_probe_through(clock):
+    """Unit test: After the reset timeout a single trial request decides whether the circuit closes."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    breaker.record("/Book", 500)
+    clock.now += 10.0
+    assert breaker.before("/Book") is True, "First request after the reset timeout should be the probe"
+    with pytest.raises(CircuitOpenError) as error:
+        breaker.before("/Book")
+    assert 0 < error.value.retry_in <= PROBE_RETRY_IN, "Callers waiting on a probe should not be told to retry at once"
+    breaker.record("/Book", 500)
+    with pytest.raises(CircuitOpenError):
+        breaker.before("/Book")
+    clock.now += 10.0
+    assert breaker.before("/Book") is True, "Circuit should probe again after another reset timeout"
+    breaker.record("/Book", 200)
+    assert breaker.before("/Book") is False, "A successful probe should close the circuit"
+    assert breaker.stats()["opened"] == 1, "A failed probe re-opens an open circuit, it does not count again"
+
+def test_circuit_breaker_release_frees_the_probe(clock):
+    """Unit test: A probe released without an outcome lets the next request probe instead of blocking forever."""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10.0)
+    breaker.record("/Book", 0, "timeout")
+    clock.now += 10.0
+    assert breaker.before("/Book") is True
+    breaker.release("/Book")
+    assert breaker.before("/Book") is True, "Next request should become the probe after a release"
+
+def test_rate_limiter_slow_start_then_additive_increase(clock):
+    """Unit test: The rate grows by 1 per response until the first overload, by increase / rate afterwards."""
+    limiter = AdaptiveRateLimiter(rate=10.0, increase=5.0, decrease_factor=0.5, cooldown=1.0)
+    for _ in range(10):
+        limiter.on_response(200, 0.01)
+    assert limiter.rate == pytest.approx(20.0), "Slow start should add 1 per successful response"
+    limiter.on_response(503, 0.01)
+    assert limiter.rate == pytest.approx(10.0), "Overload should multiply the rate by decrease_factor"
+    limiter.on_response(200, 0.01)
+    assert limiter.rate == pytest.approx(10.5), "After an overload the increase should be increase / rate"
+
+def test_rate_limiter_decreases_once_per_cooldown(clock):
+    """Unit test: A burst of overload responses decreases the rate once per cooldown, never below min_rate."""
+    limiter = AdaptiveRateLimiter(rate=10.0, min_rate=4.0, decrease_factor=0.5, cooldown=1.0)
+    for status in (429, 503, 0):
+        limiter.on_response(status, 0.01)
+    assert limiter.rate == pytest.approx(5.0), "Responses within the cooldown should decrease only once"
+    clock.now += 1.0
+    limiter.on_response(502, 0.01)
+    assert limiter.rate == pytest.approx(4.0), "Rate should not drop below min_rate"
+    limiter.on_response(500, 0.01)
+    assert limiter.stats() == {"throttled": 1, "decreases": 2}, "Plain 5xx responses should not adapt the rate"
+
+def test_rate_limiter_decreases_on_latency_growth(clock):
+    """Unit test: Latency growing past latency_factor times the baseline decreases the rate like an overload."""
+    limiter = AdaptiveRateLimiter(rate=10.0, decrease_factor=0.5, latency_factor=2.0, latency_floor=0.05)
+    limiter.on_response(200, 0.1)
+    for _ in range(20):
+        limiter.on_response(200, 1.0)
+    assert limiter.decreases == 1, "Sustained latency growth should decrease the rate"
+    assert limiter.baseline_latency < 0.2, "Congested responses should not move the baseline"
+
+def test_rate_limiter_retry_after_pauses_callers(clock):
+    """Unit test: A Retry-After holds back the next acquire for that long."""
+    limiter = AdaptiveRateLimiter(rate=10.0)
+    limiter.acquire()
+    assert clock.sleeps == [], "The first request should use the burst token"
+    limiter.on_response(429, 0.01, retry_after=3.0)
+    limiter.acquire()
+    assert sum(clock.sleeps) >= 3.0, f"Acquire should wait out the Retry-After, slept {clock.sleeps}"
@@ -1,11 +1,18 @@
 from utils.user_api import UserAPI
 from utils.book_api import BookAPI
 from utils.cart_api import CartAPI
+from utils.catalog import CatalogCache
+from utils.transport import Transport
 
 class BookCartClient:
     """Main client that provides access to all API categories."""
     
-    def __init__(self, base_url: str):
-        self.users = UserAPI(base_url)
-        self.books = BookAPI(base_url)
-        self.cart = CartAPI(base_url)
\ No newline at end of file
+    def __init__(self, base_url: str, transport: Transport = None, catalog_cache: CatalogCache = None):
+        self.transport = transport or Transport()
+        self.users = UserAPI(base_url, self.transport)
+        self.books = BookAPI(base_url, self.transport, catalog_cache)
+        self.cart = CartAPI(base_url, self.transport)
+
+    def close(self):
+        """Close the shared transport and its pooled connections."""
+        self.transport.close()
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import time
+import requests
+from utils.data_factory import UserRegistration
+from utils.metrics import RequestSample
+from utils.transport import DEFAULT_POOL_SIZE, DEFAULT_TIMEOUT
+
+DEFAULT_MAX_CONCURRENCY = 50
+
+
+class AsyncResponse:
+    """Fully read aiohttp response exposing the same surface the tests use on requests.Response."""
+
+    def __init__(self, status_code: int, headers: dict, content: bytes, url: str):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        """Raise requests.HTTPError for 4xx/5xx responses, like the blocking client."""
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+def _timing_trace_config(aiohttp) -> "aiohttp.TraceConfig":
+    """Trace config adding DNS and connection setup time to the dict passed as trace_request_ctx."""
+    trace_config = aiohttp.TraceConfig()
+
+    def started(name: str):
+        async def callback(session, context, params):
+            context.trace_request_ctx[f"{name}_start"] = time.perf_counter()
+        return callback
+
+    def ended(name: str):
+        async def callback(session, context, params):
+            timings = context.trace_request_ctx
+            timings[name] += time.perf_counter() - timings.pop(f"{name}_start")
+        return callback
+
+    trace_config.on_dns_resolvehost_start.append(started("dns"))
+    trace_config.on_dns_resolvehost_end.append(ended("dns"))
+    trace_config.on_connection_create_start.append(started("connect"))
+    trace_config.on_connection_create_end.append(ended("connect"))
+    return trace_config
+
+
+class AsyncBaseAPI:
+    """Base class for all async API clients sharing one aiohttp session, concurrency limit and hooks."""
+
+    def __init__(self, base_url: str, session: "aiohttp.ClientSession", semaphore: asyncio.Semaphore,
+                 hooks: list):
+        self.base_url = base_url.rstrip('/')
+        self.session = session
+        self.semaphore = semaphore
+        self.hooks = hooks
+
+    async def _request(self, method: str, endpoint: str, path_params: dict = None, **kwargs) -> AsyncResponse:
+        """Send a request to an endpoint template (e.g. /Book/{id}) once a concurrency slot is free.
+
+        The whole body is read, and a RequestSample is passed to the hooks like the blocking transport does.
+        """
+        path = endpoint.format(**path_params) if path_params else endpoint
+        async with self.semaphore:
+            timings = {"dns": 0.0, "connect": 0.0}
+            start = time.perf_counter()
+            try:
+                async with self.session.request(method, f"{self.base_url}{path}", trace_request_ctx=timings,
+                                                **kwargs) as response:
+                    ttfb = time.perf_counter() - start
+                    content = await response.read()
+            except Exception:
+                self._notify(method, endpoint, 0, 0, timings, 0.0, time.perf_counter() - start)
+                raise
+            self._notify(method, endpoint, response.status, len(content), timings, ttfb, time.perf_counter() - start)
+            return AsyncResponse(response.status, dict(response.headers), content, str(response.url))
+
+    def _notify(self, method: str, endpoint: str, status: int, size: int, timings: dict, ttfb: float,
+                total: float):
+        if not self.hooks:
+            return
+        # Connection creation includes the DNS lookup, the time until the headers includes both
+        dns = timings["dns"]
+        connect = max(timings["connect"] - dns, 0.0)
+        sample = RequestSample(method, endpoint, status, size, dns, connect, max(ttfb - dns - connect, 0.0), total)
+        for hook in list(self.hooks):
+            hook(sample)
+
+
+class AsyncUserAPI(AsyncBaseAPI):
+    """Async API methods for user management (registration, login)."""
+
+    async def register_user(self, user: UserRegistration) -> AsyncResponse:
+        """Register a new user."""
+        return await self._request("POST", "/User", json=user.to_dict())
+
+    async def validate_username(self, username: str) -> bool:
+        """Validate username."""
+        response = await self._request("GET", "/User/validateUserName/{username}", {"username": username})
+        response.raise_for_status()
+        return response.json() is True
+
+    async def login_user(self, username: str, password: str) -> AsyncResponse:
+        """Login and return response"""
+        payload = {
+            "username": username,
+            "password": password
+        }
+        return await self._request("POST", "/login", json=payload)
+
+
+class AsyncBookAPI(AsyncBaseAPI):
+    """Async API methods for book browsing and search."""
+
+    async def get_all_books(self) -> AsyncResponse:
+        """Get all books from the API."""
+        return await self._request("GET", "/Book")
+
+    async def get_book_by_id(self, book_id: int) -> AsyncResponse:
+        """Get a book by ID."""
+        return await self._request("GET", "/Book/{id}", {"id": book_id})
+
+    async def get_books_by_ids(self, book_ids) -> list:
+        """Get many books concurrently, responses are returned in the order of book_ids."""
+        return await asyncio.gather(*(self.get_book_by_id(book_id) for book_id in book_ids))
+
+    async def get_similar_books(self, book_id: int) -> AsyncResponse:
+        """Get similar books for a specific book."""
+        return await self._request("GET", "/Book/GetSimilarBooks/{id}", {"id": book_id})
+
+    async def get_categories(self) -> AsyncResponse:
+        """Get all book categories."""
+        return await self._request("GET", "/Book/GetCategoriesList")
+
+
+class AsyncCartAPI(AsyncBaseAPI):
+    """Async API methods for shopping cart operations."""
+
+    async def add_to_cart(self, user_id: int, book_id: int) -> AsyncResponse:
+        """Add a book to the shopping cart."""
+        return await self._request("POST", "/ShoppingCart/AddToCart/{user}/{book}", {"user": user_id, "book": book_id})
+
+    async def get_cart_items(self, user_id: int) -> AsyncResponse:
+        """Get all items in the shopping cart."""
+        return await self._request("GET", "/ShoppingCart/{user}", {"user": user_id})
+
+    async def remove_from_cart(self, user_id: int, book_id: int) -> AsyncResponse:
+        """Remove a book from the shopping cart."""
+        return await self._request("DELETE", "/ShoppingCart/{user}/{book}", {"user": user_id, "book": book_id})
+
+    async def checkout(self, user_id: int, order_data: dict, token: str = None) -> AsyncResponse:
+        """Checkout cart and create order."""
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        return await self._request("POST", "/CheckOut/{user}", {"user": user_id}, json=order_data, headers=headers)
+
+    async def get_order_history(self, user_id: int, token: str = None) -> AsyncResponse:
+        """Get order history for a user."""
+        headers = {}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        return await self._request("GET", "/Order/{user}", {"user": user_id}, headers=headers)
+
+
+class AsyncBookCartClient:
+    """Asyncio variant of BookCartClient with pooled connections and bounded concurrency.
+
+    max_concurrency bounds the requests in flight; the connector keeps at least that many connections,
+    so pool_size only matters when it is larger.
+    """
+
+    def __init__(self, base_url: str, max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT):
+        # Imported here, so loading this module (e.g. from the conftest) does not import aiohttp
+        import aiohttp
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.hooks = []
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=max(pool_size, max_concurrency)),
+            timeout=aiohttp.ClientTimeout(total=timeout),
+            trace_configs=[_timing_trace_config(aiohttp)]
+        )
+        self.users = AsyncUserAPI(base_url, self.session, self.semaphore, self.hooks)
+        self.books = AsyncBookAPI(base_url, self.session, self.semaphore, self.hooks)
+        self.cart = AsyncCartAPI(base_url, self.session, self.semaphore, self.hooks)
+
+    def add_hook(self, hook):
+        """Register a callable receiving a RequestSample after every request, like Transport.add_hook()."""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """Unregister a hook added with add_hook()."""
+        self.hooks.remove(hook)
+
+    async def close(self):
+        """Close the aiohttp session and its pooled connections."""
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
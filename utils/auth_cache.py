@@ -0,0 +1,111 @@
+import base64
+import json
+import os
+import threading
+import time
+from filelock import FileLock
+
+DEFAULT_REFRESH_MARGIN = 60.0
+DEFAULT_TOKEN_TTL = 300.0
+
+
+def decode_jwt_expiry(token: str) -> float:
+    """Get the exp claim (Unix time) of a JWT without verifying it, None if it can't be read."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return float(claims["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+class TokenCache:
+    """Login tokens cached per username and refreshed shortly before their JWT expiry.
+
+    With a cache_file the tokens are shared between processes (e.g. xdist workers) under a file lock.
+    """
+
+    def __init__(self, cache_file: str = None, refresh_margin: float = DEFAULT_REFRESH_MARGIN,
+                 default_ttl: float = DEFAULT_TOKEN_TTL):
+        self.cache_file = cache_file
+        self.refresh_margin = refresh_margin
+        self.default_ttl = default_ttl
+        self.file_lock = FileLock(f"{cache_file}.lock") if cache_file else None
+        self.tokens = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._user_locks = {}
+
+    def get(self, username: str, password: str, login) -> dict:
+        """Get a valid token entry for username, calling login(username, password) only when needed.
+
+        Returns a dict with token, user_id and expires_at.
+        """
+        with self._lock:
+            user_lock = self._user_locks.setdefault(username, threading.Lock())
+        with user_lock:
+            entry = self.tokens.get(username)
+            if self._is_fresh(entry):
+                return self._hit(entry)
+            if self.file_lock is None:
+                entry = self._login(username, password, login)
+            else:
+                with self.file_lock:
+                    entry = self._read_file().get(username)
+                    if self._is_fresh(entry):
+                        self.tokens[username] = entry
+                        return self._hit(entry)
+                    entry = self._login(username, password, login)
+                    self._write_file(username, entry)
+            self.tokens[username] = entry
+            with self._lock:
+                self.misses += 1
+            return entry
+
+    def invalidate(self, username: str):
+        """Drop the cached token of username, e.g. after a 401, from memory and the cache file."""
+        with self._lock:
+            self.tokens.pop(username, None)
+        if self.file_lock is None:
+            return
+        with self.file_lock:
+            data = self._read_file()
+            if data.pop(username, None) is not None:
+                with open(self.cache_file, "w") as file:
+                    json.dump(data, file)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _hit(self, entry: dict) -> dict:
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def _is_fresh(self, entry: dict) -> bool:
+        return entry is not None and entry["expires_at"] - self.refresh_margin > time.time()
+
+    def _login(self, username: str, password: str, login) -> dict:
+        response = login(username, password)
+        response.raise_for_status()
+        data = response.json()
+        token = data["token"]
+        return {
+            "token": token,
+            "user_id": data.get("userDetails", {}).get("userId"),
+            "expires_at": decode_jwt_expiry(token) or time.time() + self.default_ttl
+        }
+
+    def _read_file(self) -> dict:
+        if not os.path.exists(self.cache_file):
+            return {}
+        with open(self.cache_file, "r") as file:
+            return json.load(file)
+
+    def _write_file(self, username: str, entry: dict):
+        data = self._read_file()
+        data[username] = entry
+        with open(self.cache_file, "w") as file:
+            json.dump(data, file)
@@ -1,5 +1,24 @@
+import requests
+from utils.streaming import iter_json_array
+from utils.transport import Transport
+
 class BaseAPI:
     """Base class for all API clients with common initialization."""
     
-    def __init__(self, base_url: str):
-        self.base_url = base_url.rstrip('/') 
\ No newline at end of file
+    def __init__(self, base_url: str, transport: Transport = None):
+        self.base_url = base_url.rstrip('/')
+        self.transport = transport or Transport()
+
+    def _request(self, method: str, endpoint: str, path_params: dict = None, **kwargs) -> requests.Response:
+        """Send a request to an endpoint template (e.g. /Book/{id}) through the shared transport."""
+        path = endpoint.format(**path_params) if path_params else endpoint
+        return self.transport.request(method, f"{self.base_url}{path}", endpoint=endpoint, **kwargs)
+
+    def _stream_items(self, method: str, endpoint: str, path_params: dict = None, **kwargs):
+        """Yield the items of a JSON list response one at a time while the body is streamed."""
+        response = self._request(method, endpoint, path_params, stream=True, **kwargs)
+        try:
+            response.raise_for_status()
+            yield from iter_json_array(response)
+        finally:
+            response.close()
@@ -1,21 +1,60 @@
 import requests
 from utils.base_api import BaseAPI
+from utils.catalog import Catalog, CatalogCache
+from utils.models import Book, Category
+from utils.transport import Transport
 
 class BookAPI(BaseAPI):
     """API methods for book browsing and search."""
+
+    def __init__(self, base_url: str, transport: Transport = None, catalog_cache: CatalogCache = None):
+        super().__init__(base_url, transport)
+        self.catalog_cache = catalog_cache or CatalogCache()
     
-    def get_all_books(self) -> requests.Response:
+    def get_all_books(self, headers: dict = None) -> requests.Response:
         """Get all books from the API."""
-        return requests.get(f"{self.base_url}/Book")
+        return self._request("GET", "/Book", headers=headers)
+
+    def iter_all_books(self):
+        """Yield all books one at a time without loading the whole list."""
+        return self._stream_items("GET", "/Book")
+
+    def get_catalog(self) -> Catalog:
+        """Get the cached catalog with id and category indexes, revalidated when its TTL expires."""
+        return self.catalog_cache.get(self)
 
     def get_book_by_id(self, book_id: int) -> requests.Response:
         """Get a book by ID."""
-        return requests.get(f"{self.base_url}/Book/{book_id}")
+        return self._request("GET", "/Book/{id}", {"id": book_id})
 
     def get_similar_books(self, book_id: int) -> requests.Response:
         """Get similar books for a specific book."""
-        return requests.get(f"{self.base_url}/Book/GetSimilarBooks/{book_id}")
+        return self._request("GET", "/Book/GetSimilarBooks/{id}", {"id": book_id})
 
     def get_categories(self) -> requests.Response:
         """Get all book categories."""
-        return requests.get(f"{self.base_url}/Book/GetCategoriesList") 
\ No newline at end of file
+        return self._request("GET", "/Book/GetCategoriesList")
+
+    def list_books(self) -> list:
+        """Get all books as Book models."""
+        response = self.get_all_books()
+        response.raise_for_status()
+        return [Book(book) for book in response.json()]
+
+    def get_book(self, book_id: int) -> Book:
+        """Get a book by ID as a Book model."""
+        response = self.get_book_by_id(book_id)
+        response.raise_for_status()
+        return Book(response.json())
+
+    def list_similar_books(self, book_id: int) -> list:
+        """Get similar books for a specific book as Book models."""
+        response = self.get_similar_books(book_id)
+        response.raise_for_status()
+        return [Book(book) for book in response.json()]
+
+    def list_categories(self) -> list:
+        """Get all book categories as Category models."""
+        response = self.get_categories()
+        response.raise_for_status()
+        return [Category(category) for category in response.json()]
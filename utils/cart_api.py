@@ -1,31 +1,132 @@
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from utils.base_api import BaseAPI
+from utils.models import Cart, OrderHistory
+from utils.streaming import contains_book, find_first
+
+DEFAULT_BULK_WORKERS = 8
+
+@dataclass
+class CartItemResult:
+    """Outcome of one book in a bulk cart operation, status_code is 0 when the request raised."""
+    book_id: int
+    status_code: int
+    error: str = None
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status_code < 300
+
+@dataclass
+class BulkCartResult:
+    """Aggregated per-item outcomes of a bulk cart operation, in the order the books were given."""
+    items: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return all(item.ok for item in self.items)
+
+    @property
+    def succeeded(self) -> list:
+        return [item.book_id for item in self.items if item.ok]
+
+    @property
+    def failed(self) -> list:
+        return [item for item in self.items if not item.ok]
 
 class CartAPI(BaseAPI):
     """API methods for shopping cart operations."""
     
     def add_to_cart(self, user_id: int, book_id: int) -> requests.Response:
         """Add a book to the shopping cart."""
-        return requests.post(f"{self.base_url}/ShoppingCart/AddToCart/{user_id}/{book_id}")
+        return self._request("POST", "/ShoppingCart/AddToCart/{user}/{book}", {"user": user_id, "book": book_id})
         
     def get_cart_items(self, user_id: int) -> requests.Response:
         """Get all items in the shopping cart."""
-        return requests.get(f"{self.base_url}/ShoppingCart/{user_id}")
+        return self._request("GET", "/ShoppingCart/{user}", {"user": user_id})
+
+    def get_cart(self, user_id: int) -> Cart:
+        """Get the shopping cart as a Cart model."""
+        response = self.get_cart_items(user_id)
+        response.raise_for_status()
+        return Cart(response.json())
+
+    def iter_cart_items(self, user_id: int):
+        """Yield cart items one at a time without loading the whole cart."""
+        return self._stream_items("GET", "/ShoppingCart/{user}", {"user": user_id})
 
     def remove_from_cart(self, user_id: int, book_id: int) -> requests.Response:
         """Remove a book from the shopping cart."""
-        return requests.delete(f"{self.base_url}/ShoppingCart/{user_id}/{book_id}")
+        return self._request("DELETE", "/ShoppingCart/{user}/{book}", {"user": user_id, "book": book_id})
+    
+    def add_many(self, user_id: int, book_ids: list, max_workers: int = DEFAULT_BULK_WORKERS) -> BulkCartResult:
+        """Add many books to the cart concurrently, a repeated book ID adds another copy."""
+        return self._dispatch(self.add_to_cart, user_id, book_ids, max_workers)
+
+    def remove_many(self, user_id: int, book_ids: list, max_workers: int = DEFAULT_BULK_WORKERS) -> BulkCartResult:
+        """Remove many books from the cart concurrently."""
+        return self._dispatch(self.remove_from_cart, user_id, book_ids, max_workers)
+
+    def clear_cart(self, user_id: int, max_workers: int = DEFAULT_BULK_WORKERS) -> BulkCartResult:
+        """Remove every item currently in the cart."""
+        return self.remove_many(user_id, list(self.get_cart(user_id).book_ids), max_workers)
+
+    def snapshot_cart(self, user_id: int) -> dict:
+        """Get the cart as book ID -> quantity."""
+        return dict(self.get_cart(user_id).quantities)
+
+    def restore_cart(self, user_id: int, snapshot: dict, max_workers: int = DEFAULT_BULK_WORKERS) -> BulkCartResult:
+        """Bring the cart back to a snapshot, only touching books whose quantity changed."""
+        current = self.snapshot_cart(user_id)
+        changed = [book_id for book_id in current.keys() | snapshot.keys()
+                   if current.get(book_id, 0) != snapshot.get(book_id, 0)]
+        # Removing drops every copy of a book, so changed books are removed first and re-added
+        removed = self.remove_many(user_id, [book_id for book_id in changed if book_id in current], max_workers)
+        added = self.add_many(
+            user_id, [book_id for book_id in changed for _ in range(snapshot.get(book_id, 0))], max_workers
+        )
+        return BulkCartResult(removed.items + added.items)
+
+    def _dispatch(self, method, user_id: int, book_ids: list, max_workers: int) -> BulkCartResult:
+        def call(book_id: int) -> CartItemResult:
+            try:
+                return CartItemResult(book_id, method(user_id, book_id).status_code)
+            except requests.RequestException as error:
+                return CartItemResult(book_id, 0, str(error))
+
+        if not book_ids:
+            return BulkCartResult()
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(book_ids))) as executor:
+            return BulkCartResult(list(executor.map(call, book_ids)))
     
     def checkout(self, user_id: int, order_data: dict, token: str = None) -> requests.Response:
         """Checkout cart and create order."""
         headers = {'Content-Type': 'application/json'}
         if token:
             headers['Authorization'] = f'Bearer {token}'
-        return requests.post(f"{self.base_url}/CheckOut/{user_id}", json=order_data, headers=headers)
+        return self._request("POST", "/CheckOut/{user}", {"user": user_id}, json=order_data, headers=headers)
     
     def get_order_history(self, user_id: int, token: str = None) -> requests.Response:
         """Get order history for a user."""
         headers = {}
         if token:
             headers['Authorization'] = f'Bearer {token}'
-        return requests.get(f"{self.base_url}/Order/{user_id}", headers=headers) 
\ No newline at end of file
+        return self._request("GET", "/Order/{user}", {"user": user_id}, headers=headers)
+
+    def get_orders(self, user_id: int, token: str = None) -> OrderHistory:
+        """Get the order history as an OrderHistory model."""
+        response = self.get_order_history(user_id, token)
+        response.raise_for_status()
+        return OrderHistory(response.json())
+
+    def iter_order_history(self, user_id: int, token: str = None):
+        """Yield orders one at a time without loading the whole order history."""
+        headers = {}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        return self._stream_items("GET", "/Order/{user}", {"user": user_id}, headers=headers)
+
+    def find_order_with_book(self, user_id: int, book_id: int, token: str = None) -> dict:
+        """Get the first order containing a book, None if there is none; stops reading the history on a match."""
+        return find_first(self.iter_order_history(user_id, token), contains_book(book_id))
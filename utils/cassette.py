@@ -0,0 +1,145 @@
+import base64
+import contextlib
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from datetime import timedelta
+from urllib.parse import urlsplit
+import requests
+from requests.structures import CaseInsensitiveDict
+
+RECORD = "record"
+REPLAY = "replay"
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Retry-After")
+# Suffix appended by data_factory.unique_username_suffix(), differs between runs
+_UNIQUE_SUFFIX = re.compile(r"_[0-9a-f]{7,}\b")
+_TOKEN_FIELDS = ("token",)
+_HEADER = struct.Struct(">I")
+
+
+def _replay_token() -> str:
+    """Unsigned JWT with a far-future exp that stands in for recorded tokens."""
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).decode().rstrip("=")
+    return f"{encode({'alg': 'none', 'typ': 'JWT'})}.{encode({'sub': 'replay', 'exp': 4102444800})}.replay"
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode for a request that was never recorded."""
+
+
+class Cassette:
+    """Transport-level store of recorded API responses for zero-network replay.
+
+    Records are appended to a single data file and located through a JSON index. Each record is
+    reachable through three keys, tried in order on replay: the current test scope plus the exact
+    request, the exact request alone, and the method plus endpoint template. Every key keeps a
+    sequence of records so repeated calls (e.g. the cart before and after an add) replay in order.
+    The data file is memory-mapped on replay.
+    """
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self.scope = ""
+        self.index = {}
+        self.cursors = {}
+        self.lock = threading.Lock()
+        self.token = _replay_token()
+        if mode == RECORD:
+            self.data_file = open(path, "wb")
+            self.offset = 0
+        else:
+            with open(f"{path}.idx", "r") as file:
+                self.index = json.load(file)
+            with open(path, "rb") as file:
+                size = os.fstat(file.fileno()).st_size
+                self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    @contextlib.contextmanager
+    def scoped(self, scope: str):
+        """Temporarily key requests under another scope, e.g. for session-wide setup."""
+        previous = self.scope
+        self.scope = scope
+        try:
+            yield self
+        finally:
+            self.scope = previous
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return _UNIQUE_SUFFIX.sub("_*", text)
+
+    def _keys(self, method: str, url: str, endpoint: str, kwargs: dict) -> list:
+        path = self._normalize(urlsplit(url).path)
+        body = kwargs.get("json")
+        if body is not None:
+            body = json.dumps(body, sort_keys=True)
+        elif kwargs.get("data") is not None:
+            body = kwargs["data"] if isinstance(kwargs["data"], str) else repr(kwargs["data"])
+        body_hash = hashlib.sha1(self._normalize(body or "").encode()).hexdigest()[:16]
+        exact = f"{method} {path} {body_hash}"
+        return [f"{self.scope}|{exact}", exact, f"{method} {endpoint or path}"]
+
+    def record(self, method: str, url: str, endpoint: str, kwargs: dict, response: requests.Response):
+        """Append a live response, scrubbing tokens out of its body."""
+        body = response.content
+        if body and "json" in response.headers.get("Content-Type", ""):
+            try:
+                data = response.json()
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and any(field in data for field in _TOKEN_FIELDS):
+                data = {key: (self.token if key in _TOKEN_FIELDS else value) for key, value in data.items()}
+                body = json.dumps(data).encode()
+        meta = json.dumps({
+            "status": response.status_code,
+            "headers": {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        }).encode()
+        record = _HEADER.pack(len(meta)) + meta + body
+        with self.lock:
+            location = [self.offset, len(record)]
+            self.data_file.write(record)
+            self.offset += len(record)
+            for key in self._keys(method, url, endpoint, kwargs):
+                self.index.setdefault(key, []).append(location)
+
+    def replay(self, method: str, url: str, endpoint: str, kwargs: dict) -> requests.Response:
+        """Build the recorded response for a request without touching the network."""
+        with self.lock:
+            for key in self._keys(method, url, endpoint, kwargs):
+                locations = self.index.get(key)
+                if locations:
+                    position = self.cursors.get(key, 0)
+                    self.cursors[key] = position + 1
+                    offset, length = locations[min(position, len(locations) - 1)]
+                    break
+            else:
+                raise CassetteMissError(f"No recorded response for {method} {url}")
+        record = self.data[offset:offset + length]
+        meta_length = _HEADER.unpack_from(record)[0]
+        meta = json.loads(record[_HEADER.size:_HEADER.size + meta_length])
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response._content = bytes(record[_HEADER.size + meta_length:])
+        response._content_consumed = True
+        response.encoding = "utf-8"
+        response.url = url
+        response.reason = "Replayed"
+        response.elapsed = timedelta(0)
+        response.request = requests.Request(method, url).prepare()
+        return response
+
+    def close(self):
+        """Flush the data file and write the index when recording, unmap it when replaying."""
+        if self.mode == RECORD:
+            self.data_file.close()
+            with open(f"{self.path}.idx", "w") as file:
+                json.dump(self.index, file, separators=(",", ":"))
+        elif isinstance(self.data, mmap.mmap):
+            self.data.close()
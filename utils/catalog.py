@@ -0,0 +1,127 @@
+import json
+import os
+import random
+import threading
+import time
+from filelock import FileLock
+
+DEFAULT_CATALOG_TTL = 300.0
+
+
+class Catalog:
+    """Book catalog snapshot with id and category indexes for O(1) lookups."""
+
+    def __init__(self, books: list, categories: list):
+        self.books = books
+        self.categories = categories
+        self.book_ids = [book["bookId"] for book in books]
+        self.by_id = {book["bookId"]: book for book in books}
+        self.by_category = {}
+        for book in books:
+            self.by_category.setdefault(book.get("category"), []).append(book)
+        self._ids_by_category = {
+            category: frozenset(book["bookId"] for book in category_books)
+            for category, category_books in self.by_category.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.books)
+
+    def random_book_id(self) -> int:
+        """Get a random book ID from the catalog."""
+        return random.choice(self.book_ids)
+
+    def get(self, book_id: int) -> dict:
+        """Get a book by ID, None if it is not in the catalog."""
+        return self.by_id.get(book_id)
+
+    def books_in_category(self, category: str) -> list:
+        """Get all books of a category."""
+        return self.by_category.get(category, [])
+
+    def is_in_category(self, book_id: int, category: str) -> bool:
+        """Check that a book is in the catalog under the given category."""
+        return book_id in self._ids_by_category.get(category, ())
+
+
+class CatalogCache:
+    """Keeps a Catalog fresh for a TTL, then revalidates it with ETag / If-Modified-Since.
+
+    Without validators from the server the catalog is refetched after the TTL. With a snapshot_path
+    the catalog is also stored on disk and shared between workers and runs.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_CATALOG_TTL, snapshot_path: str = None):
+        self.ttl = ttl
+        self.snapshot_path = snapshot_path
+        self.file_lock = FileLock(f"{snapshot_path}.lock") if snapshot_path else None
+        self.catalog = None
+        self.state = None
+        self.lock = threading.Lock()
+
+    def get(self, books_api) -> Catalog:
+        """Get the catalog for books_api's base URL, fetching or revalidating only when needed."""
+        with self.lock:
+            if self._is_fresh(books_api.base_url):
+                return self.catalog
+            if self.file_lock is None:
+                self._refresh(books_api)
+            else:
+                with self.file_lock:
+                    self._load_snapshot(books_api.base_url)
+                    if not self._is_fresh(books_api.base_url):
+                        self._refresh(books_api)
+                        # Also after a 304, so the refreshed fetched_at reaches the other workers and
+                        # they do not revalidate a catalog that was just confirmed
+                        self._save_snapshot()
+            return self.catalog
+
+    def invalidate(self):
+        """Force a refetch on the next get()."""
+        with self.lock:
+            self.catalog = None
+            self.state = None
+
+    def _is_fresh(self, base_url: str) -> bool:
+        return (self.state is not None and self.state["base_url"] == base_url
+                and self.state["fetched_at"] + self.ttl > time.time())
+
+    def _refresh(self, books_api):
+        headers = {}
+        if self.state is not None and self.state["base_url"] == books_api.base_url:
+            if self.state.get("etag"):
+                headers["If-None-Match"] = self.state["etag"]
+            if self.state.get("last_modified"):
+                headers["If-Modified-Since"] = self.state["last_modified"]
+        response = books_api.get_all_books(headers=headers)
+        if response.status_code == 304 and self.catalog is not None:
+            self.state["fetched_at"] = time.time()
+            return
+        response.raise_for_status()
+        categories = books_api.get_categories()
+        categories.raise_for_status()
+        self.state = {
+            "base_url": books_api.base_url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": time.time(),
+            "books": response.json(),
+            "categories": categories.json()
+        }
+        self.catalog = Catalog(self.state["books"], self.state["categories"])
+
+    def _load_snapshot(self, base_url: str):
+        if self._is_fresh(base_url) or not os.path.exists(self.snapshot_path):
+            return
+        with open(self.snapshot_path, "r") as file:
+            state = json.load(file)
+        newer = self.state is None or state.get("fetched_at", 0) > self.state["fetched_at"]
+        if state.get("base_url") == base_url and newer:
+            self.state = state
+            self.catalog = Catalog(state["books"], state["categories"])
+
+    def _save_snapshot(self):
+        temp_path = f"{self.snapshot_path}.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(self.state, file)
+        os.replace(temp_path, self.snapshot_path)
@@ -0,0 +1,261 @@
+"""Checkout stress sweep: cart size x concurrent users against /CheckOut and /Order.
+
+Usage:
+    python -m utils.checkout_stress --cart-sizes 1,10,100 --users 1,50,500 --rounds 3 --users-file stress-users.json
+    python -m utils.checkout_stress --base-url http://127.0.0.1:5000/api --cart-sizes 1,20 --users 1,8 --json stress.json
+
+Every cell fills the carts of its users with cart_size books, then all of them check out at
+the same moment. Checkout and order history latency and errors are recorded per cell, and the
+new orders in each user's history are reconciled with what was submitted:
+
+    lost        a checkout answered 200 but no matching order appeared
+    duplicate   more matching orders appeared than checkouts were submitted
+    ghost       a checkout failed or timed out but its order was created anyway
+    unexpected  an order appeared whose items match nothing that was submitted
+
+Orders are matched by their items (book ID -> quantity); the cart total is not compared, as
+the backend may compute it differently from the client. Stress users are registered
+once and can be kept in --users-file for later runs; checking out never touches the suite's users.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from utils.api_client import BookCartClient
+from utils.auth_cache import TokenCache
+from utils.load import DEFAULT_BASE_URL
+from utils.metrics import MetricsRecorder
+from utils.polling import wait_until
+from utils.transport import Transport
+from utils.user_pool import UserPool, provision_users
+
+CHECKOUT_ENDPOINT = "POST /CheckOut/{user}"
+HISTORY_ENDPOINT = "GET /Order/{user}"
+# How long new orders may take to show up in the history before they count as lost
+DEFAULT_SETTLE_TIMEOUT = 10.0
+
+
+@dataclass
+class Submission:
+    """One checkout as submitted, status is 0 when the request raised."""
+    user_id: int
+    signature: tuple
+    status: int
+
+
+@dataclass
+class CellResult:
+    cart_size: int
+    users: int
+    rounds: int
+    checkouts: int = 0
+    checkout_errors: int = 0
+    statuses: dict = field(default_factory=dict)
+    checkout_ms: dict = field(default_factory=dict)
+    history_ms: dict = field(default_factory=dict)
+    burst_seconds: float = 0.0
+    lost: int = 0
+    duplicate: int = 0
+    ghost: int = 0
+    unexpected: int = 0
+    unverified: int = 0
+    setup_errors: int = 0
+
+    @property
+    def consistent(self) -> bool:
+        return not (self.lost or self.duplicate or self.unexpected)
+
+
+def order_signature(quantities: dict) -> tuple:
+    """What a submitted cart and the order created from it have in common: book ID -> quantity."""
+    return tuple(sorted(quantities.items()))
+
+
+def reconcile(submissions: list, new_orders: list) -> dict:
+    """Compare one user's submitted checkouts with the orders that appeared since, as counts per outcome."""
+    expected = Counter(submission.signature for submission in submissions if submission.status == 200)
+    uncertain = Counter(submission.signature for submission in submissions if submission.status != 200)
+    actual = Counter(order_signature(order.details.quantities) for order in new_orders)
+    outcome = {"lost": 0, "duplicate": 0, "ghost": 0, "unexpected": 0}
+    for signature in expected.keys() | uncertain.keys() | actual.keys():
+        extra = actual[signature] - expected[signature]
+        if extra < 0:
+            outcome["lost"] -= extra
+        elif signature not in expected and signature not in uncertain:
+            outcome["unexpected"] += extra
+        else:
+            ghosts = min(extra, uncertain[signature])
+            outcome["ghost"] += ghosts
+            outcome["duplicate"] += extra - ghosts
+    return outcome
+
+
+class CheckoutStress:
+    """Runs the cells of a sweep with one client, its transport hook recording each cell separately."""
+
+    def __init__(self, client: BookCartClient, users: list, tokens: TokenCache = None,
+                 settle_timeout: float = DEFAULT_SETTLE_TIMEOUT):
+        self.client = client
+        self.users = users
+        self.tokens = tokens or TokenCache()
+        self.settle_timeout = settle_timeout
+        self.catalog = client.books.get_catalog()
+
+    def run_cell(self, cart_size: int, user_count: int, rounds: int = 1) -> CellResult:
+        """Check out cart_size-book carts as user_count users at once, rounds times, and reconcile."""
+        if user_count > len(self.users):
+            raise ValueError(f"Cell needs {user_count} users, only {len(self.users)} provisioned")
+        users = self.users[:user_count]
+        recorder = MetricsRecorder()
+        result = CellResult(cart_size, user_count, rounds)
+        with ThreadPoolExecutor(max_workers=user_count) as executor:
+            tokens = list(executor.map(self._token, users))
+            before = list(executor.map(lambda args: self._order_ids(*args), zip(users, tokens)))
+            submissions = {user["userId"]: [] for user in users}
+            self.client.transport.add_hook(recorder)
+            try:
+                for _ in range(rounds):
+                    carts = list(executor.map(lambda user: self._fill_cart(user["userId"], cart_size), users))
+                    result.setup_errors += carts.count(None)
+                    ready = [(user, token, cart) for user, token, cart in zip(users, tokens, carts) if cart]
+                    barrier = threading.Barrier(len(ready)) if ready else None
+                    start = time.perf_counter()
+                    for submission in executor.map(lambda args: self._checkout(barrier, *args), ready):
+                        submissions[submission.user_id].append(submission)
+                    result.burst_seconds += time.perf_counter() - start
+                outcomes = executor.map(
+                    lambda args: self._reconcile(*args, submissions),
+                    zip(users, tokens, before)
+                )
+                for outcome in outcomes:
+                    for name, count in outcome.items():
+                        setattr(result, name, getattr(result, name) + count)
+            finally:
+                self.client.transport.remove_hook(recorder)
+        summary = recorder.to_dict()
+        checkout = summary.get(CHECKOUT_ENDPOINT, {})
+        result.checkouts = checkout.get("requests", 0)
+        result.checkout_errors = checkout.get("errors", 0)
+        result.statuses = checkout.get("statuses", {})
+        result.checkout_ms = {name: checkout.get(f"{name}_ms", 0.0) for name in ("p50", "p95", "p99", "max")}
+        history = summary.get(HISTORY_ENDPOINT, {})
+        result.history_ms = {name: history.get(f"{name}_ms", 0.0) for name in ("p50", "p95", "p99", "max")}
+        return result
+
+    def sweep(self, cart_sizes: list, user_counts: list, rounds: int = 1, on_cell=None) -> list:
+        """Run every cart size x user count cell, smallest first."""
+        results = []
+        for user_count in sorted(user_counts):
+            for cart_size in sorted(cart_sizes):
+                result = self.run_cell(cart_size, user_count, rounds)
+                results.append(result)
+                if on_cell is not None:
+                    on_cell(result)
+        return results
+
+    def _token(self, user: dict) -> str:
+        return self.tokens.get(user["username"], user["password"], self.client.users.login_user)["token"]
+
+    def _order_ids(self, user: dict, token: str) -> set:
+        return {order.order_id for order in self.client.cart.get_orders(user["userId"], token)}
+
+    def _fill_cart(self, user_id: int, cart_size: int):
+        """Empty the cart and add cart_size books (distinct while the catalog has enough), None on failure."""
+        book_ids = self.catalog.book_ids
+        picks = random.sample(book_ids, cart_size) if cart_size <= len(book_ids) else \
+            random.choices(book_ids, k=cart_size)
+        try:
+            UserPool.reset_cart(self.client, user_id)
+            if not self.client.cart.add_many(user_id, picks).ok:
+                return None
+            expected = Counter(picks)
+            return wait_until(
+                lambda: self.client.cart.get_cart(user_id),
+                lambda cart: cart.quantities == expected,
+                name="GET /ShoppingCart/{user} after stress fill"
+            )
+        except Exception:
+            return None
+
+    def _checkout(self, barrier, user: dict, token: str, cart) -> Submission:
+        total = sum((item.book.price or 0) * (item.quantity or 1) for item in cart)
+        order_data = {"orderDetails": cart.raw, "cartTotal": round(total, 2)}
+        signature = order_signature(cart.quantities)
+        barrier.wait()
+        try:
+            status = self.client.cart.checkout(user["userId"], order_data, token).status_code
+        except Exception:
+            status = 0
+        return Submission(user["userId"], signature, status)
+
+    def _reconcile(self, user: dict, token: str, before: set, submissions: dict) -> dict:
+        user_submissions = submissions[user["userId"]]
+        expected = sum(1 for submission in user_submissions if submission.status == 200)
+        try:
+            orders = wait_until(
+                lambda: self.client.cart.get_orders(user["userId"], token),
+                lambda orders: len([order for order in orders if order.order_id not in before]) >= expected,
+                name="GET /Order/{user} after stress checkout",
+                timeout=self.settle_timeout
+            )
+        except Exception:
+            # The history could not be read, so these checkouts are neither confirmed nor lost
+            return {"unverified": expected}
+        return reconcile(user_submissions, [order for order in orders if order.order_id not in before])
+
+
+CELL_HEADER = (f"{'cart':>5} {'users':>6} {'checkouts':>9} {'errs':>5} {'chk/s':>7} {'p50 ms':>8} {'p95 ms':>8}"
+               f" {'p99 ms':>8} {'hist p95':>9} {'lost':>5} {'dup':>4} {'ghost':>5} {'unexp':>5} {'unver':>5}")
+
+
+def format_cell(result: CellResult) -> str:
+    rate = result.checkouts / result.burst_seconds if result.burst_seconds else 0.0
+    return (f"{result.cart_size:>5} {result.users:>6} {result.checkouts:>9} {result.checkout_errors:>5} {rate:>7.1f}"
+            f" {result.checkout_ms['p50']:>8.1f} {result.checkout_ms['p95']:>8.1f} {result.checkout_ms['p99']:>8.1f}"
+            f" {result.history_ms['p95']:>9.1f} {result.lost:>5} {result.duplicate:>4} {result.ghost:>5}"
+            f" {result.unexpected:>5} {result.unverified:>5}")
+
+
+def _parse_sizes(value: str) -> list:
+    try:
+        sizes = [int(size) for size in value.split(",") if size]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected comma-separated integers, got '{value}'") from None
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError(f"Expected positive integers, got '{value}'")
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep checkout load over cart sizes and concurrent users.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Base URL for the Book Cart API")
+    parser.add_argument("--cart-sizes", type=_parse_sizes, default=[1, 10, 100], help="Books per cart, e.g. 1,10,100")
+    parser.add_argument("--users", type=_parse_sizes, default=[1, 10, 50],
+                        help="Concurrent users checking out at once, e.g. 1,50,500")
+    parser.add_argument("--rounds", type=int, default=1, help="Checkouts per user in every cell")
+    parser.add_argument("--users-file", help="Keep the registered stress users in this JSON file for later runs")
+    parser.add_argument("--settle-timeout", type=float, default=DEFAULT_SETTLE_TIMEOUT,
+                        help="Seconds new orders may take to appear before they count as lost")
+    parser.add_argument("--json", dest="json_path", help="Write the per-cell results to this JSON file")
+    args = parser.parse_args(argv)
+
+    client = BookCartClient(args.base_url, Transport(pool_size=max(args.users)))
+    users = provision_users(client, max(args.users), args.users_file)
+    stress = CheckoutStress(client, users, settle_timeout=args.settle_timeout)
+    print(CELL_HEADER)
+    results = stress.sweep(args.cart_sizes, args.users, args.rounds,
+                           on_cell=lambda result: print(format_cell(result), flush=True))
+    client.close()
+    inconsistent = [result for result in results if not result.consistent]
+    print(f"order reconciliation: {len(inconsistent)} of {len(results)} cells inconsistent")
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump([asdict(result) for result in results], file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
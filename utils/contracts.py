@@ -0,0 +1,231 @@
+"""Response contracts for the BookCart API, compiled once into key-set and type-set checks.
+
+    report = sweep_catalog(api_client)
+    assert report.ok, report.summary()
+
+A Contract is compiled when it is created: the required keys become a frozenset, so a response
+missing nothing passes with one subset test, and every field's allowed types become a set of
+exact types checked with one lookup per field (bool never passes as a number). Violations are
+collected into a ContractReport and aggregated by message instead of failing on the first one.
+"""
+import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+DEFAULT_SWEEP_WORKERS = 8
+NUMBER = (int, float)
+# Examples kept per distinct violation message in a summary
+SUMMARY_EXAMPLES = 3
+
+
+class Contract:
+    """Expected keys and types of a JSON object, with nested contracts for objects and lists of objects."""
+
+    def __init__(self, name: str, fields: dict, optional: dict = None, nested: dict = None, lists: dict = None):
+        self.name = name
+        self.required = frozenset(fields)
+        self.types = {key: _type_set(types) for key, types in {**(optional or {}), **fields}.items()}
+        self.optional = frozenset(optional or ())
+        self.nested = dict(nested or {})
+        self.lists = dict(lists or {})
+
+    def validate(self, data, path: str = "") -> list:
+        """Violation messages for one object, [] when it satisfies the contract."""
+        where = path or self.name
+        if type(data) is not dict:
+            return [f"{where}: expected object, got {type(data).__name__}"]
+        violations = []
+        keys = data.keys()
+        if not self.required <= keys:
+            violations.extend(f"{where}: missing '{key}'" for key in sorted(self.required - keys))
+        for key, allowed in self.types.items():
+            value = data.get(key)
+            if value is None and (key in self.optional or key not in data):
+                continue
+            if type(value) not in allowed:
+                violations.append(f"{where}.{key}: expected {_type_names(allowed)}, got {type(value).__name__}")
+        for key, contract in self.nested.items():
+            if type(data.get(key)) is dict:
+                violations.extend(contract.validate(data[key], f"{where}.{key}"))
+        for key, contract in self.lists.items():
+            items = data.get(key)
+            if type(items) is list:
+                # Without the index, the same violation in every item aggregates into one message
+                for item in items:
+                    violations.extend(contract.validate(item, f"{where}.{key}[]"))
+        return violations
+
+    def __repr__(self) -> str:
+        return f"Contract({self.name})"
+
+
+def _type_set(types) -> frozenset:
+    types = types if isinstance(types, tuple) else (types,)
+    return frozenset(type(None) if kind is None else kind for kind in types)
+
+
+def _type_names(allowed: frozenset) -> str:
+    return " or ".join(sorted("null" if kind is type(None) else kind.__name__ for kind in allowed))
+
+
+BOOK = Contract("Book", {"bookId": int, "title": str, "author": str, "category": str, "price": NUMBER},
+                optional={"coverFileName": str})
+CATEGORY = Contract("Category", {"categoryId": int, "categoryName": str})
+CART_ITEM = Contract("CartItem", {"book": dict, "quantity": int}, nested={"book": BOOK})
+ORDER = Contract("Order", {"orderId": str, "cartTotal": NUMBER, "orderDate": str, "orderDetails": list},
+                 lists={"orderDetails": CART_ITEM})
+
+
+@dataclass
+class Violation:
+    source: str
+    message: str
+
+
+@dataclass
+class ContractReport:
+    """Objects checked per contract and every violation found, aggregated by message for reporting."""
+    checked: Counter = field(default_factory=Counter)
+    violations: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.violations
+
+    def validate(self, contract: Contract, data, source: str) -> bool:
+        """Check one object and record its violations, True when it satisfies the contract."""
+        self.checked[contract.name] += 1
+        violations = contract.validate(data)
+        self.violations.extend(Violation(source, message) for message in violations)
+        return not violations
+
+    def validate_all(self, contract: Contract, items, source: str) -> list:
+        """Check a list response item by item, returns the items satisfying the contract."""
+        if type(items) is not list:
+            self.fail(source, f"expected list of {contract.name}, got {type(items).__name__}")
+            return []
+        return [item for index, item in enumerate(items) if self.validate(contract, item, f"{source}[{index}]")]
+
+    def fail(self, source: str, message: str):
+        self.violations.append(Violation(source, message))
+
+    def merge(self, other: "ContractReport"):
+        self.checked.update(other.checked)
+        self.violations.extend(other.violations)
+
+    def summary(self) -> str:
+        checked = ", ".join(f"{count} {name}" for name, count in sorted(self.checked.items())) or "nothing"
+        if self.ok:
+            return f"Checked {checked}: no contract violations"
+        by_message = {}
+        for violation in self.violations:
+            by_message.setdefault(violation.message, []).append(violation.source)
+        lines = [f"Checked {checked}: {len(self.violations)} violations, {len(by_message)} distinct"]
+        for message, sources in sorted(by_message.items(), key=lambda item: -len(item[1])):
+            examples = ", ".join(sources[:SUMMARY_EXAMPLES]) + (", ..." if len(sources) > SUMMARY_EXAMPLES else "")
+            lines.append(f"  {len(sources)}x {message} ({examples})")
+        return "\n".join(lines)
+
+
+def check_categories(report: ContractReport, categories: list, expected: list = ()):
+    """Validate the category list, that IDs are unique and that every expected category is present."""
+    categories = report.validate_all(CATEGORY, categories, "GET /Book/GetCategoriesList")
+    ids = Counter(category["categoryId"] for category in categories)
+    for category_id, count in ids.items():
+        if count > 1:
+            report.fail("GET /Book/GetCategoriesList", f"category ID {category_id} listed {count} times")
+    actual = {(category["categoryId"], category["categoryName"]) for category in categories}
+    for category in expected:
+        if (category["categoryId"], category["categoryName"]) not in actual:
+            report.fail("GET /Book/GetCategoriesList",
+                        f"expected category missing: {category['categoryName']} (ID: {category['categoryId']})")
+
+
+def check_book(report: ContractReport, book: dict, book_id: int, catalog, source: str) -> bool:
+    """Validate a GET /Book/{id} response against the contract and the catalog entry.
+
+    Returns whether the book satisfies the contract, so its fields can be relied on.
+    """
+    if not report.validate(BOOK, book, source):
+        return False
+    if book["bookId"] != book_id:
+        report.fail(source, f"book ID mismatch: expected {book_id}, got {book['bookId']}")
+    listed = catalog.get(book_id)
+    if listed is not None and listed.get("category") != book["category"]:
+        report.fail(source, f"category differs from the catalog: {book['category']} vs {listed.get('category')}")
+    return True
+
+
+def check_similar_books(report: ContractReport, similar_books: list, book: dict, catalog, source: str):
+    """Validate similar books: the contract, the source book's category and the catalog's category index."""
+    category = book["category"]
+    for similar in report.validate_all(BOOK, similar_books, source):
+        if similar["category"] != category:
+            report.fail(source, f"similar book in wrong category: expected {category}, got {similar['category']}")
+        elif not catalog.is_in_category(similar["bookId"], category):
+            report.fail(source, f"similar book {similar['bookId']} is not listed under {category} in the catalog")
+
+
+def check_cart(report: ContractReport, cart_items: list, source: str = "GET /ShoppingCart/{user}") -> list:
+    """Validate a cart response item by item, returns the items satisfying the contract."""
+    return report.validate_all(CART_ITEM, cart_items, source)
+
+
+def check_order(report: ContractReport, order: dict, book_id: int, source: str = "GET /Order/{user}") -> bool:
+    """Validate an order against the contract and that it has items, one of them book_id.
+
+    Returns whether the order satisfies the contract, so its fields can be relied on.
+    """
+    if not report.validate(ORDER, order, source):
+        return False
+    if not order["orderDetails"]:
+        report.fail(source, f"order {order['orderId']} has no items")
+    elif all(item["book"]["bookId"] != book_id for item in order["orderDetails"]):
+        report.fail(source, f"order {order['orderId']} does not contain book {book_id}")
+    return True
+
+
+def sweep_catalog(client, expected_categories: list = (), max_workers: int = DEFAULT_SWEEP_WORKERS) -> ContractReport:
+    """Validate the categories, every catalog book, every book by ID and every similar books list.
+
+    The per-book requests are fetched concurrently; responses are validated as they complete, on one
+    thread, so the report needs no locking.
+    """
+    report = ContractReport()
+    catalog = client.books.get_catalog()
+    check_categories(report, catalog.categories, expected_categories)
+    category_names = {category.get("categoryName") for category in catalog.categories if type(category) is dict}
+    for book in report.validate_all(BOOK, catalog.books, "GET /Book"):
+        if book["category"] not in category_names:
+            report.fail(f"GET /Book {book['bookId']}", f"unknown category: {book['category']}")
+
+    def fetch(book_id: int) -> tuple:
+        return book_id, _fetch(client.books.get_book_by_id, book_id), \
+            _fetch(client.books.get_similar_books, book_id)
+
+    with ThreadPoolExecutor(max_workers=max(min(max_workers, len(catalog.book_ids)), 1)) as executor:
+        for book_id, (book, book_error), (similar, similar_error) in executor.map(fetch, catalog.book_ids):
+            source = f"GET /Book/{book_id}"
+            if book_error is not None:
+                report.fail(source, book_error)
+                continue
+            if not check_book(report, book, book_id, catalog, source):
+                continue
+            source = f"GET /Book/GetSimilarBooks/{book_id}"
+            if similar_error is not None:
+                report.fail(source, similar_error)
+            else:
+                check_similar_books(report, similar, book, catalog, source)
+    return report
+
+
+def _fetch(method, book_id: int) -> tuple:
+    """Decoded JSON of a response and None, or None and the error message."""
+    try:
+        response = method(book_id)
+        if response.status_code != 200:
+            return None, f"HTTP {response.status_code}"
+        return response.json(), None
+    except (requests.RequestException, ValueError) as error:
+        return None, f"{type(error).__name__}: {error}"
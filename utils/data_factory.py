@@ -1,11 +1,56 @@
 from dataclasses import dataclass, asdict
+from functools import lru_cache
+import os
 import random
 import string
 import json
+import threading
+import uuid
 import requests
-from faker import Faker
 
-fake = Faker()
+# Providers the generators below use; building only these skips loading all of Faker's providers
+_FAKER_PROVIDERS = ("faker.providers.person", "faker.providers.internet", "faker.providers.misc")
+
+class _LazyFaker:
+    """Stand-in for a Faker instance that imports and builds it on first use.
+
+    Runs that never generate data (e.g. -m smoke) skip importing faker. A seed set before the
+    first use is applied when the instance is built.
+    """
+
+    def __init__(self):
+        self._faker = None
+        self._seed = None
+        self._lock = threading.Lock()
+
+    def _get(self):
+        if self._faker is None:
+            with self._lock:
+                if self._faker is None:
+                    from faker import Factory
+                    faker = Factory.create("en_US", providers=list(_FAKER_PROVIDERS))
+                    if self._seed is not None:
+                        faker.seed_instance(self._seed)
+                    self._faker = faker
+        return self._faker
+
+    def seed_instance(self, seed):
+        self._seed = seed
+        if self._faker is not None:
+            self._faker.seed_instance(seed)
+
+    def __getattr__(self, name: str):
+        return getattr(self._get(), name)
+
+fake = _LazyFaker()
+
+# Usernames end with a per-process random tag and a counter: unique within a process, and across
+# processes and runs unless two 122-bit uuid4 tags collide
+_RUN_TAG = uuid.uuid4().hex
+_username_lock = threading.Lock()
+_next_username_index = 0
+_NAME_POOL_SIZE = 2000
+_PASSWORD_CHARS = string.ascii_letters + string.digits
 
 @dataclass
 class UserRegistration:
@@ -19,8 +64,9 @@ class UserRegistration:
     def to_dict(self):
         return asdict(self)
 
+@lru_cache(maxsize=None)
 def load_test_data(file_path: str = "test_data.json"):
-    """Load test data from JSON file."""
+    """Load test data from JSON file, parsed once per process."""
     with open(file_path, 'r') as file:
         return json.load(file)
 
@@ -34,6 +80,18 @@ def get_invalid_user_credentials():
     data = load_test_data()
     return random.choice(data["invalid_users"])
 
+def _reserve_username_indexes(count: int) -> int:
+    """Reserve count consecutive username indexes and return the first one."""
+    global _next_username_index
+    with _username_lock:
+        start = _next_username_index
+        _next_username_index += count
+    return start
+
+def unique_username_suffix() -> str:
+    """Suffix of the process' random tag and a counter, unique within the process and practically across runs."""
+    return f"_{_RUN_TAG}{_reserve_username_indexes(1):x}"
+
 def generate_valid_password() -> str:
     """Generate a password that meets requirements: 8+ chars, 1 uppercase, 1 lowercase, 1 number."""
     return fake.password(
@@ -60,7 +118,7 @@ def generate_valid_registration_data() -> UserRegistration:
     return UserRegistration(
         firstName=fake.first_name(),
         lastName=fake.last_name(),
-        username=fake.user_name() + str(random.randint(100, 999)),
+        username=fake.user_name() + unique_username_suffix(),
         password=password,
         confirmPassword=password,
         gender=random.choice(["Male", "Female"])
@@ -71,7 +129,7 @@ def generate_invalid_registration_data() -> UserRegistration:
     return UserRegistration(
         firstName=fake.first_name(),
         lastName=fake.last_name(),
-        username=fake.user_name() + str(random.randint(100, 999)),
+        username=fake.user_name() + unique_username_suffix(),
         password=generate_invalid_password(),
         confirmPassword=generate_invalid_password(),
         gender=random.choice(["Male", "Female"])
@@ -87,4 +145,85 @@ def get_expected_categories():
     data = load_test_data()
     return data["expected_categories"]
 
+class RegistrationBatch:
+    """Columnar batch of valid registration payloads, one list per field."""
+    __slots__ = ("firstName", "lastName", "username", "password", "gender")
+
+    def __init__(self, firstName: list, lastName: list, username: list, password: list, gender: list):
+        self.firstName = firstName
+        self.lastName = lastName
+        self.username = username
+        self.password = password
+        self.gender = gender
+
+    def __len__(self) -> int:
+        return len(self.username)
+
+    def __getitem__(self, index: int) -> UserRegistration:
+        password = self.password[index]
+        return UserRegistration(
+            firstName=self.firstName[index],
+            lastName=self.lastName[index],
+            username=self.username[index],
+            password=password,
+            confirmPassword=password,
+            gender=self.gender[index]
+        )
+
+    def __iter__(self):
+        return (self[index] for index in range(len(self)))
+
+    def rows(self):
+        """Iterate records as (firstName, lastName, username, password, gender) tuples."""
+        return zip(self.firstName, self.lastName, self.username, self.password, self.gender)
+
+    def iter_dicts(self):
+        """Iterate records as registration request payloads without building UserRegistration objects."""
+        for first_name, last_name, username, password, gender in self.rows():
+            yield {
+                "firstName": first_name,
+                "lastName": last_name,
+                "username": username,
+                "password": password,
+                "confirmPassword": password,
+                "gender": gender
+            }
+
+@lru_cache(maxsize=None)
+def _name_pools() -> tuple:
+    """First and last names sampled from Faker once, reused by every batch."""
+    first_names = list({fake.first_name() for _ in range(_NAME_POOL_SIZE)})
+    last_names = list({fake.last_name() for _ in range(_NAME_POOL_SIZE)})
+    return first_names, last_names
+
+def generate_registration_batch(count: int) -> RegistrationBatch:
+    """Generate count valid registrations at once, usernames suffixed like unique_username_suffix()."""
+    first_names, last_names = _name_pools()
+    first = random.choices(first_names, k=count)
+    last = random.choices(last_names, k=count)
+    start = _reserve_username_indexes(count)
+    usernames = [f"{name.lower()}_{_RUN_TAG}{index:x}" for name, index in zip(last, range(start, start + count))]
+    # Fixed upper/lower/digit prefix keeps every password valid: 8 chars, 1 uppercase, 1 lowercase, 1 number
+    upper = random.choices(string.ascii_uppercase, k=count)
+    lower = random.choices(string.ascii_lowercase, k=count)
+    digits = random.choices(string.digits, k=count)
+    rest = "".join(random.choices(_PASSWORD_CHARS, k=5 * count))
+    passwords = [f"{u}{l}{d}{rest[i * 5:i * 5 + 5]}" for i, (u, l, d) in enumerate(zip(upper, lower, digits))]
+    genders = random.choices(["Male", "Female"], k=count)
+    return RegistrationBatch(first, last, usernames, passwords, genders)
+
+def write_registration_pool(file_path: str, count: int, chunk_size: int = 100_000):
+    """Pre-generate count registrations into a JSON lines file, one compact array per record."""
+    temp_path = f"{file_path}.tmp"
+    with open(temp_path, "w") as file:
+        for offset in range(0, count, chunk_size):
+            batch = generate_registration_batch(min(chunk_size, count - offset))
+            file.writelines(json.dumps(row, separators=(",", ":")) + "\n" for row in batch.rows())
+    os.replace(temp_path, file_path)
 
+def iter_registration_pool(file_path: str):
+    """Stream UserRegistration records from a pool written by write_registration_pool()."""
+    with open(file_path, "r") as file:
+        for line in file:
+            first_name, last_name, username, password, gender = json.loads(line)
+            yield UserRegistration(first_name, last_name, username, password, password, gender)
@@ -0,0 +1,355 @@
+"""Distributed load runner: a coordinator pushes a scenario mix to agents on any number of hosts.
+
+Usage:
+    # On the coordinator host, wait for 3 agents and split 300 users between them
+    python -m utils.distributed coordinator --bind 0.0.0.0:7100 --agents 3 --users 300 --duration 120 \
+        --scenario checkout=1
+    # On each load host
+    python -m utils.distributed agent --connect coordinator-host:7100
+    # Or everything on localhost, with the agents started as subprocesses
+    python -m utils.distributed coordinator --agents 4 --spawn --base-url http://127.0.0.1:5000/api
+
+Protocol: newline-delimited JSON over TCP. An agent sends {"type": "hello"}. Once every agent is
+connected the coordinator sends each one {"type": "setup"} with the load config and its share of the
+users and rate. Each agent registers a user per checkout virtual user and answers {"type": "ready"};
+once all are ready the coordinator sends {"type": "start"} with a common wall-clock start time, so
+setup time does not shift the start. Agents then send one {"type": "delta"} per
+second with the requests, errors and sparse latency histogram of that second only, and
+{"type": "done"} at the end. The coordinator merges the deltas into global per-endpoint
+percentiles and a per-second throughput timeline. Agents on separate hosts need synchronized
+clocks (NTP) for the common start.
+"""
+import argparse
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import asdict
+from utils.api_client import BookCartClient
+from utils.auth_cache import TokenCache
+from utils.load import (DEFAULT_BASE_URL, LoadConfig, Pacer, VirtualUser, _parse_weight, _scenario_weights,
+                        _virtual_user, provision_virtual_users)
+from utils.metrics import LatencyHistogram
+from utils.transport import Transport
+
+DEFAULT_PORT = 7100
+# Time between sending start and the common start, so every agent has its users ready
+START_LEAD = 2.0
+DEFAULT_CONNECT_TIMEOUT = 60.0
+
+
+def _send(stream, message: dict):
+    stream.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    stream.flush()
+
+
+def _parse_address(value: str) -> tuple:
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port or DEFAULT_PORT)
+
+
+class DeltaRecorder:
+    """Transport hook keeping per-endpoint requests, errors and total latency since the last swap()."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def __call__(self, sample):
+        key = f"{sample.method} {sample.endpoint}"
+        with self.lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = [0, 0, LatencyHistogram()]
+            endpoint[0] += 1
+            endpoint[1] += int(sample.status == 0 or sample.status >= 400)
+            endpoint[2].record(sample.total)
+
+    def swap(self) -> dict:
+        """Serialized metrics since the previous swap, reset for the next second."""
+        with self.lock:
+            endpoints, self.endpoints = self.endpoints, {}
+        return {key: {"requests": requests, "errors": errors, "latency": histogram.to_dict()}
+                for key, (requests, errors, histogram) in endpoints.items()}
+
+
+class DistributedResult:
+    """Per-endpoint totals and the per-second timeline merged from every agent's deltas."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.timeline = {}
+        self.agents = 0
+        self.lost_agents = []
+
+    def add_delta(self, second: int, metrics: dict):
+        with self.lock:
+            point = self.timeline.setdefault(second, {"requests": 0, "errors": 0, "reports": 0})
+            point["reports"] += 1
+            for key, delta in metrics.items():
+                endpoint = self.endpoints.get(key)
+                if endpoint is None:
+                    endpoint = self.endpoints[key] = {"requests": 0, "errors": 0, "latency": LatencyHistogram()}
+                endpoint["requests"] += delta["requests"]
+                endpoint["errors"] += delta["errors"]
+                endpoint["latency"].merge(LatencyHistogram.from_dict(delta["latency"]))
+                point["requests"] += delta["requests"]
+                point["errors"] += delta["errors"]
+
+    def total(self) -> LatencyHistogram:
+        histogram = LatencyHistogram()
+        for endpoint in self.endpoints.values():
+            histogram.merge(endpoint["latency"])
+        return histogram
+
+    def to_dict(self) -> dict:
+        return {
+            "agents": self.agents,
+            "lost_agents": self.lost_agents,
+            "endpoints": {
+                key: {
+                    "requests": endpoint["requests"],
+                    "errors": endpoint["errors"],
+                    "p50_ms": endpoint["latency"].percentile(50) * 1000,
+                    "p95_ms": endpoint["latency"].percentile(95) * 1000,
+                    "p99_ms": endpoint["latency"].percentile(99) * 1000,
+                    "max_ms": endpoint["latency"].percentile(100) * 1000,
+                    "histogram": endpoint["latency"].to_dict()
+                }
+                for key, endpoint in sorted(self.endpoints.items())
+            },
+            "timeline": [{"second": second, "requests": point["requests"], "errors": point["errors"]}
+                         for second, point in sorted(self.timeline.items())]
+        }
+
+    def format_table(self, duration: float) -> str:
+        """Render per-endpoint counts and latency percentiles, with throughput when duration is non-zero."""
+        rps = f" {'rps':>8}" if duration else ""
+        lines = [f"{'endpoint':<50} {'reqs':>7} {'errs':>6}{rps} {'p50 ms':>8} {'p95 ms':>8}"
+                 f" {'p99 ms':>8} {'max ms':>8}"]
+        rows = sorted(self.endpoints.items()) + [("total", {
+            "requests": sum(endpoint["requests"] for endpoint in self.endpoints.values()),
+            "errors": sum(endpoint["errors"] for endpoint in self.endpoints.values()),
+            "latency": self.total()
+        })]
+        for key, endpoint in rows:
+            latency = endpoint["latency"]
+            rps = f" {endpoint['requests'] / duration:>8.1f}" if duration else ""
+            lines.append(
+                f"{key:<50} {endpoint['requests']:>7} {endpoint['errors']:>6}{rps}"
+                f" {latency.percentile(50) * 1000:>8.1f} {latency.percentile(95) * 1000:>8.1f}"
+                f" {latency.percentile(99) * 1000:>8.1f} {latency.percentile(100) * 1000:>8.1f}"
+            )
+        lines.append(f"agents: {self.agents}" + (f", lost: {', '.join(self.lost_agents)}" if self.lost_agents else ""))
+        return "\n".join(lines)
+
+
+class Coordinator:
+    """Waits for the agents, starts them in sync and merges their per-second deltas.
+
+    Binds on creation, so with port 0 the chosen port is available from address before run().
+    """
+
+    def __init__(self, config: LoadConfig, agents: int, bind: tuple = ("127.0.0.1", DEFAULT_PORT),
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, start_lead: float = START_LEAD,
+                 on_second=None):
+        self.config = config
+        self.agent_count = agents
+        self.connect_timeout = connect_timeout
+        self.start_lead = start_lead
+        self.on_second = on_second
+        self.server = socket.create_server(bind)
+        self.address = self.server.getsockname()[:2]
+        self.result = DistributedResult()
+        self.reported = set()
+
+    def run(self) -> DistributedResult:
+        """Run the test across the agents and return the merged result."""
+        connections = []
+        try:
+            self.server.settimeout(self.connect_timeout)
+            while len(connections) < self.agent_count:
+                try:
+                    sock, _ = self.server.accept()
+                except socket.timeout:
+                    raise TimeoutError(f"Only {len(connections)} of {self.agent_count} agents connected "
+                                       f"within {self.connect_timeout:.0f}s") from None
+                # Keep the connect timeout until the hello is in, so a silent connection cannot block the run
+                sock.settimeout(self.connect_timeout)
+                stream = sock.makefile("rwb")
+                try:
+                    hello = json.loads(stream.readline() or b"{}")
+                except (OSError, ValueError):
+                    hello = None
+                if type(hello) is not dict or hello.get("type") != "hello":
+                    sock.close()
+                    continue
+                sock.settimeout(None)
+                connections.append((sock, stream, hello.get("agent") or f"agent-{len(connections)}"))
+            self.result.agents = len(connections)
+            for index, (_, stream, _) in enumerate(connections):
+                _send(stream, {"type": "setup", "config": asdict(self.config), "share": self._share(index)})
+            for _, stream, name in connections:
+                ready = json.loads(stream.readline() or b"{}")
+                if ready.get("type") != "ready":
+                    raise RuntimeError(f"Agent {name} failed to set up: {ready.get('error', 'connection closed')}")
+            start_at = time.time() + self.start_lead
+            for _, stream, _ in connections:
+                _send(stream, {"type": "start", "start_at": start_at})
+            readers = [threading.Thread(target=self._read, args=(stream, name), daemon=True)
+                       for _, stream, name in connections]
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join()
+        finally:
+            for sock, _, _ in connections:
+                sock.close()
+            self.server.close()
+        return self.result
+
+    def _share(self, index: int) -> dict:
+        """Users and rate of one agent; users are dealt out like run_worker deals them to processes."""
+        users = len(range(index, self.config.users, self.agent_count))
+        return {"users": users, "rps": self.config.rps / self.agent_count if self.config.rps else 0.0}
+
+    def _read(self, stream, name: str):
+        try:
+            for line in stream:
+                message = json.loads(line)
+                if message["type"] == "delta":
+                    self.result.add_delta(message["second"], message["metrics"])
+                    self._report(message["second"])
+                elif message["type"] == "done":
+                    return
+        except (OSError, ValueError):
+            pass
+        with self.result.lock:
+            self.result.lost_agents.append(name)
+
+    def _report(self, second: int):
+        if self.on_second is None:
+            return
+        with self.result.lock:
+            point = dict(self.result.timeline[second])
+            # Report a second once every agent still running has sent it; with >= a second whose last
+            # report arrives after an agent was lost is still reported, and only once
+            complete = (second not in self.reported
+                        and point["reports"] >= self.result.agents - len(self.result.lost_agents))
+            if complete:
+                self.reported.add(second)
+        if complete:
+            self.on_second(second, point)
+
+
+def run_agent(address: tuple, name: str = None):
+    """Connect to a coordinator, run the share of load it assigns and stream per-second deltas."""
+    name = name or f"{socket.gethostname()}:{threading.get_native_id()}"
+    with socket.create_connection(address) as sock, sock.makefile("rwb") as stream:
+        _send(stream, {"type": "hello", "agent": name})
+        message = json.loads(stream.readline() or b"{}")
+        if message.get("type") != "setup":
+            return
+        config = LoadConfig(**message["config"])
+        share = message["share"]
+        config.users, config.rps = share["users"], share["rps"]
+        recorder = DeltaRecorder()
+        client = BookCartClient(config.base_url, Transport(pool_size=max(config.users, 1)))
+        try:
+            # Each agent registers its own users, so agents never share an account
+            users = provision_virtual_users(client, config)
+        except Exception as error:
+            _send(stream, {"type": "error", "error": f"{type(error).__name__}: {error}"})
+            client.close()
+            return
+        _send(stream, {"type": "ready"})
+        message = json.loads(stream.readline() or b"{}")
+        if message.get("type") != "start":
+            client.close()
+            return
+        tokens = TokenCache()
+        client.transport.add_hook(recorder)
+        pacer = Pacer(config.rps)
+        delay = max(message["start_at"] - time.time(), 0)
+        start = time.perf_counter() + delay
+        end_time = start + config.duration
+        threads = []
+        for slot in range(config.users):
+            ramp_delay = config.ramp_up * slot / config.users
+            user = users[slot] and VirtualUser(users[slot], tokens)
+            thread = threading.Thread(target=_virtual_user, daemon=True,
+                                      args=(client, pacer, config, delay + ramp_delay, end_time, user))
+            thread.start()
+            threads.append(thread)
+        second = 0
+        while any(thread.is_alive() for thread in threads) or second == 0:
+            time.sleep(max(start + second + 1 - time.perf_counter(), 0))
+            _send(stream, {"type": "delta", "second": second, "metrics": recorder.swap()})
+            second += 1
+        # Journeys finishing after the last whole second
+        for thread in threads:
+            thread.join()
+        remainder = recorder.swap()
+        if remainder:
+            _send(stream, {"type": "delta", "second": second, "metrics": remainder})
+        _send(stream, {"type": "done"})
+        client.close()
+
+
+def _spawn_agents(count: int, address: tuple) -> list:
+    command = [sys.executable, "-m", "utils.distributed", "agent", "--connect", f"{address[0]}:{address[1]}"]
+    return [subprocess.Popen(command + ["--name", f"local-{index}"]) for index in range(count)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a BookCart load test across several agents.")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+    coordinator = subparsers.add_parser("coordinator", help="Start the agents in sync and merge their metrics")
+    coordinator.add_argument("--bind", type=_parse_address, default=("127.0.0.1", DEFAULT_PORT),
+                             help=f"host:port to listen on (default 127.0.0.1:{DEFAULT_PORT})")
+    coordinator.add_argument("--agents", type=int, default=2, help="Number of agents to wait for")
+    coordinator.add_argument("--spawn", action="store_true", help="Start the agents as local subprocesses")
+    coordinator.add_argument("--connect-timeout", type=float, default=DEFAULT_CONNECT_TIMEOUT,
+                             help="Seconds to wait for all agents to connect")
+    coordinator.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Base URL for the Book Cart API")
+    coordinator.add_argument("--users", type=int, default=10, help="Virtual users across all agents")
+    coordinator.add_argument("--ramp-up", type=float, default=0.0, help="Seconds until all virtual users are running")
+    coordinator.add_argument("--rps", type=float, default=0.0,
+                             help="Target requests per second across all agents (0 = unlimited)")
+    coordinator.add_argument("--duration", type=float, default=30.0, help="Test duration in seconds")
+    coordinator.add_argument("--scenario", type=_parse_weight, action="append",
+                             help="Scenario and weight, e.g. checkout=1 (repeatable, default browse=3 checkout=1)")
+    coordinator.add_argument("--json", dest="json_path", help="Write the merged result to this JSON file")
+    agent = subparsers.add_parser("agent", help="Generate load for a coordinator")
+    agent.add_argument("--connect", type=_parse_address, required=True, help="Coordinator host:port")
+    agent.add_argument("--name", help="Agent name in the coordinator's report (default host:thread)")
+    args = parser.parse_args(argv)
+
+    if args.role == "agent":
+        run_agent(args.connect, args.name)
+        return
+    config = LoadConfig(base_url=args.base_url, users=args.users, ramp_up=args.ramp_up, rps=args.rps,
+                        duration=args.duration)
+    config.weights = _scenario_weights(parser, args.scenario, config.weights)
+    runner = Coordinator(
+        config, args.agents, args.bind, args.connect_timeout,
+        on_second=lambda second, point: print(
+            f"{second:>5}s {point['requests']:>7} reqs {point['errors']:>5} errs", flush=True)
+    )
+    processes = _spawn_agents(args.agents, runner.address) if args.spawn else []
+    try:
+        result = runner.run()
+    finally:
+        for process in processes:
+            process.wait()
+    print(result.format_table(config.duration))
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(result.to_dict(), file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""Load runner that replays the suite's user journeys as weighted scenarios.
+
+Usage:
+    python -m utils.load --users 20 --ramp-up 10 --rps 50 --duration 60 --processes 2 \
+        --scenario browse=3 --scenario checkout=1
+    # Start at 20 requests/sec and let the adaptive rate limiter find the sustainable throughput
+    python -m utils.load --users 50 --rps 20 --adaptive --duration 120
+
+Virtual users that check out each get a dedicated registered user, so their carts never mix; keep them
+in --users-file to reuse them in later runs.
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+import requests
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from utils.api_client import BookCartClient
+from utils.auth_cache import TokenCache
+from utils.metrics import MetricsRecorder
+from utils.throttle import AdaptiveRateLimiter, CircuitBreaker, CircuitOpenError
+from utils.transport import Transport
+from utils.user_pool import provision_users
+
+DEFAULT_BASE_URL = "https://bookcart.azurewebsites.net/api"
+DEFAULT_ADAPTIVE_START_RATE = 10.0
+
+logger = logging.getLogger(__name__)
+
+
+class Pacer:
+    """Spaces requests evenly at a target rate, without bursts, shared by the threads of one worker."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.lock = threading.Lock()
+        self.next_slot = time.perf_counter()
+
+    def call(self, func, *args, **kwargs):
+        """Call an API method once the next request is allowed."""
+        self.wait()
+        return func(*args, **kwargs)
+
+    def wait(self):
+        """Block until the next request is allowed."""
+        if not self.rate:
+            return
+        with self.lock:
+            now = time.perf_counter()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + 1.0 / self.rate
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class VirtualUser:
+    """Dedicated account of one virtual user, its login token cached across journeys."""
+
+    def __init__(self, credentials: dict, tokens: TokenCache):
+        self.credentials = credentials
+        self.tokens = tokens
+
+    @property
+    def user_id(self) -> int:
+        return self.credentials["userId"]
+
+    def token(self, client: BookCartClient, pacer: Pacer) -> str:
+        """Cached login token, logging in through the pacer only when it is missing or about to expire."""
+        login = lambda username, password: pacer.call(client.users.login_user, username, password)
+        return self.tokens.get(self.credentials["username"], self.credentials["password"], login)["token"]
+
+    def invalidate_token(self):
+        self.tokens.invalidate(self.credentials["username"])
+
+
+def browse_journey(client: BookCartClient, pacer: Pacer, user: VirtualUser = None):
+    """Book browsing flow from tests/test_book_browsing.py."""
+    response = pacer.call(client.books.get_all_books)
+    if response.status_code != 200 or not response.json():
+        return
+    book_id = random.choice(response.json())["bookId"]
+    pacer.call(client.books.get_book_by_id, book_id)
+    pacer.call(client.books.get_similar_books, book_id)
+    pacer.call(client.books.get_categories)
+
+
+def checkout_journey(client: BookCartClient, pacer: Pacer, user: VirtualUser):
+    """Order checkout flow from tests/test_orders.py, as the virtual user's own account."""
+    user_id = user.user_id
+    token = user.token(client, pacer)
+    response = pacer.call(client.books.get_all_books)
+    if response.status_code != 200 or not response.json():
+        return
+    book_id = random.choice(response.json())["bookId"]
+    pacer.call(client.cart.add_to_cart, user_id, book_id)
+    response = pacer.call(client.cart.get_cart_items, user_id)
+    if response.status_code != 200:
+        return
+    cart_items = response.json()
+    order_data = {"orderDetails": cart_items, "cartTotal": len(cart_items)}
+    response = pacer.call(client.cart.checkout, user_id, order_data, token)
+    if response.status_code == 401:
+        user.invalidate_token()
+        return
+    pacer.call(client.cart.get_order_history, user_id, token)
+
+
+SCENARIOS = {
+    "browse": browse_journey,
+    "checkout": checkout_journey
+}
+
+
+def check_weights(weights: dict) -> dict:
+    """Validate scenario weights: known scenarios, finite non-negative weights and a positive total."""
+    for name, weight in weights.items():
+        if name not in SCENARIOS:
+            raise ValueError(f"Unknown scenario '{name}', choose from {', '.join(SCENARIOS)}")
+        if not (isinstance(weight, (int, float)) and math.isfinite(weight) and weight >= 0):
+            raise ValueError(f"Weight of scenario '{name}' must be a non-negative number, got {weight!r}")
+    if not sum(weights.values()) > 0:
+        raise ValueError("At least one scenario needs a positive weight")
+    return weights
+
+
+class JourneyErrors:
+    """Errors inside journeys that are not failed requests, e.g. an unexpected response shape.
+
+    Failed requests are already recorded by the transport hook; these are counted per scenario and
+    error type, and the first of each is logged with its traceback.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def add(self, scenario: str, error: Exception):
+        key = f"{scenario}: {type(error).__name__}"
+        with self.lock:
+            first = key not in self.counts
+            self.counts[key] = self.counts.get(key, 0) + 1
+        if first:
+            logger.error("Journey %s failed", scenario, exc_info=error)
+
+    def merge(self, counts: dict):
+        with self.lock:
+            for key, count in counts.items():
+                self.counts[key] = self.counts.get(key, 0) + count
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return dict(self.counts)
+
+    def format(self) -> str:
+        counts = self.to_dict()
+        if not counts:
+            return "journey errors: none"
+        return "journey errors: " + ", ".join(f"{key} x{count}" for key, count in sorted(counts.items()))
+
+
+# Errors of virtual users run without their own JourneyErrors, still logged once per kind
+_unreported_errors = JourneyErrors()
+
+
+@dataclass
+class LoadConfig:
+    base_url: str = DEFAULT_BASE_URL
+    users: int = 10
+    ramp_up: float = 0.0
+    rps: float = 0.0
+    duration: float = 30.0
+    processes: int = 1
+    adaptive: bool = False
+    weights: dict = field(default_factory=lambda: {"browse": 3, "checkout": 1})
+
+    def __post_init__(self):
+        check_weights(self.weights)
+
+
+def provision_virtual_users(client: BookCartClient, config: LoadConfig, users_file: str = None) -> list:
+    """Credentials for each of config.users virtual users, None each when no journey checks out."""
+    if not config.weights.get("checkout"):
+        return [None] * config.users
+    return provision_users(client, config.users, users_file)
+
+
+def _virtual_user(client: BookCartClient, pacer: Pacer, config: LoadConfig, start_delay: float, end_time: float,
+                  user: VirtualUser = None, errors: JourneyErrors = None):
+    """Run weighted journeys as user until the end of the test, starting after its ramp-up delay."""
+    errors = errors or _unreported_errors
+    time.sleep(start_delay)
+    names = list(config.weights)
+    weights = [config.weights[name] for name in names]
+    while time.perf_counter() < end_time:
+        name = random.choices(names, weights)[0]
+        try:
+            SCENARIOS[name](client, pacer, user)
+        except CircuitOpenError as error:
+            time.sleep(min(error.retry_in, max(end_time - time.perf_counter(), 0)))
+        except requests.RequestException:
+            pass  # Failed request is already recorded by the transport hook
+        except Exception as error:
+            errors.add(name, error)
+
+
+def run_worker(config: LoadConfig, worker_index: int, start_at: float, users: list = None) -> dict:
+    """Run this process' share of virtual users.
+
+    users holds the credentials of every virtual user, as from provision_virtual_users(), which
+    is called here when they are not given. Returns the serialized per-endpoint metrics and the
+    journey error counts.
+    """
+    user_slots = list(range(worker_index, config.users, config.processes))
+    rate = config.rps / config.processes if config.rps else 0
+    recorder = MetricsRecorder()
+    if config.adaptive:
+        # The rate limiter takes over from the fixed pacer, starting at --rps and adapting from there
+        pacer = Pacer(0)
+        transport = Transport(
+            pool_size=max(len(user_slots), 1),
+            rate_limiter=AdaptiveRateLimiter(rate or DEFAULT_ADAPTIVE_START_RATE / config.processes),
+            circuit_breaker=CircuitBreaker()
+        )
+    else:
+        pacer = Pacer(rate)
+        transport = Transport(pool_size=max(len(user_slots), 1))
+    client = BookCartClient(config.base_url, transport)
+    if users is None:
+        users = provision_virtual_users(client, config)
+    tokens = TokenCache()
+    errors = JourneyErrors()
+    client.transport.add_hook(recorder)
+    delay = max(start_at - time.time(), 0)
+    start = time.perf_counter() + delay
+    end_time = start + config.duration
+    threads = []
+    for slot in user_slots:
+        ramp_delay = config.ramp_up * slot / config.users if config.users else 0
+        user = users[slot] and VirtualUser(users[slot], tokens)
+        thread = threading.Thread(
+            target=_virtual_user,
+            args=(client, pacer, config, delay + ramp_delay, end_time, user, errors),
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+    for thread in threads:
+        thread.join()
+    client.close()
+    return {"metrics": recorder.to_dict(), "journey_errors": errors.to_dict()}
+
+
+def run_load(config: LoadConfig, users_file: str = None, errors: JourneyErrors = None) -> MetricsRecorder:
+    """Run the load test across worker processes and return the merged per-endpoint metrics.
+
+    The users are registered before the test starts, so registration does not count towards its metrics.
+    Journey errors of all workers are merged into errors when given.
+    """
+    setup_client = BookCartClient(config.base_url)
+    try:
+        users = provision_virtual_users(setup_client, config, users_file)
+    finally:
+        setup_client.close()
+    start_at = time.time() + 1.0
+    recorder = MetricsRecorder()
+    with ProcessPoolExecutor(max_workers=config.processes) as executor:
+        futures = [executor.submit(run_worker, config, index, start_at, users) for index in range(config.processes)]
+        for future in futures:
+            result = future.result()
+            recorder.merge(MetricsRecorder.from_dict(result["metrics"]))
+            if errors is not None:
+                errors.merge(result["journey_errors"])
+    return recorder
+
+
+def _parse_weight(value: str) -> tuple:
+    name, _, weight = value.partition("=")
+    if name not in SCENARIOS:
+        raise argparse.ArgumentTypeError(f"Unknown scenario '{name}', choose from {', '.join(SCENARIOS)}")
+    try:
+        weight = float(weight or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Weight of scenario '{name}' is not a number: {weight}") from None
+    if not (math.isfinite(weight) and weight >= 0):
+        raise argparse.ArgumentTypeError(f"Weight of scenario '{name}' must be a non-negative number")
+    return name, weight
+
+
+def _scenario_weights(parser: argparse.ArgumentParser, scenarios: list, default: dict) -> dict:
+    """Weights from repeated --scenario options, exiting with a usage error when none is positive."""
+    if not scenarios:
+        return default
+    try:
+        return check_weights(dict(scenarios))
+    except ValueError as error:
+        parser.error(str(error))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay BookCart user journeys as a load test.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Base URL for the Book Cart API")
+    parser.add_argument("--users", type=int, default=10, help="Number of virtual users")
+    parser.add_argument("--ramp-up", type=float, default=0.0, help="Seconds until all virtual users are running")
+    parser.add_argument("--rps", type=float, default=0.0, help="Target requests per second across all workers (0 = unlimited)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Test duration in seconds")
+    parser.add_argument("--processes", type=int, default=1, help="Worker processes, virtual users run as threads inside them")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Adapt the request rate to 429/Retry-After, errors and latency growth, starting at --rps")
+    parser.add_argument("--scenario", type=_parse_weight, action="append",
+                        help="Scenario and weight, e.g. browse=3 (repeatable, default browse=3 checkout=1)")
+    parser.add_argument("--users-file", help="Keep the registered checkout users in this JSON file for later runs")
+    parser.add_argument("--json", dest="json_path", help="Write the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    config = LoadConfig(
+        base_url=args.base_url,
+        users=args.users,
+        ramp_up=args.ramp_up,
+        rps=args.rps,
+        duration=args.duration,
+        processes=max(min(args.processes, args.users), 1),
+        adaptive=args.adaptive
+    )
+    config.weights = _scenario_weights(parser, args.scenario, config.weights)
+    errors = JourneyErrors()
+    recorder = run_load(config, args.users_file, errors)
+    print(recorder.format_table(duration=config.duration))
+    print(errors.format())
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump(recorder.to_dict(), file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
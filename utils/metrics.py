@@ -0,0 +1,314 @@
+import threading
+from dataclasses import dataclass
+
+# 128 sub-buckets per power of two keeps every recorded value within 1% of its bucket
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+TIMING_FIELDS = ("dns", "connect", "ttfb", "total")
+
+
+@dataclass
+class RequestSample:
+    """Timing and size of a single API call, produced by the transport for every request."""
+    method: str
+    endpoint: str
+    status: int
+    bytes: int
+    dns: float
+    connect: float
+    ttfb: float
+    total: float
+
+
+class LatencyHistogram:
+    """Sparse HDR-style log-linear histogram of microsecond values that can be merged and serialized."""
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < SUB_BUCKET_COUNT:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS
+        return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+    @staticmethod
+    def _value_at(index: int) -> int:
+        shift = index >> SUB_BUCKET_BITS
+        if shift == 0:
+            return index
+        low = (index & (SUB_BUCKET_COUNT - 1)) << shift
+        return low + (1 << (shift - 1))
+
+    def record(self, seconds: float):
+        """Record a duration given in seconds."""
+        value = max(int(seconds * 1_000_000), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add all values recorded by another histogram."""
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, pct: float) -> float:
+        """Value in seconds at the given percentile (0-100)."""
+        if not self.count:
+            return 0.0
+        if pct >= 100:
+            return self.max / 1_000_000
+        threshold = max(pct / 100 * self.count, 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= threshold:
+                return min(self._value_at(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    def mean(self) -> float:
+        """Mean value in seconds."""
+        return self.total / self.count / 1_000_000 if self.count else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "counts": {str(index): count for index, count in self.counts.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class EndpointMetrics:
+    """Aggregated samples for one method and endpoint template."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.bytes = 0
+        self.statuses = {}
+        self.timings = {name: LatencyHistogram() for name in TIMING_FIELDS}
+
+    def add(self, sample: RequestSample):
+        self.requests += 1
+        self.errors += int(sample.status == 0 or sample.status >= 400)
+        self.bytes += sample.bytes
+        self.statuses[sample.status] = self.statuses.get(sample.status, 0) + 1
+        for name in TIMING_FIELDS:
+            self.timings[name].record(getattr(sample, name))
+
+    def merge(self, other: "EndpointMetrics"):
+        self.requests += other.requests
+        self.errors += other.errors
+        self.bytes += other.bytes
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        for name in TIMING_FIELDS:
+            self.timings[name].merge(other.timings[name])
+
+    def to_dict(self) -> dict:
+        total = self.timings["total"]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "bytes": self.bytes,
+            "statuses": {str(status): count for status, count in self.statuses.items()},
+            "p50_ms": total.percentile(50) * 1000,
+            "p95_ms": total.percentile(95) * 1000,
+            "p99_ms": total.percentile(99) * 1000,
+            "max_ms": total.percentile(100) * 1000,
+            "histograms": {name: histogram.to_dict() for name, histogram in self.timings.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EndpointMetrics":
+        metrics = cls()
+        metrics.requests = data["requests"]
+        metrics.errors = data["errors"]
+        metrics.bytes = data["bytes"]
+        metrics.statuses = {int(status): count for status, count in data["statuses"].items()}
+        metrics.timings = {name: LatencyHistogram.from_dict(data["histograms"][name]) for name in TIMING_FIELDS}
+        return metrics
+
+
+class MetricsRecorder:
+    """Transport hook collecting per-endpoint metrics, mergeable across threads, processes and xdist workers."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def __call__(self, sample: RequestSample):
+        key = f"{sample.method} {sample.endpoint}"
+        with self.lock:
+            if key not in self.endpoints:
+                self.endpoints[key] = EndpointMetrics()
+            self.endpoints[key].add(sample)
+
+    def merge(self, other: "MetricsRecorder"):
+        """Add all metrics recorded by another recorder."""
+        with self.lock:
+            for key, metrics in other.endpoints.items():
+                if key not in self.endpoints:
+                    self.endpoints[key] = EndpointMetrics()
+                self.endpoints[key].merge(metrics)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {key: self.endpoints[key].to_dict() for key in sorted(self.endpoints)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MetricsRecorder":
+        recorder = cls()
+        recorder.endpoints = {key: EndpointMetrics.from_dict(value) for key, value in data.items()}
+        return recorder
+
+    def format_table(self, duration: float = None) -> str:
+        """Render per-endpoint counts and latency percentiles, with throughput when duration is given."""
+        header = f"{'endpoint':<50} {'reqs':>6} {'errs':>5}"
+        if duration:
+            header += f" {'rps':>8}"
+        header += f" {'dns ms':>7} {'conn ms':>7} {'ttfb ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        lines = [header]
+        with self.lock:
+            for key in sorted(self.endpoints):
+                metrics = self.endpoints[key]
+                timings = metrics.timings
+                line = f"{key:<50} {metrics.requests:>6} {metrics.errors:>5}"
+                if duration:
+                    line += f" {metrics.requests / duration:>8.1f}"
+                line += (
+                    f" {timings['dns'].mean() * 1000:>7.1f} {timings['connect'].mean() * 1000:>7.1f}"
+                    f" {timings['ttfb'].percentile(50) * 1000:>8.1f}"
+                    f" {timings['total'].percentile(50) * 1000:>8.1f} {timings['total'].percentile(95) * 1000:>8.1f}"
+                    f" {timings['total'].percentile(99) * 1000:>8.1f} {timings['total'].percentile(100) * 1000:>8.1f}"
+                )
+                lines.append(line)
+        return "\n".join(lines)
+
+
+@dataclass
+class ConvergenceSample:
+    """Outcome of polling a read-after-write check, produced by utils.polling for every wait."""
+    name: str
+    attempts: int
+    lag: float
+    converged: bool
+
+
+class ConvergenceMetrics:
+    """Aggregated convergence samples for one polled check."""
+
+    def __init__(self):
+        self.waits = 0
+        self.immediate = 0
+        self.timeouts = 0
+        self.attempts = 0
+        self.lag = LatencyHistogram()
+
+    def add(self, sample: ConvergenceSample):
+        self.waits += 1
+        self.immediate += int(sample.converged and sample.attempts == 1)
+        self.timeouts += int(not sample.converged)
+        self.attempts += sample.attempts
+        if sample.converged:
+            self.lag.record(sample.lag)
+
+    def merge(self, other: "ConvergenceMetrics"):
+        self.waits += other.waits
+        self.immediate += other.immediate
+        self.timeouts += other.timeouts
+        self.attempts += other.attempts
+        self.lag.merge(other.lag)
+
+    def to_dict(self) -> dict:
+        return {
+            "waits": self.waits,
+            "immediate": self.immediate,
+            "timeouts": self.timeouts,
+            "attempts": self.attempts,
+            "p50_ms": self.lag.percentile(50) * 1000,
+            "p95_ms": self.lag.percentile(95) * 1000,
+            "max_ms": self.lag.percentile(100) * 1000,
+            "histogram": self.lag.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConvergenceMetrics":
+        metrics = cls()
+        metrics.waits = data["waits"]
+        metrics.immediate = data["immediate"]
+        metrics.timeouts = data["timeouts"]
+        metrics.attempts = data["attempts"]
+        metrics.lag = LatencyHistogram.from_dict(data["histogram"])
+        return metrics
+
+
+class ConvergenceRecorder:
+    """Polling hook collecting how long read-after-write checks take to converge, per check name."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checks = {}
+
+    def __call__(self, sample: ConvergenceSample):
+        with self.lock:
+            if sample.name not in self.checks:
+                self.checks[sample.name] = ConvergenceMetrics()
+            self.checks[sample.name].add(sample)
+
+    def merge(self, other: "ConvergenceRecorder"):
+        """Add all samples recorded by another recorder."""
+        with self.lock:
+            for name, metrics in other.checks.items():
+                if name not in self.checks:
+                    self.checks[name] = ConvergenceMetrics()
+                self.checks[name].merge(metrics)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {name: self.checks[name].to_dict() for name in sorted(self.checks)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ConvergenceRecorder":
+        recorder = cls()
+        recorder.checks = {name: ConvergenceMetrics.from_dict(value) for name, value in data.items()}
+        return recorder
+
+    def format_table(self) -> str:
+        """Render per-check wait counts and the lag until the check first passed."""
+        lines = [f"{'check':<50} {'waits':>6} {'1st try':>7} {'timeouts':>8} {'polls':>6}"
+                 f" {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}"]
+        with self.lock:
+            for name in sorted(self.checks):
+                metrics = self.checks[name]
+                lines.append(
+                    f"{name:<50} {metrics.waits:>6} {metrics.immediate:>7} {metrics.timeouts:>8} {metrics.attempts:>6}"
+                    f" {metrics.lag.percentile(50) * 1000:>8.1f} {metrics.lag.percentile(95) * 1000:>8.1f}"
+                    f" {metrics.lag.percentile(100) * 1000:>8.1f}"
+                )
+        return "\n".join(lines)
@@ -0,0 +1,329 @@
+"""Local stand-in for the BookCart API, used by `pytest --base-url=local` and for offline load tests.
+
+Usage:
+    python -m utils.mock_server --port 5000 --latency 0.01 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import itertools
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from aiohttp import web
+from utils.data_factory import load_test_data
+
+BOOKS_PER_CATEGORY = 6
+TOKEN_LIFETIME = 3600
+PASSWORD_PATTERN = re.compile(r"^(?=.*[a-z])(?=.*[A-Z])(?=.*\d).{8,}$")
+# How long start() waits for the server to bind
+START_TIMEOUT = 10.0
+_SECRET = b"bookcart-mock-secret"
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def generate_books(categories: list, seed: int = 0) -> list:
+    """Deterministic catalog with BOOKS_PER_CATEGORY books per category."""
+    rng = random.Random(seed)
+    books = []
+    book_id = itertools.count(1)
+    for category in categories:
+        for number in range(1, BOOKS_PER_CATEGORY + 1):
+            books.append({
+                "bookId": next(book_id),
+                "title": f"{category['categoryName']} Book {number}",
+                "author": f"Author {rng.randint(1, 50)}",
+                "category": category["categoryName"],
+                "price": round(rng.uniform(5, 60), 2),
+                "coverFileName": f"{uuid.UUID(int=rng.getrandbits(128))}.jpg"
+            })
+    return books
+
+
+class BookCartState:
+    """In-memory users, catalog, carts and orders seeded from test_data.json."""
+
+    def __init__(self, test_data: dict, seed: int = 0):
+        self.categories = test_data["expected_categories"]
+        self.books = generate_books(self.categories, seed)
+        self.books_by_id = {book["bookId"]: book for book in self.books}
+        self.books_body = json.dumps(self.books).encode()
+        self.books_etag = '"' + hashlib.sha1(self.books_body).hexdigest() + '"'
+        self.users = {}
+        for user in test_data["valid_users"]:
+            self.users[user["username"].lower()] = {
+                "userId": user["userId"],
+                "firstName": user["username"],
+                "lastName": "",
+                "username": user["username"],
+                "password": user["password"],
+                "gender": "Male",
+                "userTypeName": user.get("userTypeName", "User")
+            }
+        self.user_ids = itertools.count(max((user["userId"] for user in self.users.values()), default=0) + 1)
+        self.order_ids = itertools.count(1)
+        self.carts = {}
+        self.orders = {}
+
+
+class MockBookCartServer:
+    """aiohttp BookCart API running on its own event loop thread, with optional latency and error injection.
+
+    max_rps caps the requests served per second, the rest is answered with 429 and Retry-After.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, data_file: str = "test_data.json", seed: int = 0, max_rps: int = 0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.window = 0
+        self.window_requests = 0
+        self.state = BookCartState(load_test_data(data_file), seed)
+        self.random = random.Random(seed)
+        self.loop = None
+        self.runner = None
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/api"
+
+    def create_app(self) -> web.Application:
+        app = web.Application(middlewares=[self._faults])
+        app.add_routes([
+            web.post("/api/User", self.register_user),
+            web.get("/api/User/validateUserName/{username}", self.validate_username),
+            web.post("/api/login", self.login),
+            web.get("/api/Book", self.get_books),
+            web.get("/api/Book/GetCategoriesList", self.get_categories),
+            web.get(r"/api/Book/GetSimilarBooks/{id:\d+}", self.get_similar_books),
+            web.get(r"/api/Book/{id:\d+}", self.get_book),
+            web.post(r"/api/ShoppingCart/AddToCart/{user:\d+}/{book:\d+}", self.add_to_cart),
+            web.get(r"/api/ShoppingCart/{user:\d+}", self.get_cart),
+            web.delete(r"/api/ShoppingCart/{user:\d+}/{book:\d+}", self.remove_from_cart),
+            web.post(r"/api/CheckOut/{user:\d+}", self.checkout),
+            web.get(r"/api/Order/{user:\d+}", self.get_orders),
+        ])
+        return app
+
+    def start(self, timeout: float = START_TIMEOUT) -> str:
+        """Start serving in a background thread and return the base URL.
+
+        Re-raises the error when the server fails to start, e.g. its port is already in use.
+        """
+        started = threading.Event()
+        failure = []
+        self.loop = asyncio.new_event_loop()
+
+        async def serve():
+            self.runner = web.AppRunner(self.create_app(), access_log=None)
+            await self.runner.setup()
+            site = web.TCPSite(self.runner, self.host, self.port, backlog=1024)
+            await site.start()
+            self.port = self.runner.addresses[0][1]
+
+        def run():
+            asyncio.set_event_loop(self.loop)
+            try:
+                self.loop.run_until_complete(serve())
+            except BaseException as error:
+                failure.append(error)
+                return
+            finally:
+                started.set()
+            self.loop.run_forever()
+
+        self.thread = threading.Thread(target=run, name="mock-bookcart", daemon=True)
+        self.thread.start()
+        if not started.wait(timeout):
+            raise TimeoutError(f"Mock server did not start within {timeout:.0f}s")
+        if failure:
+            self.thread.join()
+            self.loop.close()
+            self.loop = None
+            raise failure[0]
+        return self.base_url
+
+    def stop(self):
+        """Stop the server and its event loop thread."""
+        if self.loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.loop = None
+
+    @web.middleware
+    async def _faults(self, request: web.Request, handler):
+        if self.max_rps:
+            second = int(time.monotonic())
+            if second != self.window:
+                self.window, self.window_requests = second, 0
+            self.window_requests += 1
+            if self.window_requests > self.max_rps:
+                return web.json_response({"error": "Too many requests"}, status=429, headers={"Retry-After": "1"})
+        if self.latency:
+            await asyncio.sleep(self.random.uniform(0.5, 1.5) * self.latency)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return web.json_response({"error": "Injected failure"}, status=503)
+        return await handler(request)
+
+    @staticmethod
+    async def _json_object(request: web.Request) -> dict:
+        """Request body as a JSON object, None when it is malformed or not an object."""
+        try:
+            data = await request.json()
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    def _issue_token(self, user: dict) -> str:
+        header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        claims = {"sub": user["username"], "userId": user["userId"], "exp": int(time.time()) + TOKEN_LIFETIME}
+        payload = _b64(json.dumps(claims).encode())
+        signature = _b64(hmac.new(_SECRET, f"{header}.{payload}".encode(), hashlib.sha256).digest())
+        return f"{header}.{payload}.{signature}"
+
+    def _is_authorized(self, request: web.Request, user_id: int) -> bool:
+        authorization = request.headers.get("Authorization", "")
+        if not authorization.startswith("Bearer "):
+            return False
+        try:
+            header, payload, signature = authorization[len("Bearer "):].split(".")
+            expected = _b64(hmac.new(_SECRET, f"{header}.{payload}".encode(), hashlib.sha256).digest())
+            claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+        except ValueError:
+            return False
+        return (hmac.compare_digest(signature, expected)
+                and claims.get("exp", 0) > time.time() and claims.get("userId") == user_id)
+
+    async def register_user(self, request: web.Request) -> web.Response:
+        data = await self._json_object(request)
+        if data is None:
+            return web.json_response({"error": "Invalid request body"}, status=400)
+        required = ("firstName", "lastName", "username", "password", "confirmPassword", "gender")
+        if any(not data.get(field) or not isinstance(data[field], str) for field in required):
+            return web.json_response({"error": "All fields are required"}, status=400)
+        if not PASSWORD_PATTERN.match(data["password"]) or data["password"] != data["confirmPassword"]:
+            return web.json_response({"error": "Invalid password"}, status=400)
+        if data["username"].lower() in self.state.users:
+            return web.json_response({"error": "Username already exists"}, status=400)
+        self.state.users[data["username"].lower()] = {
+            "userId": next(self.state.user_ids),
+            "firstName": data["firstName"],
+            "lastName": data["lastName"],
+            "username": data["username"],
+            "password": data["password"],
+            "gender": data["gender"],
+            "userTypeName": "User"
+        }
+        return web.Response(status=200)
+
+    async def validate_username(self, request: web.Request) -> web.Response:
+        return web.json_response(request.match_info["username"].lower() not in self.state.users)
+
+    async def login(self, request: web.Request) -> web.Response:
+        data = await self._json_object(request)
+        if data is None:
+            return web.json_response({"error": "Invalid request body"}, status=400)
+        user = self.state.users.get(str(data.get("username", "")).lower())
+        if user is None or user["password"] != data.get("password"):
+            return web.Response(status=401)
+        user_details = {key: user[key] for key in ("userId", "firstName", "lastName", "username", "userTypeName")}
+        return web.json_response({"token": self._issue_token(user), "userDetails": user_details})
+
+    async def get_books(self, request: web.Request) -> web.Response:
+        if request.headers.get("If-None-Match") == self.state.books_etag:
+            return web.Response(status=304, headers={"ETag": self.state.books_etag})
+        return web.Response(body=self.state.books_body, content_type="application/json",
+                            headers={"ETag": self.state.books_etag})
+
+    async def get_book(self, request: web.Request) -> web.Response:
+        book = self.state.books_by_id.get(int(request.match_info["id"]))
+        if book is None:
+            return web.Response(status=404)
+        return web.json_response(book)
+
+    async def get_similar_books(self, request: web.Request) -> web.Response:
+        book = self.state.books_by_id.get(int(request.match_info["id"]))
+        if book is None:
+            return web.json_response([])
+        similar = [other for other in self.state.books
+                   if other["category"] == book["category"] and other["bookId"] != book["bookId"]]
+        return web.json_response(similar[:5])
+
+    async def get_categories(self, request: web.Request) -> web.Response:
+        return web.json_response(self.state.categories)
+
+    async def add_to_cart(self, request: web.Request) -> web.Response:
+        user_id = int(request.match_info["user"])
+        book = self.state.books_by_id.get(int(request.match_info["book"]))
+        if book is None:
+            return web.Response(status=404)
+        cart = self.state.carts.setdefault(user_id, {})
+        cart[book["bookId"]] = cart.get(book["bookId"], 0) + 1
+        return web.json_response(sum(cart.values()))
+
+    async def get_cart(self, request: web.Request) -> web.Response:
+        cart = self.state.carts.get(int(request.match_info["user"]), {})
+        items = [{"book": self.state.books_by_id[book_id], "quantity": quantity} for book_id, quantity in cart.items()]
+        return web.json_response(items)
+
+    async def remove_from_cart(self, request: web.Request) -> web.Response:
+        cart = self.state.carts.get(int(request.match_info["user"]), {})
+        cart.pop(int(request.match_info["book"]), None)
+        return web.json_response(sum(cart.values()))
+
+    async def checkout(self, request: web.Request) -> web.Response:
+        user_id = int(request.match_info["user"])
+        if not self._is_authorized(request, user_id):
+            return web.Response(status=401)
+        data = await self._json_object(request)
+        if data is None:
+            return web.json_response({"error": "Invalid request body"}, status=400)
+        if not data.get("orderDetails"):
+            return web.json_response({"error": "Order has no items"}, status=400)
+        order_id = str(next(self.state.order_ids)).zfill(12)
+        self.state.orders.setdefault(user_id, []).append({
+            "orderId": order_id,
+            "cartTotal": data.get("cartTotal", 0),
+            "orderDate": datetime.now(timezone.utc).isoformat(),
+            "orderDetails": data["orderDetails"]
+        })
+        self.state.carts.pop(user_id, None)
+        return web.json_response(order_id)
+
+    async def get_orders(self, request: web.Request) -> web.Response:
+        user_id = int(request.match_info["user"])
+        if not self._is_authorized(request, user_id):
+            return web.Response(status=401)
+        return web.json_response(self.state.orders.get(user_id, []))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local BookCart API stand-in.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean artificial latency per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--max-rps", type=int, default=0, help="Requests served per second, the rest get 429 (0 = unlimited)")
+    args = parser.parse_args(argv)
+    server = MockBookCartServer(args.host, args.port, args.latency, args.error_rate, max_rps=args.max_rps)
+    web.run_app(server.create_app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""Typed views over API responses.
+
+The models keep the decoded JSON they were built from and read fields from it on access, so
+wrapping a response costs one small object. Nested models (a cart item's book, an order's items)
+are only built when first accessed, and membership indexes are built once on first use.
+"""
+
+
+def _field(key: str):
+    return property(lambda self: self._data.get(key), doc=f"The '{key}' field.")
+
+
+class Book:
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    book_id = _field("bookId")
+    title = _field("title")
+    author = _field("author")
+    category = _field("category")
+    price = _field("price")
+    cover_file_name = _field("coverFileName")
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+    def __repr__(self) -> str:
+        return f"Book({self.book_id}, {self.title!r})"
+
+
+class Category:
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    category_id = _field("categoryId")
+    category_name = _field("categoryName")
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+    def __repr__(self) -> str:
+        return f"Category({self.category_id}, {self.category_name!r})"
+
+
+class CartItem:
+    """An entry of a cart or an order, its Book is built on first access."""
+    __slots__ = ("_data", "_book")
+
+    def __init__(self, data: dict):
+        self._data = data
+        self._book = None
+
+    quantity = _field("quantity")
+
+    @property
+    def book(self) -> Book:
+        if self._book is None:
+            self._book = Book(self._data.get("book") or {})
+        return self._book
+
+    @property
+    def book_id(self) -> int:
+        """Book ID read straight from the item, without building the Book."""
+        return (self._data.get("book") or {}).get("bookId")
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+    def __repr__(self) -> str:
+        return f"CartItem({self.book_id}, quantity={self.quantity})"
+
+
+class _Items:
+    """Lazily wrapped list of cart items with a book ID -> quantity index built on first lookup."""
+    __slots__ = ("_data", "_items", "_quantities")
+
+    def __init__(self, data: list):
+        self._data = data
+        self._items = None
+        self._quantities = None
+
+    @property
+    def items(self) -> list:
+        if self._items is None:
+            self._items = [CartItem(item) for item in self._data]
+        return self._items
+
+    @property
+    def quantities(self) -> dict:
+        """Book ID -> quantity."""
+        if self._quantities is None:
+            quantities = {}
+            for item in self._data:
+                book_id = (item.get("book") or {}).get("bookId")
+                quantities[book_id] = quantities.get(book_id, 0) + (item.get("quantity") or 1)
+            self._quantities = quantities
+        return self._quantities
+
+    @property
+    def book_ids(self):
+        return self.quantities.keys()
+
+    def contains(self, book_id: int) -> bool:
+        return book_id in self.quantities
+
+    @property
+    def raw(self) -> list:
+        return self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __getitem__(self, index: int) -> CartItem:
+        return self.items[index]
+
+
+class Cart(_Items):
+    """Items of a shopping cart, cart.contains(book_id) is a set lookup."""
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return f"Cart({len(self)} items)"
+
+
+class Order:
+    """An order, its items are built on first access."""
+    __slots__ = ("_data", "_details")
+
+    def __init__(self, data: dict):
+        self._data = data
+        self._details = None
+
+    order_id = _field("orderId")
+    cart_total = _field("cartTotal")
+    order_date = _field("orderDate")
+
+    @property
+    def details(self) -> _Items:
+        if self._details is None:
+            self._details = _Items(self._data.get("orderDetails", []))
+        return self._details
+
+    @property
+    def items(self) -> list:
+        return self.details.items
+
+    def contains(self, book_id: int) -> bool:
+        return self.details.contains(book_id)
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+    def __repr__(self) -> str:
+        return f"Order({self.order_id!r}, {len(self.details)} items)"
+
+
+class OrderHistory:
+    """Orders of a user; find_by_book() uses a book ID -> first order index built on first lookup."""
+    __slots__ = ("_data", "_orders", "_first_order_by_book")
+
+    def __init__(self, data: list):
+        self._data = data
+        self._orders = [None] * len(data)
+        self._first_order_by_book = None
+
+    def find_by_book(self, book_id: int) -> Order:
+        """First order containing the book, None if there is none."""
+        if self._first_order_by_book is None:
+            index = {}
+            for position, order in enumerate(self._data):
+                for item in order.get("orderDetails") or []:
+                    index.setdefault((item.get("book") or {}).get("bookId"), position)
+            self._first_order_by_book = index
+        position = self._first_order_by_book.get(book_id)
+        return None if position is None else self[position]
+
+    @property
+    def raw(self) -> list:
+        return self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, position: int) -> Order:
+        order = self._orders[position]
+        if order is None:
+            order = self._orders[position] = Order(self._data[position])
+        return order
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self._data)))
+
+    def __repr__(self) -> str:
+        return f"OrderHistory({len(self)} orders)"
+
+
+class LoginResult:
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    token = _field("token")
+
+    @property
+    def user_details(self) -> dict:
+        return self._data.get("userDetails", {})
+
+    @property
+    def user_id(self) -> int:
+        return self.user_details.get("userId")
+
+    @property
+    def username(self) -> str:
+        return self.user_details.get("username")
+
+    @property
+    def raw(self) -> dict:
+        return self._data
+
+    def __repr__(self) -> str:
+        return f"LoginResult({self.username!r}, user_id={self.user_id})"
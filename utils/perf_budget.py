@@ -0,0 +1,186 @@
+"""pytest plugin behind @pytest.mark.perf_budget: repeats a test, measures its API calls and gates on latency.
+
+    @pytest.mark.perf_budget(p95_ms=800, max_ms=2000, repeat=5,
+                             endpoints={"POST /CheckOut/{user}": {"p95_ms": 500}})
+
+Budgets apply to every endpoint the test calls, endpoints overrides them per endpoint. With a baseline
+file the samples are also compared against the stored ones with a one-sided Mann-Whitney U test.
+Tests that change server state (login, checkout) pass stateful=True and run once whatever --perf-repeat says.
+"""
+import inspect
+import json
+import math
+import os
+import statistics
+import threading
+import pytest
+from filelock import FileLock
+
+FAIL = "fail"
+WARN = "warn"
+OFF = "off"
+DEFAULT_REPEAT = 5
+DEFAULT_TOLERANCE = 0.2
+DEFAULT_ALPHA = 0.05
+# Slowdowns of the median below this are jitter however significant, e.g. against a local server
+DEFAULT_MIN_DELTA_MS = 5.0
+MAX_BASELINE_SAMPLES = 200
+
+
+class PerfRegressionWarning(pytest.PytestWarning):
+    """Latency budget exceeded or regression against the baseline, reported in warn mode."""
+
+
+def mann_whitney_greater(current: list, baseline: list) -> float:
+    """One-sided p-value that current samples are stochastically greater than baseline (normal approximation)."""
+    n1, n2 = len(current), len(baseline)
+    if not n1 or not n2:
+        return 1.0
+    ranked = sorted([(value, 0) for value in current] + [(value, 1) for value in baseline])
+    ranks = [0.0] * len(ranked)
+    start = 0
+    while start < len(ranked):
+        end = start
+        while end + 1 < len(ranked) and ranked[end + 1][0] == ranked[start][0]:
+            end += 1
+        for position in range(start, end + 1):
+            ranks[position] = (start + end) / 2 + 1
+        start = end + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    mean = n1 * n2 / 2
+    deviation = math.sqrt(n1 * n2 * (n1 + n2 + 1) / 12)
+    z = (u - mean - 0.5) / deviation
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+class _Collector:
+    """Transport hook keeping the total latency of every call per endpoint, in milliseconds."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def __call__(self, sample):
+        with self.lock:
+            self.samples.setdefault(f"{sample.method} {sample.endpoint}", []).append(sample.total * 1000)
+
+
+def _percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)) - 1, 0)
+    return ordered[rank]
+
+
+class PerfBudgetPlugin:
+    """Registered by the conftest; evaluates perf_budget markers against budgets and the baseline file."""
+
+    def __init__(self, config):
+        self.mode = config.getoption("--perf-mode")
+        self.repeat = config.getoption("--perf-repeat")
+        self.baseline_path = config.getoption("--perf-baseline")
+        self.update_baseline = config.getoption("--perf-update-baseline")
+        self.baseline = {}
+        if self.baseline_path and os.path.exists(self.baseline_path):
+            with open(self.baseline_path, "r") as file:
+                self.baseline = json.load(file)
+        self.results = {}
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_pyfunc_call(self, pyfuncitem):
+        marker = pyfuncitem.get_closest_marker("perf_budget")
+        if marker is None or self.mode == OFF or inspect.iscoroutinefunction(pyfuncitem.obj):
+            return None
+        api_client = pyfuncitem.funcargs.get("api_client")
+        if api_client is None:
+            raise pytest.UsageError(f"{pyfuncitem.nodeid}: perf_budget needs the api_client fixture")
+        if marker.kwargs.get("stateful", False):
+            repeat = 1
+        else:
+            repeat = self.repeat or marker.kwargs.get("repeat", DEFAULT_REPEAT)
+        # funcargs also holds autouse and indirectly requested fixtures, the test only takes its own parameters
+        parameters = inspect.signature(pyfuncitem.obj).parameters
+        arguments = {name: value for name, value in pyfuncitem.funcargs.items() if name in parameters}
+        collector = _Collector()
+        api_client.transport.add_hook(collector)
+        try:
+            for _ in range(repeat):
+                pyfuncitem.obj(**arguments)
+        finally:
+            api_client.transport.remove_hook(collector)
+        self._evaluate(pyfuncitem, marker, collector.samples)
+        return True
+
+    def _evaluate(self, item, marker, samples: dict):
+        budgets = {key: marker.kwargs[key] for key in ("p95_ms", "max_ms") if key in marker.kwargs}
+        overrides = marker.kwargs.get("endpoints", {})
+        tolerance = marker.kwargs.get("tolerance", DEFAULT_TOLERANCE)
+        alpha = marker.kwargs.get("alpha", DEFAULT_ALPHA)
+        min_delta = marker.kwargs.get("min_delta_ms", DEFAULT_MIN_DELTA_MS)
+        baseline = self.baseline.get(item.nodeid, {})
+        problems = []
+        summary = {}
+        for endpoint, values in sorted(samples.items()):
+            p95 = _percentile(values, 95)
+            worst = max(values)
+            summary[endpoint] = {"calls": len(values), "p95_ms": p95, "max_ms": worst}
+            limits = {**budgets, **overrides.get(endpoint, {})}
+            if "p95_ms" in limits and p95 > limits["p95_ms"]:
+                problems.append(f"{endpoint}: p95 {p95:.1f} ms over budget {limits['p95_ms']} ms")
+            if "max_ms" in limits and worst > limits["max_ms"]:
+                problems.append(f"{endpoint}: max {worst:.1f} ms over budget {limits['max_ms']} ms")
+            reference = baseline.get(endpoint)
+            if reference:
+                p_value = mann_whitney_greater(values, reference)
+                median, reference_median = statistics.median(values), statistics.median(reference)
+                ratio = median / max(reference_median, 1e-9)
+                summary[endpoint].update({"baseline_ratio": ratio, "p_value": p_value})
+                if p_value < alpha and ratio > 1 + tolerance and median - reference_median > min_delta:
+                    problems.append(
+                        f"{endpoint}: median {ratio:.2f}x baseline (p={p_value:.3f}), regression over {tolerance:.0%}"
+                    )
+        self.results[item.nodeid] = {"endpoints": summary, "samples": samples, "problems": problems}
+        if not problems:
+            return
+        message = f"Performance budget exceeded in {item.nodeid}:\n  " + "\n  ".join(problems)
+        if self.mode == FAIL:
+            pytest.fail(message, pytrace=False)
+        item.warn(PerfRegressionWarning(message))
+
+    def pytest_sessionfinish(self, session):
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None:
+            workeroutput["perf_budget"] = json.dumps(self.results)
+        if not (self.update_baseline and self.baseline_path and self.results):
+            return
+        # xdist workers update the same file, each with the tests it ran
+        with FileLock(f"{self.baseline_path}.lock"):
+            baseline = {}
+            if os.path.exists(self.baseline_path):
+                with open(self.baseline_path, "r") as file:
+                    baseline = json.load(file)
+            for nodeid, result in self.results.items():
+                baseline[nodeid] = {
+                    endpoint: values[-MAX_BASELINE_SAMPLES:] for endpoint, values in result["samples"].items()
+                }
+            with open(self.baseline_path, "w") as file:
+                json.dump(baseline, file, indent=2, sort_keys=True)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        workeroutput = getattr(node, "workeroutput", {})
+        if "perf_budget" in workeroutput:
+            self.results.update(json.loads(workeroutput["perf_budget"]))
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.results:
+            return
+        terminalreporter.write_sep("-", "Performance budgets")
+        for nodeid, result in sorted(self.results.items()):
+            status = "OVER BUDGET" if result["problems"] else "ok"
+            terminalreporter.write_line(f"{nodeid} [{status}]")
+            for endpoint, stats in result["endpoints"].items():
+                line = f"    {endpoint:<45} calls {stats['calls']:>3}  p95 {stats['p95_ms']:>8.1f} ms  max {stats['max_ms']:>8.1f} ms"
+                if "baseline_ratio" in stats:
+                    line += f"  vs baseline {stats['baseline_ratio']:.2f}x (p={stats['p_value']:.3f})"
+                terminalreporter.write_line(line)
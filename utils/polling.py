@@ -0,0 +1,83 @@
+import random
+import time
+from utils.metrics import ConvergenceSample
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_INITIAL_DELAY = 0.05
+DEFAULT_MAX_DELAY = 1.0
+DEFAULT_BACKOFF = 2.0
+
+# Callables receiving a ConvergenceSample after every wait, e.g. a ConvergenceRecorder
+_hooks = []
+# Own generator, so jitter does not shift the seeded random test data
+_jitter = random.Random()
+
+
+def add_hook(hook):
+    """Register a callable receiving a ConvergenceSample after every wait."""
+    _hooks.append(hook)
+
+
+def remove_hook(hook):
+    """Unregister a hook added with add_hook()."""
+    _hooks.remove(hook)
+
+
+def wait_until(func, predicate=bool, name: str = None, timeout: float = DEFAULT_TIMEOUT,
+               initial_delay: float = DEFAULT_INITIAL_DELAY, max_delay: float = DEFAULT_MAX_DELAY,
+               backoff: float = DEFAULT_BACKOFF):
+    """Call func until predicate(result) holds or timeout seconds passed, and return the last result.
+
+    Waits between calls grow exponentially from initial_delay up to max_delay, with jitter, and never
+    run past the deadline. The caller asserts on the returned result, so a check that never converges
+    fails with the test's own message. The lag until the check passed is reported to the hooks under
+    name (e.g. the endpoint that is read back).
+    """
+    start = time.perf_counter()
+    deadline = start + timeout
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempt_start = time.perf_counter()
+        attempts += 1
+        result = func()
+        if predicate(result):
+            _notify(name or getattr(func, "__name__", "check"), attempts, attempt_start - start, True)
+            return result
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            _notify(name or getattr(func, "__name__", "check"), attempts, time.perf_counter() - start, False)
+            return result
+        time.sleep(min(delay / 2 + _jitter.uniform(0, delay / 2), remaining))
+        delay = min(delay * backoff, max_delay)
+
+
+def eventually(assertion, name: str = None, timeout: float = DEFAULT_TIMEOUT, **kwargs):
+    """Call assertion until it stops raising AssertionError and return its result.
+
+    Re-raises the last AssertionError when it still fails at the deadline. Takes the backoff
+    arguments of wait_until().
+    """
+    failure = None
+
+    def attempt():
+        nonlocal failure
+        try:
+            return True, assertion()
+        except AssertionError as error:
+            failure = error
+            return False, None
+
+    passed, result = wait_until(attempt, lambda outcome: outcome[0],
+                                name or getattr(assertion, "__name__", "check"), timeout, **kwargs)
+    if not passed:
+        raise failure
+    return result
+
+
+def _notify(name: str, attempts: int, lag: float, converged: bool):
+    if not _hooks:
+        return
+    sample = ConvergenceSample(name, attempts, lag, converged)
+    for hook in list(_hooks):
+        hook(sample)
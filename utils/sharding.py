@@ -0,0 +1,129 @@
+"""pytest plugin that records test durations and splits the suite across CI nodes by them.
+
+    pytest --store-durations                       # refresh the timing database
+    pytest --shard-count=4 --shard-index=0         # on node 0 of 4, and so on
+
+Tests are assigned longest-processing-time first to the least loaded shard, one marker category
+(smoke, functional, negative, then unmarked) at a time so every shard gets its share of each. Every
+node must see the same timing database to compute the same partition.
+"""
+import json
+import os
+import pytest
+from filelock import FileLock
+
+CATEGORIES = ("smoke", "functional", "negative")
+DEFAULT_DURATION = 1.0
+# Weight of the latest run in the stored duration, older runs fade out
+SMOOTHING = 0.5
+
+
+def category(item) -> str:
+    """First of the smoke/functional/negative markers on a test, "" for unmarked tests."""
+    for name in CATEGORIES:
+        if item.get_closest_marker(name) is not None:
+            return name
+    return ""
+
+
+def default_duration(durations: dict) -> float:
+    """Estimate for tests missing from the database: the mean known duration."""
+    return sum(durations.values()) / len(durations) if durations else DEFAULT_DURATION
+
+
+def partition(items: list, durations: dict, shard_count: int) -> list:
+    """Split items into shard_count lists of roughly equal estimated duration.
+
+    Ties are broken by nodeid so the partition only depends on the items and the durations.
+    """
+    default = default_duration(durations)
+    shards = [[] for _ in range(shard_count)]
+    loads = [0.0] * shard_count
+    order = {name: index for index, name in enumerate(CATEGORIES + ("",))}
+    grouped = sorted(
+        items,
+        key=lambda item: (order[category(item)], -durations.get(item.nodeid, default), item.nodeid)
+    )
+    for item in grouped:
+        shard = min(range(shard_count), key=lambda index: (loads[index], index))
+        shards[shard].append(item)
+        loads[shard] += durations.get(item.nodeid, default)
+    return shards
+
+
+class ShardingPlugin:
+    """Registered by the conftest; keeps the timing database and selects this node's shard."""
+
+    def __init__(self, config):
+        self.path = config.getoption("--durations-db")
+        # Under xdist the controller sees every report and stores them once
+        self.store = config.getoption("--store-durations") and not hasattr(config, "workerinput")
+        self.shard_count = config.getoption("--shard-count")
+        self.shard_index = config.getoption("--shard-index")
+        if self.shard_count < 1 or not 0 <= self.shard_index < self.shard_count:
+            raise pytest.UsageError("--shard-index must be between 0 and --shard-count - 1")
+        self.durations = {}
+        if self.path and os.path.exists(self.path):
+            with open(self.path, "r") as file:
+                self.durations = json.load(file)
+        self.measured = {}
+        self.estimates = None
+
+    @pytest.hookimpl(trylast=True)
+    def pytest_collection_modifyitems(self, session, config, items):
+        # trylast, so tests deselected with -m/-k are already gone
+        if self.shard_count == 1:
+            return
+        shards = partition(items, self.durations, self.shard_count)
+        selected = shards[self.shard_index]
+        if hasattr(config, "workerinput") or config.getoption("numprocesses", None):
+            # xdist hands tests out in order, starting with the longest keeps workers evenly busy
+            default = default_duration(self.durations)
+            selected = sorted(selected, key=lambda item: -self.durations.get(item.nodeid, default))
+        deselected = [item for shard in shards if shard is not shards[self.shard_index] for item in shard]
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+        self.estimates = [self._estimate(shard) for shard in shards]
+
+    def pytest_runtest_logreport(self, report):
+        if self.store:
+            self.measured[report.nodeid] = self.measured.get(report.nodeid, 0.0) + report.duration
+
+    def pytest_sessionfinish(self, session):
+        workeroutput = getattr(session.config, "workeroutput", None)
+        if workeroutput is not None and self.estimates is not None:
+            workeroutput["sharding"] = json.dumps(self.estimates)
+        if not (self.store and self.path and self.measured):
+            return
+        # CI nodes sharing a workspace update the same file
+        with FileLock(f"{self.path}.lock"):
+            durations = {}
+            if os.path.exists(self.path):
+                with open(self.path, "r") as file:
+                    durations = json.load(file)
+            for nodeid, duration in self.measured.items():
+                previous = durations.get(nodeid)
+                durations[nodeid] = duration if previous is None else \
+                    SMOOTHING * duration + (1 - SMOOTHING) * previous
+            with open(self.path, "w") as file:
+                json.dump(durations, file, indent=2, sort_keys=True)
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_testnodedown(self, node, error):
+        # Under xdist only the workers collect, every one of them computes the same partition
+        workeroutput = getattr(node, "workeroutput", {})
+        if self.estimates is None and "sharding" in workeroutput:
+            self.estimates = json.loads(workeroutput["sharding"])
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if self.estimates is None or hasattr(terminalreporter.config, "workerinput"):
+            return
+        terminalreporter.write_sep("-", "Test sharding")
+        terminalreporter.write_line(
+            f"shard {self.shard_index + 1}/{self.shard_count}: estimated {self.estimates[self.shard_index]:.1f}s, "
+            f"shards range from {min(self.estimates):.1f}s to {max(self.estimates):.1f}s"
+        )
+
+    def _estimate(self, items: list) -> float:
+        default = default_duration(self.durations)
+        return sum(self.durations.get(item.nodeid, default) for item in items)
@@ -0,0 +1,299 @@
+"""Soak runner: loops the suite's user journeys for hours and reports drift and client-side leaks.
+
+Usage:
+    python -m utils.soak --duration 14400 --window 300 --users 4 --rps 10 --scenario checkout=1
+    python -m utils.soak --base-url http://127.0.0.1:5000/api --duration 600 --window 30 --json soak.json
+
+Every window records per-endpoint latency, client RSS, open sockets and file descriptors, live Python
+objects and the order history size (with the latency of reading it). At the end, linear trends are
+fitted over the windows: latency against time and against order history size, resources against time.
+Resource trends start after the warm-up windows, once the connection pool and caches are filled.
+Where /proc is unavailable, RSS falls back to the peak from getrusage(); descriptors are not sampled.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import threading
+import time
+from dataclasses import dataclass, field, asdict
+from utils.api_client import BookCartClient
+from utils.auth_cache import TokenCache
+from utils.data_factory import load_test_data
+from utils.load import (DEFAULT_BASE_URL, LoadConfig, Pacer, VirtualUser, _parse_weight, _scenario_weights,
+                        _virtual_user, provision_virtual_users)
+from utils.metrics import MetricsRecorder
+from utils.transport import Transport
+
+if sys.platform != "win32":
+    import resource
+else:
+    resource = None
+
+# A trend counts when the fit explains at least this much of the variance
+MIN_R_SQUARED = 0.6
+# Fitted growth over the whole run that counts as drift or a leak
+LATENCY_DRIFT = 0.2
+LEAK_THRESHOLDS = {"rss_mb": 20.0, "sockets": 2, "fds": 5, "threads": 2}
+# Live Python objects grow with caches first, only relative growth counts
+OBJECT_GROWTH = 0.1
+# Windows left out of the resource trends, the connection pool opens its sockets in the first one
+WARMUP_WINDOWS = 1
+
+
+@dataclass
+class SoakConfig:
+    base_url: str = DEFAULT_BASE_URL
+    duration: float = 3600.0
+    window: float = 60.0
+    users: int = 2
+    rps: float = 0.0
+    weights: dict = field(default_factory=lambda: {"browse": 1, "checkout": 1})
+
+
+@dataclass
+class WindowSample:
+    """What one window of the soak run looked like, elapsed is seconds since the start at its end."""
+    elapsed: float
+    requests: int
+    errors: int
+    endpoint_p95_ms: dict
+    rss_mb: float
+    sockets: int
+    fds: int
+    threads: int
+    objects: int
+    order_history_size: int
+    order_history_ms: float
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process, the peak where /proc is unavailable, -1 on Windows."""
+    try:
+        with open("/proc/self/statm", "r") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except OSError:
+        if resource is None:
+            return -1.0
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is in kilobytes on Linux and bytes on macOS
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def open_descriptors() -> tuple:
+    """Open (file descriptors, sockets) of this process, (-1, -1) where /proc is unavailable."""
+    try:
+        names = os.listdir("/proc/self/fd")
+    except OSError:
+        return -1, -1
+    sockets = 0
+    for name in names:
+        try:
+            sockets += os.readlink(f"/proc/self/fd/{name}").startswith("socket:")
+        except OSError:
+            pass  # Closed while listing
+    return len(names), sockets
+
+
+def fit_trend(xs: list, ys: list) -> tuple:
+    """Least-squares line through the points, as (slope, intercept, r squared)."""
+    count = len(xs)
+    if count < 2:
+        return 0.0, (ys[0] if ys else 0.0), 0.0
+    mean_x = sum(xs) / count
+    mean_y = sum(ys) / count
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    syy = sum((y - mean_y) ** 2 for y in ys)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    if not sxx:
+        return 0.0, mean_y, 0.0
+    slope = sxy / sxx
+    r_squared = sxy * sxy / (sxx * syy) if syy else 0.0
+    return slope, mean_y - slope * mean_x, r_squared
+
+
+class _WindowHook:
+    """Transport hook forwarding samples to the recorder of the current window."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.recorder = MetricsRecorder()
+
+    def __call__(self, sample):
+        with self.lock:
+            recorder = self.recorder
+        recorder(sample)
+
+    def rotate(self) -> MetricsRecorder:
+        """Start a new window and return the recorder of the finished one."""
+        with self.lock:
+            finished, self.recorder = self.recorder, MetricsRecorder()
+        return finished
+
+
+def _probe_order_history(client: BookCartClient, tokens: TokenCache, user: dict) -> tuple:
+    """Order history size and read latency in ms of the probed user, (-1, 0) when it cannot be read."""
+    try:
+        token = tokens.get(user["username"], user["password"], client.users.login_user)["token"]
+        start = time.perf_counter()
+        orders = client.cart.get_orders(user["userId"], token)
+        return len(orders), (time.perf_counter() - start) * 1000
+    except Exception:
+        return -1, 0.0
+
+
+def run_soak(config: SoakConfig, on_window=None) -> list:
+    """Loop the journeys for config.duration and return one WindowSample per window."""
+    hook = _WindowHook()
+    client = BookCartClient(config.base_url, Transport(pool_size=max(config.users, 1)))
+    load_config = LoadConfig(base_url=config.base_url, users=config.users, rps=config.rps,
+                             duration=config.duration, weights=config.weights)
+    users = provision_virtual_users(client, load_config)
+    client.transport.add_hook(hook)
+    # Probing goes through its own client, so it does not count towards the journeys' latency
+    probe_client = BookCartClient(config.base_url)
+    tokens = TokenCache()
+    # Every virtual user checks out as its own user, the first one's history is tracked
+    probe_user = users[0] if users and users[0] else load_test_data()["valid_users"][0]
+    pacer = Pacer(config.rps)
+    start = time.perf_counter()
+    end_time = start + config.duration
+    threads = [
+        threading.Thread(target=_virtual_user, daemon=True,
+                         args=(client, pacer, load_config, 0, end_time, user and VirtualUser(user, tokens)))
+        for user in users
+    ]
+    for thread in threads:
+        thread.start()
+    windows = []
+    while time.perf_counter() < end_time:
+        time.sleep(max(min(start + (len(windows) + 1) * config.window, end_time) - time.perf_counter(), 0))
+        recorder = hook.rotate()
+        fds, sockets = open_descriptors()
+        history_size, history_ms = _probe_order_history(probe_client, tokens, probe_user)
+        summary = recorder.to_dict()
+        window = WindowSample(
+            elapsed=time.perf_counter() - start,
+            requests=sum(endpoint["requests"] for endpoint in summary.values()),
+            errors=sum(endpoint["errors"] for endpoint in summary.values()),
+            endpoint_p95_ms={key: endpoint["p95_ms"] for key, endpoint in summary.items()},
+            rss_mb=rss_mb(),
+            sockets=sockets,
+            fds=fds,
+            threads=threading.active_count(),
+            objects=len(gc.get_objects()),
+            order_history_size=history_size,
+            order_history_ms=history_ms
+        )
+        windows.append(window)
+        if on_window is not None:
+            on_window(window)
+    for thread in threads:
+        thread.join()
+    client.close()
+    probe_client.close()
+    return windows
+
+
+def analyze(windows: list, warmup: int = WARMUP_WINDOWS) -> dict:
+    """Fit trends over the windows and flag latency drift and client-side leaks.
+
+    Resources are fitted from the first window after warm-up, when the run has enough windows left.
+    """
+    hours = [window.elapsed / 3600 for window in windows]
+    span = hours[-1] - hours[0] if len(hours) > 1 else 0.0
+    findings = []
+    latency = {}
+    for key in sorted({key for window in windows for key in window.endpoint_p95_ms}):
+        points = [(hour, window.endpoint_p95_ms[key]) for hour, window in zip(hours, windows)
+                  if key in window.endpoint_p95_ms]
+        slope, intercept, r_squared = fit_trend([x for x, _ in points], [y for _, y in points])
+        growth = slope * span / intercept if intercept > 0 else 0.0
+        latency[key] = {"p95_ms_per_hour": slope, "r_squared": r_squared, "growth": growth}
+        if r_squared >= MIN_R_SQUARED and growth > LATENCY_DRIFT:
+            findings.append(f"latency drift: {key} p95 grows {slope:.1f} ms/hour ({growth:+.0%} over the run)")
+    history = [(window.order_history_size, window.order_history_ms) for window in windows
+               if window.order_history_size >= 0]
+    slope, intercept, r_squared = fit_trend([x for x, _ in history], [y for _, y in history])
+    order_history = {
+        "ms_per_100_orders": slope * 100,
+        "r_squared": r_squared,
+        "orders": [history[0][0], history[-1][0]] if history else []
+    }
+    added = history[-1][0] - history[0][0] if history else 0
+    if r_squared >= MIN_R_SQUARED and added and slope * added / max(intercept, 1e-9) > LATENCY_DRIFT:
+        findings.append(f"order history latency grows {slope * 100:.1f} ms per 100 orders")
+    resources = {}
+    steady = windows[warmup:] if len(windows) - warmup >= 2 else windows
+    steady_hours = hours[len(windows) - len(steady):]
+    steady_span = steady_hours[-1] - steady_hours[0] if len(steady_hours) > 1 else 0.0
+    for name in (*LEAK_THRESHOLDS, "objects"):
+        values = [getattr(window, name) for window in steady]
+        # Not sampled on this platform
+        if not values or min(values) < 0:
+            continue
+        slope, intercept, r_squared = fit_trend(steady_hours, values)
+        growth = slope * steady_span
+        limit = LEAK_THRESHOLDS.get(name, OBJECT_GROWTH * intercept)
+        resources[name] = {"per_hour": slope, "r_squared": r_squared, "growth": growth}
+        if r_squared >= MIN_R_SQUARED and growth > limit:
+            findings.append(f"possible leak: {name} grows {slope:.1f}/hour ({growth:+.1f} over the run)")
+    return {"latency": latency, "order_history": order_history, "resources": resources, "findings": findings}
+
+
+def format_window(window: WindowSample) -> str:
+    worst = max(window.endpoint_p95_ms.items(), key=lambda item: item[1], default=("-", 0.0))
+    # Negative resources were not sampled on this platform
+    rss = f"{window.rss_mb:.1f}" if window.rss_mb >= 0 else "n/a"
+    sockets = window.sockets if window.sockets >= 0 else "n/a"
+    return (f"{window.elapsed:>8.0f}s {window.requests:>7} {window.errors:>5} {worst[1]:>9.1f}  {worst[0]:<40}"
+            f" {rss:>7} {sockets:>7} {window.objects:>9} {window.order_history_size:>7}"
+            f" {window.order_history_ms:>8.1f}")
+
+
+WINDOW_HEADER = (f"{'elapsed':>9} {'reqs':>7} {'errs':>5} {'p95 ms':>9}  {'slowest endpoint':<40} {'rss MB':>7}"
+                 f" {'sockets':>7} {'objects':>9} {'orders':>7} {'hist ms':>8}")
+
+
+def format_analysis(analysis: dict) -> str:
+    lines = ["latency trend per endpoint (p95):"]
+    for key, trend in analysis["latency"].items():
+        lines.append(f"  {key:<50} {trend['p95_ms_per_hour']:>+9.1f} ms/hour  r2 {trend['r_squared']:.2f}")
+    history = analysis["order_history"]
+    lines.append(f"order history read latency: {history['ms_per_100_orders']:+.2f} ms per 100 orders"
+                 f"  r2 {history['r_squared']:.2f}  orders {history['orders']}")
+    lines.append("client resources:")
+    for name, trend in analysis["resources"].items():
+        lines.append(f"  {name:<10} {trend['per_hour']:>+12.1f}/hour  r2 {trend['r_squared']:.2f}")
+    lines.append("findings:" if analysis["findings"] else "findings: none")
+    lines.extend(f"  - {finding}" for finding in analysis["findings"])
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Soak the BookCart API with the suite's journeys and report drift.")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="Base URL for the Book Cart API")
+    parser.add_argument("--duration", type=float, default=3600.0, help="Soak duration in seconds")
+    parser.add_argument("--window", type=float, default=60.0, help="Seconds per sampling window")
+    parser.add_argument("--users", type=int, default=2, help="Concurrent virtual users")
+    parser.add_argument("--rps", type=float, default=0.0, help="Target requests per second (0 = unlimited)")
+    parser.add_argument("--scenario", type=_parse_weight, action="append",
+                        help="Scenario and weight, e.g. checkout=1 (repeatable, default browse=1 checkout=1)")
+    parser.add_argument("--json", dest="json_path", help="Write windows and analysis to this JSON file")
+    args = parser.parse_args(argv)
+
+    config = SoakConfig(base_url=args.base_url, duration=args.duration, window=args.window,
+                        users=args.users, rps=args.rps)
+    config.weights = _scenario_weights(parser, args.scenario, config.weights)
+    print(WINDOW_HEADER)
+    windows = run_soak(config, on_window=lambda window: print(format_window(window), flush=True))
+    analysis = analyze(windows)
+    print(format_analysis(analysis))
+    if args.json_path:
+        with open(args.json_path, "w") as file:
+            json.dump({"windows": [asdict(window) for window in windows], "analysis": analysis}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import codecs
+import json
+import requests
+
+DEFAULT_CHUNK_SIZE = 16384
+_WHITESPACE = " \t\n\r"
+
+
+def iter_json_array(response: requests.Response, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield the items of a streamed top-level JSON array one at a time.
+
+    Only the unparsed tail of the body is kept in memory, so memory stays flat for long lists. An
+    item is decoded again only once a chunk arrives that may end it (one with a "," or "]"), so an
+    item spanning many chunks is not re-parsed for every chunk.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = response.iter_content(chunk_size=chunk_size)
+    buffer = ""
+    position = 0
+    eof = False
+
+    def read_more(until_delimiter: bool = False) -> bool:
+        """Append the next chunk, with until_delimiter every chunk up to one containing "," or "]"."""
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        parts = [buffer[position:]]
+        while True:
+            chunk = next(chunks, None)
+            if chunk is None:
+                eof = True
+                parts.append(text_decoder.decode(b"", final=True))
+                break
+            text = text_decoder.decode(chunk)
+            parts.append(text)
+            if not until_delimiter or "," in text or "]" in text:
+                break
+        buffer = "".join(parts)
+        position = 0
+        return True
+
+    def next_char() -> str:
+        """Next non-whitespace character without consuming it, None at the end of the body."""
+        nonlocal position
+        while True:
+            while position < len(buffer) and buffer[position] in _WHITESPACE:
+                position += 1
+            if position < len(buffer):
+                return buffer[position]
+            if not read_more():
+                return None
+
+    char = next_char()
+    if char != "[":
+        raise ValueError(f"Expected a JSON array, got {char!r}")
+    position += 1
+    if next_char() == "]":
+        return
+    while True:
+        char = next_char()
+        if char is None:
+            raise ValueError("Unexpected end of JSON array")
+        if char in ",]":
+            # A leading, doubled or trailing comma
+            raise ValueError(f"Expected an array item, got {char!r}")
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if not read_more(until_delimiter=True):
+                    raise
+                continue
+            delimiter = end
+            while delimiter < len(buffer) and buffer[delimiter] in _WHITESPACE:
+                delimiter += 1
+            if delimiter < len(buffer) and buffer[delimiter] in ",]":
+                break
+            # A value is only complete once "," or "]" follows it, e.g. a number split at "." or "e"
+            # decodes early as its integer part
+            if not read_more(until_delimiter=True):
+                if delimiter < len(buffer):
+                    raise ValueError(f"Expected ',' or ']' after an array item, got {buffer[delimiter]!r}")
+                break
+        position = end
+        yield item
+        char = next_char()
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError("Unexpected end of JSON array" if char is None
+                             else f"Expected ',' or ']' after an array item, got {char!r}")
+        position += 1
+
+
+def find_first(items, predicate):
+    """Get the first item matching predicate, None if there is none; stops consuming items on a match."""
+    for item in items:
+        if predicate(item):
+            return item
+    return None
+
+
+def contains_book(book_id: int):
+    """Predicate for orders or carts: True when one of its items is the given book."""
+    def predicate(entry: dict) -> bool:
+        details = entry.get("orderDetails", [entry])
+        return any(item.get("book", {}).get("bookId") == book_id for item in details)
+    return predicate
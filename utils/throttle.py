@@ -0,0 +1,196 @@
+import email.utils
+import threading
+import time
+import requests
+
+DEFAULT_MIN_RATE = 1.0
+DEFAULT_INCREASE = 5.0
+DEFAULT_DECREASE_FACTOR = 0.7
+DEFAULT_LATENCY_FACTOR = 2.0
+# Latency growth below this is jitter, e.g. against a local server answering in a few milliseconds
+DEFAULT_LATENCY_FLOOR = 0.05
+DEFAULT_COOLDOWN = 1.0
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 10.0
+# Suggested wait while another request probes an open circuit, so callers do not spin
+PROBE_RETRY_IN = 1.0
+# Statuses that mean the backend is overloaded rather than the request being wrong
+OVERLOAD_STATUS_CODES = (429, 502, 503, 504)
+_BASELINE_WEIGHT = 0.02
+_RECENT_WEIGHT = 0.2
+
+
+def parse_retry_after(value: str) -> float:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP date), None when missing or invalid."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AdaptiveRateLimiter:
+    """Client-wide token bucket whose rate adapts with AIMD to what the backend sustains.
+
+    Until the first sign of overload every successful response adds 1 (the rate doubles each second),
+    afterwards increase / rate (about increase requests/sec per second). 429/502/503/504, timeouts and
+    latency growing past latency_factor times its baseline (and by at least latency_floor seconds)
+    multiply the rate by decrease_factor, at most once per cooldown. A Retry-After pauses all callers.
+    """
+
+    def __init__(self, rate: float, max_rate: float = None, min_rate: float = DEFAULT_MIN_RATE,
+                 burst: float = 1.0, increase: float = DEFAULT_INCREASE,
+                 decrease_factor: float = DEFAULT_DECREASE_FACTOR,
+                 latency_factor: float = DEFAULT_LATENCY_FACTOR, latency_floor: float = DEFAULT_LATENCY_FLOOR,
+                 cooldown: float = DEFAULT_COOLDOWN):
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min(min_rate, rate)
+        self.burst = burst
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.latency_factor = latency_factor
+        self.latency_floor = latency_floor
+        self.cooldown = cooldown
+        self.slow_start = True
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        self.baseline_latency = None
+        self.recent_latency = None
+        self.throttled = 0
+        self.decreases = 0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request may be sent."""
+        with self.lock:
+            now = time.monotonic()
+            if now > self.updated:
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+            self.tokens -= 1
+            # updated lies in the future while paused by a Retry-After
+            delay = (self.updated - now) + max(-self.tokens, 0.0) / self.rate
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_response(self, status: int, latency: float, retry_after: float = None):
+        """Adapt the rate to a response; status 0 stands for a timeout or connection error."""
+        with self.lock:
+            now = time.monotonic()
+            if status == 0 or status in OVERLOAD_STATUS_CODES:
+                if status == 429:
+                    self.throttled += 1
+                if retry_after:
+                    self.updated = max(self.updated, now + retry_after)
+                    self.tokens = min(self.tokens, 0.0)
+                self._decrease(now)
+                return
+            if status >= 500:
+                return
+            if self.baseline_latency is None:
+                self.baseline_latency = self.recent_latency = latency
+            self.recent_latency += _RECENT_WEIGHT * (latency - self.recent_latency)
+            if self.recent_latency > max(self.baseline_latency * self.latency_factor,
+                                         self.baseline_latency + self.latency_floor):
+                self._decrease(now)
+                return
+            # Only uncongested responses move the baseline, so it does not creep up under load
+            self.baseline_latency += _BASELINE_WEIGHT * (latency - self.baseline_latency)
+            self.rate += 1.0 if self.slow_start else self.increase / self.rate
+            if self.max_rate:
+                self.rate = min(self.rate, self.max_rate)
+
+    def _decrease(self, now: float):
+        # Responses to requests already in flight reflect the old rate, react to them only once
+        if now - self.last_decrease < self.cooldown:
+            return
+        self.last_decrease = now
+        self.slow_start = False
+        self.rate = max(self.rate * self.decrease_factor, self.min_rate)
+        self.decreases += 1
+
+    def stats(self) -> dict:
+        return {"throttled": self.throttled, "decreases": self.decreases}
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of sending a request to an endpoint whose circuit is open."""
+
+    def __init__(self, endpoint: str, failures: int, retry_in: float, last_error: str):
+        super().__init__(
+            f"Circuit open for {endpoint} after {failures} consecutive failures "
+            f"(last: {last_error}), retrying in {retry_in:.1f}s"
+        )
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Per-endpoint circuit breaker that fails fast while an endpoint keeps failing.
+
+    After failure_threshold consecutive timeouts or 5xx responses the circuit opens and requests
+    are rejected with CircuitOpenError; after reset_timeout one trial request is let through,
+    closing the circuit again on success.
+    """
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.circuits = {}
+        self.rejected = 0
+        self.opened = 0
+        self.lock = threading.Lock()
+
+    def before(self, endpoint: str) -> bool:
+        """Raise CircuitOpenError if a request to endpoint may not be sent now.
+
+        Returns True when the request is the trial request of an open circuit; the caller must
+        record() its outcome or release() it.
+        """
+        with self.lock:
+            circuit = self.circuits.get(endpoint)
+            if circuit is None or circuit["opened_at"] is None:
+                return False
+            retry_in = circuit["opened_at"] + self.reset_timeout - time.monotonic()
+            if retry_in <= 0 and not circuit["probing"]:
+                circuit["probing"] = True
+                return True
+            self.rejected += 1
+            if retry_in <= 0:
+                # A trial request is in flight, its outcome decides
+                retry_in = min(PROBE_RETRY_IN, self.reset_timeout)
+            raise CircuitOpenError(endpoint, circuit["failures"], retry_in, circuit["last_error"])
+
+    def release(self, endpoint: str):
+        """Give up a trial request that never got an outcome, so the next request may probe."""
+        with self.lock:
+            circuit = self.circuits.get(endpoint)
+            if circuit is not None:
+                circuit["probing"] = False
+
+    def record(self, endpoint: str, status: int, error: str = None):
+        """Count the outcome of a sent request; status 0 stands for a timeout or connection error."""
+        with self.lock:
+            circuit = self.circuits.setdefault(
+                endpoint, {"failures": 0, "opened_at": None, "probing": False, "last_error": None}
+            )
+            if status and status < 500:
+                circuit.update(failures=0, opened_at=None, probing=False)
+                return
+            circuit["failures"] += 1
+            circuit["last_error"] = error or f"HTTP {status}"
+            if circuit["probing"] or circuit["failures"] >= self.failure_threshold:
+                if circuit["opened_at"] is None:
+                    self.opened += 1
+                circuit.update(opened_at=time.monotonic(), probing=False)
+
+    def stats(self) -> dict:
+        return {"opened": self.opened, "rejected": self.rejected}
@@ -0,0 +1,220 @@
+import socket
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+from utils.cassette import Cassette, REPLAY
+from utils.metrics import RequestSample
+from utils.throttle import AdaptiveRateLimiter, CircuitBreaker, parse_retry_after
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_BACKOFF_FACTOR = 0.3
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# DNS and connect time of the request currently sent by this thread, 0 when a pooled connection is reused
+_connect_timings = threading.local()
+
+
+class _TimedConnectionMixin:
+    """Measures DNS resolution and connection setup (TCP + TLS) of new connections."""
+
+    def _new_conn(self):
+        # Resolve once, timed, then have urllib3 connect to each resolved address in turn; a numeric
+        # address does not go through the resolver again
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host.strip("[]"), self.port, allowed_gai_family(), socket.SOCK_STREAM)
+        except socket.gaierror:
+            # urllib3 resolves again and raises its own error for it
+            return super()._new_conn()
+        finally:
+            _connect_timings.dns = getattr(_connect_timings, "dns", 0.0) + time.perf_counter() - start
+        error = None
+        try:
+            for *_, address in addresses:
+                self._dns_host = address[0]
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as connect_error:
+                    # Also NewConnectionError, like create_connection() the next address is tried
+                    error = connect_error
+        finally:
+            self._dns_host = host
+        if error is None:
+            return super()._new_conn()
+        raise error
+
+    def connect(self):
+        start = time.perf_counter()
+        dns_before = getattr(_connect_timings, "dns", 0.0)
+        super().connect()
+        dns = getattr(_connect_timings, "dns", 0.0) - dns_before
+        _connect_timings.connect = getattr(_connect_timings, "connect", 0.0) + time.perf_counter() - start - dns
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools open timed connections."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool
+        }
+
+
+class Transport:
+    """Shared pooled HTTP session used by all API categories.
+
+    An optional rate limiter paces and adapts the request rate of every facade sharing the transport,
+    an optional circuit breaker fails fast on endpoints that keep failing.
+    """
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, timeout: float = DEFAULT_TIMEOUT,
+                 retries: int = 0, backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 rate_limiter: AdaptiveRateLimiter = None, circuit_breaker: CircuitBreaker = None):
+        self.timeout = timeout
+        self.hooks = []
+        self.cassette = None
+        self.rate_limiter = rate_limiter
+        self.circuit_breaker = circuit_breaker
+        self._closed_stats = {"requests": 0, "connections": 0}
+        self.session = requests.Session()
+        self.session.headers["Connection"] = "keep-alive"
+        # Only idempotent methods are retried, POST (add to cart, checkout) never is
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False
+        )
+        self.adapter = _TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+
+    def add_hook(self, hook):
+        """Register a callable receiving a RequestSample after every request."""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """Unregister a hook added with add_hook()."""
+        self.hooks.remove(hook)
+
+    def use_cassette(self, cassette: Cassette):
+        """Record every response into a cassette, or replay them from it without network access."""
+        self.cassette = cassette
+
+    def request(self, method: str, url: str, endpoint: str = None, **kwargs) -> requests.Response:
+        """Send a request through the pooled session with the default timeout.
+
+        endpoint is the path template (e.g. /Book/{id}) samples are grouped by, the url is used when missing.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.cassette is not None and self.cassette.mode == REPLAY:
+            return self._send(method, url, endpoint, kwargs)
+        key = f"{method} {endpoint or url}"
+        probe = self.circuit_breaker is not None and self.circuit_breaker.before(key)
+        recorded = False
+        try:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            start = time.perf_counter()
+            try:
+                response = self._send(method, url, endpoint, kwargs)
+            except requests.RequestException as error:
+                recorded = True
+                self._adapt(key, 0, time.perf_counter() - start, None, type(error).__name__)
+                raise
+            recorded = True
+            self._adapt(key, response.status_code, time.perf_counter() - start, response.headers.get("Retry-After"))
+            return response
+        finally:
+            # Anything else raised (rate limiter, cassette) would leave the endpoint probing forever
+            if probe and not recorded:
+                self.circuit_breaker.release(key)
+
+    def _adapt(self, key: str, status: int, latency: float, retry_after: str, error: str = None):
+        if self.rate_limiter is not None:
+            self.rate_limiter.on_response(status, latency, parse_retry_after(retry_after))
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.record(key, status, error)
+
+    def _send(self, method: str, url: str, endpoint: str, kwargs: dict) -> requests.Response:
+        _connect_timings.dns = 0.0
+        _connect_timings.connect = 0.0
+        start = time.perf_counter()
+        try:
+            if self.cassette is not None and self.cassette.mode == REPLAY:
+                response = self.cassette.replay(method, url, endpoint, kwargs)
+            else:
+                response = self.session.request(method, url, **kwargs)
+                if self.cassette is not None:
+                    self.cassette.record(method, url, endpoint, kwargs, response)
+        except Exception:
+            self._notify(method, endpoint or url, 0, 0, None, time.perf_counter() - start)
+            raise
+        if kwargs.get("stream") and self.cassette is None:
+            size = int(response.headers.get("Content-Length") or 0)
+        else:
+            size = len(response.content)
+        self._notify(method, endpoint or url, response.status_code, size, response.elapsed.total_seconds(),
+                     time.perf_counter() - start)
+        return response
+
+    def _notify(self, method: str, endpoint: str, status: int, size: int, elapsed: float, total: float):
+        if not self.hooks:
+            return
+        dns = _connect_timings.dns
+        connect = _connect_timings.connect
+        # requests' elapsed runs from sending until the headers are parsed, including connection setup
+        ttfb = max((elapsed if elapsed is not None else total) - dns - connect, 0.0)
+        sample = RequestSample(method, endpoint, status, size, dns, connect, ttfb, total)
+        for hook in list(self.hooks):
+            hook(sample)
+
+    def connection_stats(self) -> dict:
+        """Get request and connection counts across all connection pools."""
+        requests_sent = self._closed_stats["requests"]
+        connections_opened = self._closed_stats["connections"]
+        pools = self.adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+        return {
+            "requests": requests_sent,
+            "connections": connections_opened,
+            "reused": max(requests_sent - connections_opened, 0)
+        }
+
+    def close(self):
+        """Close all pooled connections, keeping their counts for connection_stats()."""
+        stats = self.connection_stats()
+        self._closed_stats = {"requests": stats["requests"], "connections": stats["connections"]}
+        self.session.close()
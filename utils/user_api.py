@@ -1,18 +1,18 @@
 import requests
 from utils.data_factory import UserRegistration
 from utils.base_api import BaseAPI
+from utils.models import LoginResult
 
 class UserAPI(BaseAPI):
     """API methods for user management (registration, login)."""
     
     def register_user(self, user: UserRegistration) -> requests.Response:
         """Register a new user."""
-        return requests.post(f"{self.base_url}/User", json=user.to_dict())
+        return self._request("POST", "/User", json=user.to_dict())
 
     def validate_username(self, username: str) -> bool:
         """Validate username."""
-        url = f"{self.base_url}/User/validateUserName/{username}"
-        response = requests.get(url)
+        response = self._request("GET", "/User/validateUserName/{username}", {"username": username})
         response.raise_for_status()
         return response.json() is True
 
@@ -22,4 +22,10 @@ class UserAPI(BaseAPI):
             "username": username,
             "password": password
         }
-        return requests.post(f"{self.base_url}/login", json=payload) 
\ No newline at end of file
+        return self._request("POST", "/login", json=payload)
+
+    def login(self, username: str, password: str) -> LoginResult:
+        """Login and return the token and user details as a LoginResult."""
+        response = self.login_user(username, password)
+        response.raise_for_status()
+        return LoginResult(response.json())
@@ -0,0 +1,89 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from utils.api_client import BookCartClient
+from utils.data_factory import generate_valid_registration_data
+from utils.polling import wait_until
+
+DEFAULT_SETUP_WORKERS = 16
+
+
+def worker_index() -> int:
+    """Index of the current xdist worker (gw3 -> 3), 0 when not running under xdist."""
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "gw0")
+    return int(worker.lstrip("gw") or 0)
+
+
+def worker_slot(shard_index: int = 0) -> int:
+    """Index of the current worker across all CI shards, assuming every node runs as many xdist workers.
+
+    Shard 1 with 4 workers per node has slots 4-7, so the same xdist worker on different nodes never
+    leases the same user.
+    """
+    workers = int(os.environ.get("PYTEST_XDIST_WORKER_COUNT", "1"))
+    return shard_index * workers + worker_index()
+
+
+class UserPool:
+    """Leases a dedicated test user per worker so parallel workers never share a cart.
+
+    Worker N (a worker_slot() when sharded) gets the N-th pre-provisioned user; workers beyond the pool, or every worker when
+    register is set, get a freshly registered user instead.
+    """
+
+    def __init__(self, provisioned_users: list, register: bool = False):
+        self.provisioned_users = provisioned_users
+        self.register = register
+
+    def lease(self, client: BookCartClient, worker: int = None) -> dict:
+        """Get the user for a worker with an emptied cart."""
+        worker = worker_index() if worker is None else worker
+        if not self.register and worker < len(self.provisioned_users):
+            user = self.provisioned_users[worker]
+        else:
+            user = self.register_user(client)
+        self.reset_cart(client, user["userId"])
+        return user
+
+    @staticmethod
+    def register_user(client: BookCartClient) -> dict:
+        """Register a new user and look up its userId by logging in."""
+        user_data = generate_valid_registration_data()
+        response = client.users.register_user(user_data)
+        response.raise_for_status()
+        # Login right after registration can return 401 for a moment (see BUGS.md)
+        response = wait_until(
+            lambda: client.users.login_user(user_data.username, user_data.password),
+            lambda response: response.status_code != 401,
+            name="POST /login after registration"
+        )
+        response.raise_for_status()
+        return {
+            "username": user_data.username,
+            "password": user_data.password,
+            "userId": response.json()["userDetails"]["userId"]
+        }
+
+    @staticmethod
+    def reset_cart(client: BookCartClient, user_id: int):
+        """Remove every item left in the user's cart."""
+        result = client.cart.clear_cart(user_id)
+        if not result.ok:
+            raise RuntimeError(f"Failed to reset cart of user {user_id}: {result.failed}")
+
+
+def provision_users(client: BookCartClient, count: int, users_file: str = None,
+                    max_workers: int = DEFAULT_SETUP_WORKERS) -> list:
+    """Get count dedicated users, registering the ones users_file does not have yet."""
+    users = []
+    if users_file and os.path.exists(users_file):
+        with open(users_file, "r") as file:
+            users = json.load(file)
+    missing = count - len(users)
+    if missing > 0:
+        with ThreadPoolExecutor(max_workers=min(max_workers, missing)) as executor:
+            users.extend(executor.map(lambda _: UserPool.register_user(client), range(missing)))
+        if users_file:
+            with open(users_file, "w") as file:
+                json.dump(users, file, indent=2)
+    return users[:count]